@@ -0,0 +1,58 @@
+import tempfile
+
+from django.contrib import admin, messages
+from django.http import FileResponse
+from django.utils.text import slugify
+
+from .db_routers import use_replica
+from .models import AcademicYear, Class, Period
+from .report_card_batch import build_report_cards, render_report_cards, write_zip
+
+
+def report_cards_response(scope, classes=None):
+    """
+    Render the report cards in this process (no worker pool inside a request) into a
+    temporary file streamed back as a zip, reading them from the replica. Large batches
+    belong to the generate_report_cards command.
+    """
+    with use_replica():
+        cards = build_report_cards(scope, classes)
+    archive = tempfile.TemporaryFile()
+    write_zip(render_report_cards(cards, workers=1), archive)
+    archive.seek(0)
+    return FileResponse(
+        archive, as_attachment=True, filename=f'report-cards-{slugify(str(scope))}.zip', content_type='application/zip'
+    )
+
+
+@admin.register(AcademicYear)
+class AcademicYearAdmin(admin.ModelAdmin):
+    list_display = ['__str__', 'start_date', 'end_date', 'is_current']
+    actions = ['generate_report_cards']
+
+    @admin.action(description="Generate annual report cards")
+    def generate_report_cards(self, request, queryset):
+        if len(queryset) != 1:
+            self.message_user(request, "Select a single academic year.", messages.ERROR)
+            return None
+        return report_cards_response(queryset[0])
+
+
+@admin.register(Class)
+class ClassAdmin(admin.ModelAdmin):
+    list_display = ['name', 'level', 'academic_year', 'enrolled_count', 'max_students']
+    list_filter = ['academic_year', 'level']
+    search_fields = ['name']
+    actions = ['generate_report_cards']
+
+    @admin.action(description="Generate report cards for the current period")
+    def generate_report_cards(self, request, queryset):
+        academic_years = {student_class.academic_year_id for student_class in queryset}
+        if len(academic_years) != 1:
+            self.message_user(request, "Select classes of a single academic year.", messages.ERROR)
+            return None
+        period = Period.objects.current(academic_years.pop())
+        if period is None:
+            self.message_user(request, "This academic year has no current period.", messages.ERROR)
+            return None
+        return report_cards_response(period, list(queryset))
@@ -0,0 +1,99 @@
+from django.conf import settings
+from django.db.models import Case, IntegerField, Value, When
+
+from .models import Attendance, Period, Enrollment, EnrollmentAttendanceRollup, ClassAttendanceRollup
+
+
+STUDENT_FIELDS = [
+    'enrollment', 'enrollment__student__student_id',
+    'enrollment__student__user__last_name', 'enrollment__student__user__first_name',
+    'enrollment__student_class__name',
+]
+
+
+def enrollment_rates(period, student_class=None):
+    """Attendance rates of every enrollment (optionally of one class) over a period."""
+    attendances = Attendance.objects.in_period(period)
+    if student_class is not None:
+        attendances = attendances.filter(enrollment__student_class=student_class)
+    return attendances.rates('enrollment')
+
+
+def class_rates(period):
+    return Attendance.objects.in_period(period).rates('enrollment__student_class')
+
+
+def subject_rates(period, student_class=None):
+    attendances = Attendance.objects.in_period(period)
+    if student_class is not None:
+        return attendances.filter(enrollment__student_class=student_class).rates('subject')
+    return attendances.rates('enrollment__student_class', 'subject')
+
+
+def period_rates(academic_year, *fields):
+    """
+    Attendance rates per period of an academic year, further grouped by `fields`
+    (e.g. 'enrollment__student_class'). Attendance has no period, so each row is assigned
+    to the period whose dates contain it, in SQL.
+    """
+    periods = list(Period.objects.filter(academic_year=academic_year).order_by('start_date'))
+    period = Case(
+        *(When(date__range=(p.start_date, p.end_date), then=Value(p.pk)) for p in periods),
+        output_field=IntegerField(),
+    )
+    return Attendance.objects.filter(
+        date__range=(academic_year.start_date, academic_year.end_date)
+    ).annotate(period=period).filter(period__isnull=False).rates('period', *fields)
+
+
+def chronic_absences(period, threshold=None, min_sessions=None):
+    """
+    Enrollments whose absence rate (absent or excused sessions, in percent) over `period` is at
+    least `threshold`, among those with at least `min_sessions` recorded sessions. Defaults come
+    from the CHRONIC_ABSENCE_THRESHOLD and CHRONIC_ABSENCE_MIN_SESSIONS settings.
+    """
+    if threshold is None:
+        threshold = getattr(settings, 'CHRONIC_ABSENCE_THRESHOLD', 10.0)
+    if min_sessions is None:
+        min_sessions = getattr(settings, 'CHRONIC_ABSENCE_MIN_SESSIONS', 10)
+    return Attendance.objects.in_period(period).rates(*STUDENT_FIELDS).filter(
+        absence_rate__gte=threshold, total__gte=min_sessions
+    ).order_by('-absence_rate', 'enrollment__student__user__last_name')
+
+
+def refresh_rollups(keys):
+    """
+    Bring the enrollment and class attendance rollups of the given (enrollment id, date) keys
+    up to date. Called by the attendance write paths.
+    """
+    keys = {key for key in keys if key[0] is not None}
+    if not keys:
+        return
+    classes = dict(
+        Enrollment.objects.filter(pk__in={enrollment_id for enrollment_id, _ in keys}).order_by().values_list(
+            'pk', 'student_class_id'
+        )
+    )
+    EnrollmentAttendanceRollup.objects.refresh(keys)
+    ClassAttendanceRollup.objects.refresh((classes.get(enrollment_id), date) for enrollment_id, date in keys)
+
+
+def rebuild_rollups(start_date=None, end_date=None):
+    return {
+        model.__name__: model.objects.rebuild(start_date, end_date)
+        for model in (EnrollmentAttendanceRollup, ClassAttendanceRollup)
+    }
+
+
+def enrollment_calendar(enrollment_id, start_date, end_date, granularity='day'):
+    """Attendance counters of an enrollment per day or ISO week, read from the rollups."""
+    return EnrollmentAttendanceRollup.objects.filter(
+        enrollment_id=enrollment_id, granularity=granularity, bucket__range=(start_date, end_date)
+    ).order_by('bucket').values('bucket', 'present', 'absent', 'late', 'excused')
+
+
+def class_heatmap(student_class_id, start_date, end_date, granularity='day'):
+    """Attendance counters of a class per day or ISO week, read from the rollups."""
+    return ClassAttendanceRollup.objects.filter(
+        student_class_id=student_class_id, granularity=granularity, bucket__range=(start_date, end_date)
+    ).order_by('bucket').values('bucket', 'present', 'absent', 'late', 'excused')
@@ -0,0 +1,96 @@
+import hashlib
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+from .cache import bump_version, versioned_key
+from .models import Class, Enrollment, Student, Subject
+
+
+class AutocompleteSource:
+    """
+    A searchable set of (id, label) pairs for one foreign-key dropdown.
+
+    Labels are built from a `values_list` projection instead of model instances, and search
+    results are cached per academic year and search term until `invalidate()` is called.
+    """
+    limit = 20
+    timeout = 60 * 60
+
+    def __init__(self, name, queryset, fields, label, search_fields, year_field=None):
+        self.name = name
+        self.queryset = queryset
+        self.fields = fields
+        self.label = label
+        self.search_fields = search_fields
+        self.year_field = year_field
+
+    def labels(self, pks):
+        """
+        Labels of the selected values. They are looked up among all rows, not only the
+        searchable ones, so a form bound to an inactive row still renders (and keeps) it.
+        Values that are not valid primary keys are ignored.
+        """
+        try:
+            rows = self.queryset.model._default_manager.filter(pk__in=pks).order_by().values_list('pk', *self.fields)
+            return [(pk, self.label(*values)) for pk, *values in rows]
+        except (ValueError, ValidationError):
+            return []
+
+    def search(self, term, academic_year_id=None):
+        term = term.strip().lower()
+        # The term is user input: hash it so keys stay short and free of spaces and control characters.
+        digest = hashlib.md5(term.encode(), usedforsecurity=False).hexdigest()
+        key = versioned_key(f'autocomplete:{self.name}', academic_year_id, digest)
+        results = cache.get(key)
+        if results is None:
+            queryset = self.queryset
+            if self.year_field and academic_year_id:
+                queryset = queryset.filter(**{self.year_field: academic_year_id})
+            if term:
+                condition = Q()
+                for field in self.search_fields:
+                    condition |= Q(**{f'{field}__istartswith': term})
+                queryset = queryset.filter(condition)
+            rows = queryset.values_list('pk', *self.fields)[:self.limit]
+            results = [(pk, self.label(*values)) for pk, *values in rows]
+            cache.set(key, results, self.timeout)
+        return results
+
+    def invalidate(self):
+        bump_version(f'autocomplete:{self.name}')
+
+
+SOURCES = {source.name: source for source in [
+    AutocompleteSource(
+        'enrollment',
+        Enrollment.objects.filter(status='active').order_by('student__user__last_name', 'student__user__first_name'),
+        fields=['student__user__first_name', 'student__user__last_name', 'student__student_id', 'student_class__name'],
+        label=lambda first_name, last_name, student_id, class_name: f"{first_name} {last_name} ({student_id}) - {class_name}",
+        search_fields=['student__user__last_name', 'student__user__first_name', 'student__student_id'],
+        year_field='academic_year',
+    ),
+    AutocompleteSource(
+        'student',
+        Student.objects.filter(is_active=True),
+        fields=['user__first_name', 'user__last_name', 'student_id'],
+        label=lambda first_name, last_name, student_id: f"{first_name} {last_name} ({student_id})",
+        search_fields=['user__last_name', 'user__first_name', 'student_id'],
+    ),
+    AutocompleteSource(
+        'class',
+        Class.objects.all(),
+        fields=['name', 'level'],
+        label=lambda name, level: f"{name} ({level})",
+        search_fields=['name', 'level'],
+        year_field='academic_year',
+    ),
+    AutocompleteSource(
+        'subject',
+        Subject.objects.filter(is_active=True),
+        fields=['name', 'code'],
+        label=lambda name, code: f"{name} ({code})",
+        search_fields=['name', 'code'],
+    ),
+]}
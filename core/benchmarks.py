@@ -0,0 +1,157 @@
+import statistics
+import time
+
+from django.db import connection, transaction
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from .exports import EXPORTS
+from .attendance import chronic_absences, class_rates
+from .cache import bump_version
+from .grade_entry import bulk_enter_grades
+from .models import AcademicYear, Period, Class, ClassSubject, Enrollment, Grade, RANKINGS_NAMESPACE
+from .rankings import rank_classes
+from .reference import current_academic_year
+from .report_cards import compute_averages
+from . import views
+
+
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    def register(func):
+        BENCHMARKS[name] = func
+        return func
+    return register
+
+
+class Rollback(Exception):
+    pass
+
+
+def _fixtures():
+    academic_year = current_academic_year() or AcademicYear.objects.first()
+    period = Period.objects.filter(academic_year=academic_year).order_by('start_date').first()
+    class_subject = ClassSubject.objects.filter(
+        student_class__academic_year=academic_year
+    ).select_related('student_class', 'subject').first()
+    if not (academic_year and period and class_subject):
+        raise LookupError("The database has no school to benchmark; run generate_school first.")
+    return {'academic_year': academic_year, 'period': period, 'class_subject': class_subject}
+
+
+def _list_view(view_class, pages):
+    def run(fixtures):
+        factory = RequestFactory()
+        cursor = None
+        for _ in range(pages):
+            view = view_class()
+            view.setup(factory.get('/', {'cursor': cursor} if cursor else {}))
+            _, page, object_list, _ = view.paginate_queryset(view.get_queryset(), view.paginate_by)
+            [str(obj) for obj in object_list]
+            cursor = page.next_cursor
+            if cursor is None:
+                break
+    return run
+
+
+for _view in (views.StudentListView, views.TeacherListView, views.ClassListView, views.SubjectListView):
+    benchmark(f'list:{_view.__name__}')(_list_view(_view, pages=1))
+    benchmark(f'list:{_view.__name__}:10-pages')(_list_view(_view, pages=10))
+
+
+@benchmark('grade_entry:class_sheet')
+def grade_entry(fixtures):
+    class_subject = fixtures['class_subject']
+    enrollments = Enrollment.objects.filter(
+        student_class=class_subject.student_class
+    ).values_list('pk', flat=True)
+    try:
+        with transaction.atomic():
+            grades, errors = bulk_enter_grades(
+                class_subject.student_class, class_subject.subject, fixtures['period'],
+                fixtures['period'].end_date, 'project',
+                [{'enrollment': pk, 'value': 10} for pk in enrollments]
+            )
+            assert not errors, errors
+            raise Rollback
+    except Rollback:
+        pass
+
+
+@benchmark('averages:class_averages')
+def class_averages(fixtures):
+    list(Grade.objects.class_averages(fixtures['period']))
+
+
+@benchmark('averages:enrollment_averages')
+def enrollment_averages(fixtures):
+    list(Grade.objects.filter(period=fixtures['period']).enrollment_averages())
+
+
+@benchmark('report_cards:period')
+def report_cards_period(fixtures):
+    compute_averages(fixtures['period'])
+
+
+@benchmark('report_cards:academic_year')
+def report_cards_year(fixtures):
+    compute_averages(fixtures['academic_year'])
+
+
+@benchmark('report_cards:academic_year:from_grades')
+def report_cards_year_from_grades(fixtures):
+    compute_averages(fixtures['academic_year'], from_grades=True)
+
+
+@benchmark('rankings:all_classes')
+def rankings(fixtures):
+    bump_version(RANKINGS_NAMESPACE)
+    rank_classes(Class.objects.filter(academic_year=fixtures['academic_year']), fixtures['period'])
+
+
+@benchmark('attendance:class_rates')
+def attendance_class_rates(fixtures):
+    list(class_rates(fixtures['period']))
+
+
+@benchmark('attendance:chronic_absences')
+def attendance_chronic_absences(fixtures):
+    list(chronic_absences(fixtures['period']))
+
+
+@benchmark('export:grades:academic_year')
+def export_grades(fixtures):
+    for _ in EXPORTS['grades'].rows(academic_year=fixtures['academic_year']):
+        pass
+
+
+def run_benchmarks(names=None, repeat=5, log=None):
+    """
+    Run the registered benchmarks against the configured database and return one result per
+    benchmark with wall-time statistics (seconds) and the number of queries of one run.
+    """
+    log = log or (lambda message: None)
+    fixtures = _fixtures()
+    results = []
+    for name, func in BENCHMARKS.items():
+        if names and not any(name.startswith(prefix) for prefix in names):
+            continue
+        timings = []
+        for _ in range(repeat):
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                func(fixtures)
+                timings.append(time.perf_counter() - start)
+        result = {
+            'name': name,
+            'repeat': repeat,
+            'min': min(timings),
+            'median': statistics.median(timings),
+            'max': max(timings),
+            'queries': len(queries),
+        }
+        log(f"{name:<45} median {result['median'] * 1000:9.2f} ms  {result['queries']:5} queries")
+        results.append(result)
+    return results
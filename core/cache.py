@@ -0,0 +1,22 @@
+import time
+
+from django.core.cache import cache
+
+
+def _version_key(namespace):
+    return f'version:{namespace}'
+
+
+def get_version(namespace):
+    return cache.get_or_set(_version_key(namespace), time.time_ns, None)
+
+
+def bump_version(namespace):
+    try:
+        cache.incr(_version_key(namespace))
+    except ValueError:
+        cache.set(_version_key(namespace), time.time_ns(), None)
+
+
+def versioned_key(namespace, *parts):
+    return ':'.join([namespace, str(get_version(namespace)), *map(str, parts)])
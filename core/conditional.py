@@ -0,0 +1,68 @@
+import hashlib
+
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.http import Http404
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+from .cache import get_version
+
+
+class ConditionalDetailMixin:
+    """
+    Conditional GET for DetailViews.
+
+    The ETag and Last-Modified date are computed with one query from `updated_fields` of the
+    object (its own and forward-related `updated_at` columns) and, for each dependency in
+    `dependencies` (a `(model, lookup to the object)` pair), the latest `updated_at` and the
+    row count of the dependent rows, so deletions change the ETag too. Cache versions of
+    `cache_namespaces` are folded into the ETag for related tables without `updated_at`.
+
+    A matching If-None-Match or If-Modified-Since is answered 304 before the object is
+    loaded. Otherwise the page is rendered with `fragment_key` in the context, to be used as
+    the vary-on key of `{% cache %}` blocks so object fragments are rendered once per version
+    and shared between users. The ETag itself varies by user, as pages also show the user.
+    Last-Modified only reflects `updated_at` columns; clients holding an ETag send
+    If-None-Match, which takes precedence.
+    """
+    updated_fields = ['updated_at']
+    dependencies = []
+    cache_namespaces = []
+
+    def get_conditional_state(self):
+        annotations = {}
+        for index, (model, lookup) in enumerate(self.dependencies):
+            rows = model._default_manager.filter(**{lookup: OuterRef('pk')}).order_by().values(lookup)
+            if any(field.name == 'updated_at' for field in model._meta.concrete_fields):
+                annotations[f'_dependency_{index}_updated'] = Subquery(
+                    rows.annotate(latest=Max('updated_at')).values('latest')
+                )
+            annotations[f'_dependency_{index}_count'] = Subquery(rows.annotate(count=Count('pk')).values('count'))
+
+        values = self.model._default_manager.filter(pk=self.kwargs[self.pk_url_kwarg]).annotate(
+            **annotations
+        ).values_list(*self.updated_fields, *annotations).first()
+        if values is None:
+            raise Http404(f"No {self.model._meta.verbose_name} found matching the query")
+
+        dates = [value for value in values if hasattr(value, 'timestamp')]
+        last_modified = int(max(dates).timestamp()) if dates else None
+        state = [*values, *(get_version(namespace) for namespace in self.cache_namespaces)]
+        self.fragment_key = hashlib.md5(repr(state).encode(), usedforsecurity=False).hexdigest()
+        return f'"{self.request.user.pk}-{self.fragment_key}"', last_modified
+
+    def get(self, request, *args, **kwargs):
+        self.etag, self.last_modified = self.get_conditional_state()
+        response = get_conditional_response(request, etag=self.etag, last_modified=self.last_modified)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+        response.headers['ETag'] = self.etag
+        if self.last_modified is not None:
+            response.headers['Last-Modified'] = http_date(self.last_modified)
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['fragment_key'] = self.fragment_key
+        return context
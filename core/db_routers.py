@@ -0,0 +1,55 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+
+_use_replica = ContextVar('use_replica', default=False)
+
+
+@contextmanager
+def use_replica():
+    """Send the reads made inside the block to the 'replica' database, when one is configured."""
+    token = _use_replica.set(True)
+    try:
+        yield
+    finally:
+        _use_replica.reset(token)
+
+
+def replica_in_use():
+    """Whether reads made here go to the replica (inside `use_replica()`, with one configured)."""
+    return _use_replica.get() and 'replica' in settings.DATABASES
+
+
+class ReplicaRouter:
+    """
+    Reads go to the primary unless they are made inside `use_replica()`, so requests that
+    write and then read back never see replication lag. Writes and migrations always use
+    the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        if replica_in_use():
+            return 'replica'
+        return None
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db != 'replica'
+
+
+class ReplicaReadMixin:
+    """Serve the whole GET request of a view from the read replica."""
+
+    def get(self, request, *args, **kwargs):
+        with use_replica():
+            response = super().get(request, *args, **kwargs)
+            if hasattr(response, 'render') and callable(response.render):
+                response.render()
+        return response
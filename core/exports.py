@@ -0,0 +1,106 @@
+import csv
+from itertools import chain
+
+from .models import Attendance, Enrollment, Grade
+
+
+class Echo:
+    def write(self, value):
+        return value
+
+
+class Export:
+    """
+    A CSV export of one model as a flat `values_list` projection.
+
+    `filters` maps the name of each supported filter (academic_year, period, class, subject)
+    to a function returning the lookups it adds for the selected object.
+    """
+    chunk_size = 2000
+
+    def __init__(self, model, columns, filters):
+        self.model = model
+        self.columns = columns
+        self.filters = filters
+
+    def queryset(self, **selected):
+        lookups = {}
+        for name, value in selected.items():
+            if value is None:
+                continue
+            if name not in self.filters:
+                raise ValueError(f"This export cannot be filtered by {name.replace('_', ' ')}.")
+            lookups.update(self.filters[name](value))
+        return self.model.objects.filter(**lookups).order_by('pk').values_list(
+            *[path for _, path in self.columns]
+        )
+
+    def rows(self, **selected):
+        writer = csv.writer(Echo())
+        header = [title for title, _ in self.columns]
+        return (
+            writer.writerow(row)
+            for row in chain([header], self.queryset(**selected).iterator(chunk_size=self.chunk_size))
+        )
+
+
+STUDENT_COLUMNS = [
+    ('student_id', 'student__student_id'),
+    ('last_name', 'student__user__last_name'),
+    ('first_name', 'student__user__first_name'),
+    ('class', 'student_class__name'),
+    ('level', 'student_class__level'),
+]
+
+EXPORTS = {
+    'grades': Export(
+        Grade,
+        [(title, f'enrollment__{path}') for title, path in STUDENT_COLUMNS] + [
+            ('period', 'period__name'),
+            ('subject', 'subject__code'),
+            ('grade_type', 'grade_type'),
+            ('date_graded', 'date_graded'),
+            ('value', 'value'),
+            ('max_value', 'max_value'),
+            ('coefficient', 'coefficient'),
+            ('comment', 'comment'),
+        ],
+        {
+            'academic_year': lambda year: {'enrollment__academic_year': year},
+            'period': lambda period: {'period': period},
+            'student_class': lambda student_class: {'enrollment__student_class': student_class},
+            'subject': lambda subject: {'subject': subject},
+        },
+    ),
+    'attendance': Export(
+        Attendance,
+        [(title, f'enrollment__{path}') for title, path in STUDENT_COLUMNS] + [
+            ('subject', 'subject__code'),
+            ('date', 'date'),
+            ('status', 'status'),
+            ('reason', 'reason'),
+        ],
+        {
+            'academic_year': lambda year: {'enrollment__academic_year': year},
+            'period': lambda period: {
+                'enrollment__academic_year': period.academic_year_id,
+                'date__range': (period.start_date, period.end_date),
+            },
+            'student_class': lambda student_class: {'enrollment__student_class': student_class},
+            'subject': lambda subject: {'subject': subject},
+        },
+    ),
+    'enrollments': Export(
+        Enrollment,
+        STUDENT_COLUMNS + [
+            ('academic_year_start', 'academic_year__start_date'),
+            ('date_enrolled', 'date_enrolled'),
+            ('status', 'status'),
+        ],
+        {
+            'academic_year': lambda year: {'academic_year': year},
+            'period': lambda period: {'academic_year': period.academic_year_id},
+            'student_class': lambda student_class: {'student_class': student_class},
+        },
+    ),
+}
@@ -1,8 +1,25 @@
 from django import forms
+from django.utils import timezone
 from .models import (
     AcademicYear, Period, Class, Teacher, Student, Subject,
-    ClassSubject, Enrollment, Attendance, Grade, Profile
+    ClassSubject, Enrollment, Attendance, AttendanceRollup, Grade, Profile
 )
+from .widgets import AutocompleteSelect
+
+
+class ChoiceQuerysetsMixin:
+    """Replace the default choice querysets of a ModelForm with ones that fetch what `__str__` needs."""
+    choice_querysets = {}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        for name, queryset in self.choice_querysets.items():
+            self.fields[name].queryset = queryset.all()
+
+
+PERIOD_CHOICES = Period.objects.select_related('academic_year')
+CLASS_CHOICES = Class.objects.select_related('academic_year')
+TEACHER_CHOICES = Teacher.objects.select_related('user')
 
 
 class AcademicYearForm(forms.ModelForm):
@@ -81,7 +98,9 @@ class TeacherForm(forms.ModelForm):
         }
 
 
-class StudentForm(forms.ModelForm):
+class StudentForm(ChoiceQuerysetsMixin, forms.ModelForm):
+    choice_querysets = {'student_class': CLASS_CHOICES}
+
     class Meta:
         model = Student
         fields = ['user', 'student_id', 'student_class', 'date_of_birth', 'enrollment_date', 'is_active']
@@ -103,7 +122,9 @@ class StudentForm(forms.ModelForm):
         }
 
 
-class SubjectForm(forms.ModelForm):
+class SubjectForm(ChoiceQuerysetsMixin, forms.ModelForm):
+    choice_querysets = {'teacher': TEACHER_CHOICES}
+
     class Meta:
         model = Subject
         fields = ['name', 'code', 'description', 'coefficient', 'teacher', 'is_active']
@@ -125,7 +146,12 @@ class SubjectForm(forms.ModelForm):
         }
 
 
-class ClassSubjectForm(forms.ModelForm):
+class ClassSubjectForm(ChoiceQuerysetsMixin, forms.ModelForm):
+    choice_querysets = {
+        'teacher': TEACHER_CHOICES,
+        'period': PERIOD_CHOICES,
+    }
+
     class Meta:
         model = ClassSubject
         fields = ['student_class', 'subject', 'teacher', 'period', 'is_active']
@@ -137,8 +163,8 @@ class ClassSubjectForm(forms.ModelForm):
             'is_active': "Active"
         }
         widgets = {
-            'student_class': forms.Select(attrs={'class': 'form-select'}),
-            'subject': forms.Select(attrs={'class': 'form-select'}),
+            'student_class': AutocompleteSelect('class', attrs={'class': 'form-select'}),
+            'subject': AutocompleteSelect('subject', attrs={'class': 'form-select'}),
             'teacher': forms.Select(attrs={'class': 'form-select'}),
             'period': forms.Select(attrs={'class': 'form-select'}),
             'is_active': forms.CheckboxInput(attrs={'class': 'form-check-input'}),
@@ -157,20 +183,22 @@ class EnrollmentForm(forms.ModelForm):
             'status': "Status"
         }
         widgets = {
-            'student': forms.Select(attrs={'class': 'form-select'}),
-            'student_class': forms.Select(attrs={'class': 'form-select'}),
+            'student': AutocompleteSelect('student', attrs={'class': 'form-select'}),
+            'student_class': AutocompleteSelect('class', attrs={'class': 'form-select'}),
             'academic_year': forms.Select(attrs={'class': 'form-select'}),
             'date_enrolled': forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}),
             'status': forms.Select(attrs={'class': 'form-select'}),
         }
 
 
-class AttendanceForm(forms.ModelForm):
+class AttendanceForm(ChoiceQuerysetsMixin, forms.ModelForm):
+    choice_querysets = {'teacher': TEACHER_CHOICES}
+
     class Meta:
         model = Attendance
-        fields = ['inscription', 'teacher', 'subject', 'date', 'status', 'reason']
+        fields = ['enrollment', 'teacher', 'subject', 'date', 'status', 'reason']
         labels = {
-            'inscription': "Enrollment",
+            'enrollment': "Enrollment",
             'teacher': "Teacher",
             'subject': "Subject",
             'date': "Date",
@@ -178,21 +206,23 @@ class AttendanceForm(forms.ModelForm):
             'reason': "Reason"
         }
         widgets = {
-            'inscription': forms.Select(attrs={'class': 'form-select'}),
+            'enrollment': AutocompleteSelect('enrollment', attrs={'class': 'form-select'}),
             'teacher': forms.Select(attrs={'class': 'form-select'}),
-            'subject': forms.Select(attrs={'class': 'form-select'}),
+            'subject': AutocompleteSelect('subject', attrs={'class': 'form-select'}),
             'date': forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}),
             'status': forms.Select(attrs={'class': 'form-select'}),
             'reason': forms.Textarea(attrs={'class': 'form-control', 'rows': 2}),
         }
 
 
-class GradeForm(forms.ModelForm):
+class GradeForm(ChoiceQuerysetsMixin, forms.ModelForm):
+    choice_querysets = {'period': PERIOD_CHOICES}
+
     class Meta:
         model = Grade
-        fields = ['inscription', 'subject', 'period', 'value', 'max_value', 'grade_type', 'date_graded', 'coefficient', 'comment']
+        fields = ['enrollment', 'subject', 'period', 'value', 'max_value', 'grade_type', 'date_graded', 'coefficient', 'comment']
         labels = {
-            'inscription': "Enrollment",
+            'enrollment': "Enrollment",
             'subject': "Subject",
             'period': "Period",
             'value': "Grade",
@@ -203,8 +233,8 @@ class GradeForm(forms.ModelForm):
             'comment': "Comment"
         }
         widgets = {
-            'inscription': forms.Select(attrs={'class': 'form-select'}),
-            'subject': forms.Select(attrs={'class': 'form-select'}),
+            'enrollment': AutocompleteSelect('enrollment', attrs={'class': 'form-select'}),
+            'subject': AutocompleteSelect('subject', attrs={'class': 'form-select'}),
             'period': forms.Select(attrs={'class': 'form-select'}),
             'value': forms.NumberInput(attrs={'class': 'form-control', 'step': 0.1}),
             'max_value': forms.NumberInput(attrs={'class': 'form-control', 'step': 0.1}),
@@ -215,6 +245,105 @@ class GradeForm(forms.ModelForm):
         }
 
 
+class BulkGradeEntryForm(forms.Form):
+    student_class = forms.ModelChoiceField(
+        queryset=CLASS_CHOICES,
+        label="Class",
+        widget=forms.Select(attrs={'class': 'form-select'})
+    )
+    subject = forms.ModelChoiceField(
+        queryset=Subject.objects.all(),
+        label="Subject",
+        widget=forms.Select(attrs={'class': 'form-select'})
+    )
+    period = forms.ModelChoiceField(
+        queryset=PERIOD_CHOICES,
+        label="Period",
+        widget=forms.Select(attrs={'class': 'form-select'})
+    )
+    date_graded = forms.DateField(
+        initial=timezone.now,
+        label="Grading Date",
+        widget=forms.DateInput(attrs={'type': 'date', 'class': 'form-control'})
+    )
+    grade_type = forms.ChoiceField(
+        choices=Grade.GRADE_TYPES,
+        initial='test',
+        label="Assessment Type",
+        widget=forms.Select(attrs={'class': 'form-select'})
+    )
+    max_value = forms.FloatField(
+        min_value=1,
+        initial=20,
+        label="Max Grade",
+        widget=forms.NumberInput(attrs={'class': 'form-control', 'step': 0.1})
+    )
+    coefficient = forms.FloatField(
+        min_value=0.1,
+        max_value=5.0,
+        initial=1.0,
+        label="Coefficient",
+        widget=forms.NumberInput(attrs={'class': 'form-control', 'step': 0.1})
+    )
+
+
+class RollCallForm(forms.Form):
+    student_class = forms.ModelChoiceField(
+        queryset=CLASS_CHOICES,
+        label="Class",
+        widget=forms.Select(attrs={'class': 'form-select'})
+    )
+    subject = forms.ModelChoiceField(
+        queryset=Subject.objects.all(),
+        label="Subject",
+        widget=forms.Select(attrs={'class': 'form-select'})
+    )
+    date = forms.DateField(
+        initial=timezone.now,
+        label="Date",
+        widget=forms.DateInput(attrs={'type': 'date', 'class': 'form-control'})
+    )
+    teacher = forms.ModelChoiceField(
+        queryset=TEACHER_CHOICES,
+        required=False,
+        label="Teacher",
+        widget=forms.Select(attrs={'class': 'form-select'})
+    )
+
+
+class ExportFilterForm(forms.Form):
+    academic_year = forms.ModelChoiceField(queryset=AcademicYear.objects.all(), required=False)
+    period = forms.ModelChoiceField(queryset=Period.objects.all(), required=False)
+    student_class = forms.ModelChoiceField(queryset=Class.objects.all(), required=False)
+    subject = forms.ModelChoiceField(queryset=Subject.objects.all(), required=False)
+
+
+class AttendanceCalendarForm(forms.Form):
+    start_date = forms.DateField()
+    end_date = forms.DateField()
+    granularity = forms.ChoiceField(choices=AttendanceRollup.GRANULARITIES, required=False)
+
+    def clean(self):
+        cleaned_data = super().clean()
+        start_date, end_date = cleaned_data.get('start_date'), cleaned_data.get('end_date')
+        if start_date and end_date and start_date > end_date:
+            raise forms.ValidationError("The start date must be before the end date.")
+        cleaned_data['granularity'] = cleaned_data.get('granularity') or 'day'
+        return cleaned_data
+
+
+class StudentImportForm(forms.Form):
+    file = forms.FileField(
+        label="CSV File",
+        widget=forms.ClearableFileInput(attrs={'class': 'form-control', 'accept': '.csv'})
+    )
+    dry_run = forms.BooleanField(
+        required=False,
+        label="Only validate",
+        widget=forms.CheckboxInput(attrs={'class': 'form-check-input'})
+    )
+
+
 class ProfileForm(forms.ModelForm):
     class Meta:
         model = Profile
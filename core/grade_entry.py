@@ -0,0 +1,108 @@
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+
+from .models import Enrollment, EnrollmentSubjectPeriodSummary, Grade
+from .portal import touch_grades
+from .reference import is_taught
+
+
+ALREADY_GRADED = "This enrollment already has a grade for this assessment."
+
+
+def bulk_enter_grades(student_class, subject, period, date_graded, grade_type, rows,
+                      max_value=20, coefficient=1.0):
+    """
+    Validate and save a whole class sheet of grades for one subject, period and assessment.
+
+    `rows` is a sequence of dicts with `enrollment` (id), `value` and an optional `comment`.
+    The sheet is checked with a fixed number of queries whatever its size and saved with a
+    single bulk insert. Returns `(grades, errors)` where `errors` maps row indexes to lists
+    of messages; nothing is saved when any row is invalid. Only active enrollments of the
+    class can be graded. A sheet saved concurrently with another one for the same assessment
+    gets row errors rather than an IntegrityError. Raises ValidationError when the subject
+    cannot be graded for this class and period at all.
+    """
+    if period.academic_year_id != student_class.academic_year_id:
+        raise ValidationError("The period must belong to the same academic year as the class.")
+    if not is_taught(student_class.pk, subject.pk, period):
+        raise ValidationError("This subject is not assigned to the class for this period.")
+
+    enrollment_ids = []
+    for row in rows:
+        try:
+            enrollment_ids.append(int(row.get('enrollment')))
+        except (TypeError, ValueError):
+            enrollment_ids.append(None)
+
+    valid_enrollments = set(Enrollment.objects.filter(
+        pk__in=[pk for pk in enrollment_ids if pk is not None],
+        student_class=student_class,
+        academic_year_id=period.academic_year_id,
+        status='active'
+    ).order_by().values_list('pk', flat=True))
+
+    def graded():
+        return set(Grade.objects.filter(
+            enrollment_id__in=valid_enrollments,
+            subject=subject,
+            period=period,
+            date_graded=date_graded,
+            grade_type=grade_type
+        ).order_by().values_list('enrollment_id', flat=True))
+
+    already_graded = graded()
+
+    grades = []
+    errors = {}
+    seen = set()
+    for index, (row, enrollment_id) in enumerate(zip(rows, enrollment_ids)):
+        grade = Grade(
+            enrollment_id=enrollment_id,
+            subject=subject,
+            period=period,
+            value=row.get('value'),
+            max_value=max_value,
+            grade_type=grade_type,
+            date_graded=date_graded,
+            coefficient=coefficient,
+            comment=row.get('comment') or '',
+        )
+        row_errors = []
+        try:
+            grade.clean_fields(exclude=['enrollment', 'subject', 'period'])
+        except ValidationError as e:
+            row_errors.extend(e.messages)
+        else:
+            if grade.value > grade.max_value:
+                row_errors.append("The grade cannot exceed the maximum grade.")
+
+        if enrollment_id not in valid_enrollments:
+            row_errors.append("This enrollment is not active in the class for this academic year.")
+        elif enrollment_id in already_graded or enrollment_id in seen:
+            row_errors.append(ALREADY_GRADED)
+        seen.add(enrollment_id)
+
+        if row_errors:
+            errors[index] = row_errors
+        else:
+            grades.append(grade)
+
+    if errors:
+        return [], errors
+
+    try:
+        with transaction.atomic():
+            grades = Grade.objects.bulk_create(grades)
+            EnrollmentSubjectPeriodSummary.objects.refresh(grade.summary_key for grade in grades)
+    except IntegrityError:
+        # A concurrent submission saved grades for this assessment since the check above.
+        already_graded = graded()
+        errors = {
+            index: [ALREADY_GRADED]
+            for index, enrollment_id in enumerate(enrollment_ids) if enrollment_id in already_graded
+        }
+        return [], errors or {
+            index: ["The sheet changed while it was being saved, submit it again."] for index in range(len(rows))
+        }
+    touch_grades(grade.enrollment_id for grade in grades)
+    return grades, {}
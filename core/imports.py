@@ -0,0 +1,222 @@
+import csv
+import datetime
+from collections import namedtuple
+from itertools import islice
+
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models.functions import Lower
+
+from .autocomplete import SOURCES
+from .models import AcademicYear, Class, Student, Profile, Enrollment
+
+
+ImportRowError = namedtuple('ImportRowError', ['line', 'username', 'student_id', 'messages'])
+ImportResult = namedtuple('ImportResult', ['created', 'errors'])
+
+REQUIRED_COLUMNS = {'username', 'first_name', 'last_name', 'student_id', 'class'}
+
+
+class Rollback(Exception):
+    pass
+
+
+class StudentImporter:
+    """
+    Create User, Student, Profile and Enrollment rows from a CSV of new students.
+
+    Columns: username, first_name, last_name, student_id, class (name) and optionally
+    academic_year ("2025/2026", "2025-2026" or "2025", defaults to the current year), email,
+    date_of_birth and date_enrolled (ISO dates) and phone. The file is read in chunks of
+    `chunk_size` rows; each chunk is validated against in-memory lookup maps and a couple of
+    set-based queries, then inserted with bulk_create. Valid rows are imported and invalid
+    ones reported; the whole import runs in one transaction, holding a lock on the classes
+    it enrolls students in.
+
+    Values are checked against the max_length and validators of the model fields they are
+    stored in, so a bad value is reported on its row instead of failing the bulk insert.
+    Accounts get an unusable password (no hashing per row); students set theirs through
+    the password reset flow.
+    """
+    FIELDS = {
+        'username': User._meta.get_field('username'),
+        'first_name': User._meta.get_field('first_name'),
+        'last_name': User._meta.get_field('last_name'),
+        'email': User._meta.get_field('email'),
+        'student_id': Student._meta.get_field('student_id'),
+        'phone': Profile._meta.get_field('phone'),
+    }
+
+    def __init__(self, chunk_size=500):
+        self.chunk_size = chunk_size
+        self.years = {}
+        for academic_year in AcademicYear.objects.all():
+            start, end = academic_year.start_date.year, academic_year.end_date.year
+            for key in (f'{start}/{end}', f'{start}-{end}', str(start)):
+                self.years[key] = academic_year
+            if academic_year.is_current:
+                self.years[''] = academic_year
+        self.classes = {
+            (student_class.academic_year_id, student_class.name): student_class
+            for student_class in Class.objects.all()
+        }
+        self.seats = {}
+        self.usernames = set()
+        self.student_ids = set()
+        self.emails = set()
+
+    def run(self, lines, dry_run=False):
+        reader = csv.DictReader(lines)
+        missing = REQUIRED_COLUMNS - set(reader.fieldnames or [])
+        if missing:
+            return ImportResult(0, [ImportRowError(1, '', '', [f"Missing column(s): {', '.join(sorted(missing))}."])])
+
+        created = 0
+        errors = []
+        touched_classes = set()
+        try:
+            with transaction.atomic():
+                while chunk := list(islice(reader, self.chunk_size)):
+                    rows = [(reader.line_num - len(chunk) + index + 1, row) for index, row in enumerate(chunk)]
+                    valid, chunk_errors = self.validate(rows)
+                    errors.extend(chunk_errors)
+                    created += self.insert(valid)
+                    touched_classes.update(row['class'].pk for row in valid)
+                Class.objects.filter(pk__in=touched_classes).refresh_enrollment_counts()
+                if dry_run:
+                    raise Rollback
+        except Rollback:
+            pass
+        else:
+            if created:
+                for name in ('enrollment', 'student'):
+                    SOURCES[name].invalidate()
+        return ImportResult(created, errors)
+
+    def class_of(self, row):
+        academic_year = self.years.get((row.get('academic_year') or '').strip())
+        if academic_year is None:
+            return academic_year, None
+        return academic_year, self.classes.get((academic_year.pk, (row.get('class') or '').strip()))
+
+    def lock_seats(self, rows):
+        """
+        Lock the class rows the import has not touched yet and read their free seats.
+        Enrollments are bulk inserted, so the lock keeps concurrent reservations from
+        taking seats until the import commits.
+        """
+        pending = {student_class.pk for _, student_class in map(self.class_of, rows) if student_class is not None}
+        pending -= self.seats.keys()
+        for pk, max_students, enrolled_count in Class.objects.select_for_update().filter(
+            pk__in=pending
+        ).order_by('pk').values_list('pk', 'max_students', 'enrolled_count'):
+            self.seats[pk] = max_students - enrolled_count
+
+    def validate(self, rows):
+        self.lock_seats(row for _, row in rows)
+        usernames = [(row.get('username') or '').strip() for _, row in rows]
+        student_ids = [(row.get('student_id') or '').strip() for _, row in rows]
+        taken_usernames = set(User.objects.filter(username__in=usernames).order_by().values_list('username', flat=True))
+        taken_student_ids = set(
+            Student.objects.filter(student_id__in=student_ids).order_by().values_list('student_id', flat=True)
+        )
+        emails = [(row.get('email') or '').strip().lower() for _, row in rows]
+        taken_emails = set(User.objects.annotate(email_lower=Lower('email')).filter(
+            email_lower__in=[email for email in emails if email]
+        ).order_by().values_list('email_lower', flat=True))
+
+        valid = []
+        errors = []
+        for (line, row), username, student_id, email in zip(rows, usernames, student_ids, emails):
+            messages = []
+            cleaned = {
+                'username': username,
+                'student_id': student_id,
+                'first_name': (row.get('first_name') or '').strip(),
+                'last_name': (row.get('last_name') or '').strip(),
+                'email': (row.get('email') or '').strip(),
+                'phone': (row.get('phone') or '').strip(),
+            }
+            for field in ('username', 'student_id', 'first_name', 'last_name'):
+                if not cleaned[field]:
+                    messages.append(f"{field} is required.")
+            for field, model_field in self.FIELDS.items():
+                if cleaned[field]:
+                    try:
+                        model_field.run_validators(cleaned[field])
+                    except ValidationError as e:
+                        messages.extend(f"{field}: {message}" for message in e.messages)
+            if username and (username in taken_usernames or username in self.usernames):
+                messages.append(f"Username {username} already exists.")
+            if student_id and (student_id in taken_student_ids or student_id in self.student_ids):
+                messages.append(f"Student ID {student_id} already exists.")
+            if email and (email in taken_emails or email in self.emails):
+                messages.append(f"Email {cleaned['email']} is already used.")
+
+            for field in ('date_of_birth', 'date_enrolled'):
+                value = (row.get(field) or '').strip()
+                try:
+                    cleaned[field] = datetime.date.fromisoformat(value) if value else None
+                except ValueError:
+                    messages.append(f"{field} must be a YYYY-MM-DD date.")
+
+            academic_year, student_class = self.class_of(row)
+            if academic_year is None:
+                messages.append(f"Unknown academic year {row.get('academic_year')!r}.")
+            elif student_class is None:
+                messages.append(f"Unknown class {row.get('class')!r} in {academic_year}.")
+            elif not messages and self.seats[student_class.pk] <= 0:
+                messages.append(f"The class {student_class.name} is full.")
+
+            if messages:
+                errors.append(ImportRowError(line, username, student_id, messages))
+                continue
+            self.seats[student_class.pk] -= 1
+            self.usernames.add(username)
+            self.student_ids.add(student_id)
+            if email:
+                self.emails.add(email)
+            cleaned['class'] = student_class
+            valid.append(cleaned)
+        return valid, errors
+
+    def insert(self, rows):
+        if not rows:
+            return 0
+        users = [
+            User(
+                username=row['username'],
+                first_name=row['first_name'],
+                last_name=row['last_name'],
+                email=row['email'],
+            )
+            for row in rows
+        ]
+        for user in users:
+            user.set_unusable_password()
+        users = User.objects.bulk_create(users)
+        students = Student.objects.bulk_create([
+            Student(
+                user=user,
+                student_id=row['student_id'],
+                student_class=row['class'],
+                date_of_birth=row['date_of_birth'],
+                **({'enrollment_date': row['date_enrolled']} if row['date_enrolled'] else {}),
+            )
+            for user, row in zip(users, rows)
+        ])
+        Profile.objects.bulk_create([
+            Profile(user=user, role='student', phone=row['phone'])
+            for user, row in zip(users, rows)
+        ])
+        Enrollment.objects.bulk_create([
+            Enrollment(
+                student=student,
+                student_class=row['class'],
+                academic_year_id=row['class'].academic_year_id,
+                **({'date_enrolled': row['date_enrolled']} if row['date_enrolled'] else {}),
+            )
+            for student, row in zip(students, rows)
+        ])
+        return len(rows)
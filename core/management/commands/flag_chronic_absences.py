@@ -0,0 +1,50 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.attendance import chronic_absences
+from core.models import Period
+from core.reference import current_period
+
+
+class Command(BaseCommand):
+    help = (
+        "List the students whose absence rate over a period reaches the chronic-absence threshold. "
+        "Meant to be scheduled (e.g. weekly from cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--period', type=int, help="Period id (defaults to the current period).")
+        parser.add_argument(
+            '--threshold',
+            type=float,
+            help="Absence rate in percent (defaults to the CHRONIC_ABSENCE_THRESHOLD setting)."
+        )
+        parser.add_argument(
+            '--min-sessions',
+            type=int,
+            help="Ignore students with fewer recorded sessions (defaults to CHRONIC_ABSENCE_MIN_SESSIONS)."
+        )
+        parser.add_argument('--json', action='store_true', help="Print the flagged students as JSON.")
+
+    def handle(self, *args, **options):
+        if options['period']:
+            period = Period.objects.filter(pk=options['period']).select_related('academic_year').first()
+        else:
+            period = current_period()
+        if period is None:
+            raise CommandError("No such period, and no current period to default to.")
+
+        flagged = list(chronic_absences(period, options['threshold'], options['min_sessions']))
+        if options['json']:
+            self.stdout.write(json.dumps({'period': period.pk, 'students': flagged}, indent=2))
+            return
+
+        for row in flagged:
+            self.stdout.write(
+                f"{row['enrollment__student__student_id']} "
+                f"{row['enrollment__student__user__last_name']} {row['enrollment__student__user__first_name']} "
+                f"({row['enrollment__student_class__name']}): {row['absence_rate']:.1f}% absent, "
+                f"{row['unexcused_rate']:.1f}% unexcused, over {row['total']} sessions"
+            )
+        self.stdout.write(f"{len(flagged)} student(s) flagged for {period}.")
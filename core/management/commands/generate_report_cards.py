@@ -0,0 +1,67 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.text import slugify
+
+from core.db_routers import use_replica
+from core.models import AcademicYear, Class, Period
+from core.reference import current_period
+from core.report_card_batch import build_report_cards, render_report_cards, write_files, write_zip
+
+
+class Command(BaseCommand):
+    help = (
+        "Render the PDF report cards of a period, or of a whole academic year, for every student "
+        "of the given classes (all classes of the year by default), into a zip archive or a directory."
+    )
+
+    def add_arguments(self, parser):
+        scope = parser.add_mutually_exclusive_group()
+        scope.add_argument('--period', type=int, help="Period id (defaults to the current period).")
+        scope.add_argument('--year', type=int, help="Start year of the academic year, for annual report cards.")
+        parser.add_argument(
+            '--class',
+            type=int,
+            action='append',
+            dest='classes',
+            help="Only this class (id) of the year; may be repeated."
+        )
+        output = parser.add_mutually_exclusive_group()
+        output.add_argument('--output', help="Zip archive to write (defaults to report-cards-<scope>.zip).")
+        output.add_argument('--output-dir', help="Write one PDF per student under this directory instead.")
+        parser.add_argument('--workers', type=int, help="Rendering processes (defaults to REPORT_CARD_WORKERS).")
+
+    def handle(self, *args, **options):
+        if options['year']:
+            scope = AcademicYear.objects.filter(start_date__year=options['year']).first()
+            if scope is None:
+                raise CommandError(f"No academic year starts in {options['year']}.")
+            academic_year = scope
+        else:
+            if options['period']:
+                scope = Period.objects.filter(pk=options['period']).select_related('academic_year').first()
+            else:
+                scope = current_period()
+            if scope is None:
+                raise CommandError("No such period, and no current period to default to.")
+            academic_year = scope.academic_year
+
+        classes = None
+        if options['classes']:
+            classes = list(Class.objects.filter(pk__in=options['classes'], academic_year=academic_year))
+            if len(classes) != len(set(options['classes'])):
+                raise CommandError(f"Every class must belong to {academic_year}.")
+
+        started = time.perf_counter()
+        with use_replica():
+            cards = build_report_cards(scope, classes)
+        rendered = render_report_cards(cards, options['workers'])
+        if options['output_dir']:
+            target = options['output_dir']
+            count = write_files(rendered, target)
+        else:
+            target = options['output'] or f'report-cards-{slugify(str(scope))}.zip'
+            count = write_zip(rendered, target)
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {count} report card(s) for {scope} to {target} in {time.perf_counter() - started:.1f}s."
+        ))
@@ -0,0 +1,40 @@
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.imports import StudentImporter
+
+
+class Command(BaseCommand):
+    help = "Import new students (user, profile, student and enrollment) from a CSV file."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV file with a header row.")
+        parser.add_argument('--errors', help="Write the rejected rows to this CSV file.")
+        parser.add_argument('--chunk-size', type=int, default=500)
+        parser.add_argument('--dry-run', action='store_true', help="Validate and roll back.")
+
+    def handle(self, *args, **options):
+        importer = StudentImporter(chunk_size=options['chunk_size'])
+        try:
+            with open(options['path'], newline='', encoding='utf-8-sig') as csv_file:
+                result = importer.run(csv_file, dry_run=options['dry_run'])
+        except OSError as e:
+            raise CommandError(f"Cannot read {options['path']}: {e}")
+        except UnicodeDecodeError:
+            raise CommandError(f"{options['path']} is not a UTF-8 encoded CSV file.")
+
+        if options['errors']:
+            with open(options['errors'], 'w', newline='') as error_file:
+                writer = csv.writer(error_file)
+                writer.writerow(['line', 'username', 'student_id', 'errors'])
+                for error in result.errors:
+                    writer.writerow([error.line, error.username, error.student_id, ' '.join(error.messages)])
+        else:
+            for error in result.errors:
+                self.stderr.write(f"line {error.line}: {' '.join(error.messages)}")
+
+        verb = "Validated" if options['dry_run'] else "Imported"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {result.created} student(s), rejected {len(result.errors)} row(s)."
+        ))
@@ -0,0 +1,20 @@
+import datetime
+
+from django.core.management.base import BaseCommand
+
+from core.attendance import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = "Rebuild the per-enrollment and per-class daily and weekly attendance rollups from the Attendance table."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='start_date', type=datetime.date.fromisoformat,
+                            help="Only rebuild the weeks from this date (YYYY-MM-DD).")
+        parser.add_argument('--to', dest='end_date', type=datetime.date.fromisoformat,
+                            help="Only rebuild the weeks up to this date (YYYY-MM-DD).")
+
+    def handle(self, *args, **options):
+        counts = rebuild_rollups(options['start_date'], options['end_date'])
+        for name, created in counts.items():
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt {created} {name} rows."))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from core.models import EnrollmentSubjectPeriodSummary, Period
+
+
+class Command(BaseCommand):
+    help = "Rebuild the per-enrollment, per-subject, per-period grade summaries from the Grade table."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--period',
+            type=int,
+            action='append',
+            dest='periods',
+            help="Only rebuild this period (id); may be repeated."
+        )
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        periods = Period.objects.filter(pk__in=options['periods']) if options['periods'] else None
+        created = EnrollmentSubjectPeriodSummary.objects.rebuild(periods=periods, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {created} grade summaries."))
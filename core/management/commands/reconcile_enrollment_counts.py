@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from django.db.models import F
+
+from core.models import Class
+
+
+class Command(BaseCommand):
+    help = "Recompute Class.enrolled_count from active enrollments and report classes that had drifted."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help="Only report the drifted classes without fixing them."
+        )
+
+    def handle(self, *args, **options):
+        drifted = Class.objects.annotate(
+            actual=Class.objects.active_enrollment_counts()
+        ).exclude(enrolled_count=F('actual'))
+
+        for student_class in drifted:
+            self.stdout.write(
+                f"{student_class}: counter {student_class.enrolled_count}, "
+                f"active enrollments {student_class.actual}"
+            )
+
+        if options['dry_run']:
+            self.stdout.write(f"{len(drifted)} class(es) out of sync.")
+            return
+        fixed = Class.objects.filter(pk__in=[c.pk for c in drifted]).refresh_enrollment_counts()
+        self.stdout.write(self.style.SUCCESS(f"Reconciled {fixed} class(es)."))
@@ -0,0 +1,52 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.middleware import RequestMetrics
+
+
+class Command(BaseCommand):
+    help = "Summarise the JSON-lines request log written by RequestMetricsMiddleware, slowest views first."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--log',
+            default=getattr(settings, 'REQUEST_METRICS_LOG', None),
+            help="Path of the JSON-lines log (defaults to REQUEST_METRICS_LOG)."
+        )
+        parser.add_argument('--top', type=int, default=20, help="Number of views to show.")
+        parser.add_argument('--json', action='store_true', help="Print the summary as JSON.")
+
+    def handle(self, *args, **options):
+        if not options['log']:
+            raise CommandError("No log file given and REQUEST_METRICS_LOG is not set.")
+
+        metrics = RequestMetrics(window=None)
+        try:
+            with open(options['log']) as log_file:
+                for line in log_file:
+                    entry = json.loads(line)
+                    metrics.record(
+                        entry['view'], entry['wall_ms'], entry['queries'], entry['db_ms'], entry['duplicates']
+                    )
+        except OSError as e:
+            raise CommandError(f"Cannot read {options['log']}: {e}")
+
+        summary = sorted(
+            metrics.snapshot().items(),
+            key=lambda item: item[1]['wall_ms']['p95'],
+            reverse=True
+        )[:options['top']]
+
+        if options['json']:
+            self.stdout.write(json.dumps(dict(summary), indent=2))
+            return
+
+        self.stdout.write(f"{'view':<50} {'count':>7} {'p50 ms':>9} {'p95 ms':>9} {'queries':>8} {'db ms':>8} {'N+1':>5}")
+        for view, stats in summary:
+            self.stdout.write(
+                f"{view:<50} {stats['count']:>7} {stats['wall_ms']['p50']:>9.1f} {stats['wall_ms']['p95']:>9.1f} "
+                f"{stats['queries']['mean']:>8.1f} {stats['db_ms']['mean']:>8.1f} "
+                f"{stats['requests_with_duplicate_queries']:>5}"
+            )
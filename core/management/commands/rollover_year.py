@@ -0,0 +1,61 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import AcademicYear
+from core.rollover import rollover_academic_year
+
+
+class Command(BaseCommand):
+    help = (
+        "Create the next academic year (periods, classes, subject assignments) and promote "
+        "every active enrollment of the given year, graduating the final level."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('year', type=int, help="Start year of the academic year to roll over, e.g. 2025.")
+        parser.add_argument(
+            '--level',
+            action='append',
+            default=[],
+            metavar='LEVEL=NEXT',
+            help="Promotion rule, repeated for every level; leave NEXT empty for the final level (e.g. --level 3e=)."
+        )
+        parser.add_argument('--start-date', type=datetime.date.fromisoformat)
+        parser.add_argument('--end-date', type=datetime.date.fromisoformat)
+        parser.add_argument('--make-current', action='store_true', help="Mark the new year as the current one.")
+        parser.add_argument('--dry-run', action='store_true', help="Run everything and roll back.")
+
+    def handle(self, *args, **options):
+        try:
+            source = AcademicYear.objects.get(start_date__year=options['year'])
+        except AcademicYear.DoesNotExist:
+            raise CommandError(f"No academic year starts in {options['year']}.")
+        except AcademicYear.MultipleObjectsReturned:
+            raise CommandError(f"Several academic years start in {options['year']}.")
+
+        level_map = {}
+        for rule in options['level']:
+            level, separator, next_level = rule.partition('=')
+            if not separator:
+                raise CommandError(f"Invalid promotion rule {rule!r}, expected LEVEL=NEXT.")
+            level_map[level.strip()] = next_level.strip() or None
+
+        try:
+            result = rollover_academic_year(
+                source,
+                level_map,
+                start_date=options['start_date'],
+                end_date=options['end_date'],
+                make_current=options['make_current'],
+                dry_run=options['dry_run'],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        prefix = "Dry run: would create" if options['dry_run'] else "Created"
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix} {result.academic_year} with {result.periods} period(s), {result.classes} class(es) "
+            f"and {result.class_subjects} subject assignment(s); promoted {result.promoted} and "
+            f"graduated {result.graduated} student(s)."
+        ))
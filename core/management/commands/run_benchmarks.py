@@ -0,0 +1,52 @@
+import json
+import platform
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from core.benchmarks import BENCHMARKS, run_benchmarks
+from core.models import Enrollment, Grade, Attendance
+
+
+class Command(BaseCommand):
+    help = "Time the key paths (list views, grade entry, averages, report cards) and write the results as JSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument('names', nargs='*', help="Only run benchmarks whose name starts with one of these.")
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--output', help="Write the JSON results to this file instead of stdout.")
+        parser.add_argument('--list', action='store_true', help="List the available benchmarks.")
+
+    def handle(self, *args, **options):
+        if options['list']:
+            for name in BENCHMARKS:
+                self.stdout.write(name)
+            return
+
+        try:
+            results = run_benchmarks(
+                options['names'],
+                repeat=options['repeat'],
+                log=self.stderr.write if options['verbosity'] > 0 else None,
+            )
+        except LookupError as e:
+            raise CommandError(str(e))
+
+        report = {
+            'date': timezone.now().isoformat(),
+            'python': platform.python_version(),
+            'database': connection.vendor,
+            'rows': {
+                'enrollments': Enrollment.objects.count(),
+                'grades': Grade.objects.count(),
+                'attendances': Attendance.objects.count(),
+            },
+            'results': results,
+        }
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as output_file:
+                output_file.write(output + '\n')
+        else:
+            self.stdout.write(output)
@@ -0,0 +1,182 @@
+import bisect
+import json
+import threading
+import time
+from collections import Counter, deque
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+
+class QueryRecorder:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            self.statements[sql] += 1
+
+    @property
+    def duplicates(self):
+        return sum(count - 1 for count in self.statements.values() if count > 1)
+
+
+class RequestMetrics:
+    """
+    Rolling, process-local window of the last `window` requests of each view.
+
+    Wall times are summarised as a histogram over fixed millisecond buckets plus percentiles.
+    """
+    BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+    def __init__(self, window=1000):
+        self.window = window
+        self.samples = {}
+        self.lock = threading.Lock()
+
+    def record(self, view, wall_ms, queries, db_ms, duplicates):
+        with self.lock:
+            samples = self.samples.setdefault(view, deque(maxlen=self.window))
+            samples.append((wall_ms, queries, db_ms, duplicates))
+
+    def snapshot(self):
+        with self.lock:
+            views = {view: list(samples) for view, samples in self.samples.items()}
+        return {view: self.summarise(samples) for view, samples in views.items()}
+
+    @classmethod
+    def summarise(cls, samples):
+        wall_times = sorted(sample[0] for sample in samples)
+        histogram = [0] * (len(cls.BUCKETS) + 1)
+        for wall_ms in wall_times:
+            histogram[bisect.bisect_left(cls.BUCKETS, wall_ms)] += 1
+        count = len(samples)
+        return {
+            'count': count,
+            'wall_ms': {
+                'mean': sum(wall_times) / count,
+                'p50': wall_times[int(count * 0.50)],
+                'p95': wall_times[min(count - 1, int(count * 0.95))],
+                'max': wall_times[-1],
+                'histogram': dict(zip([f'<={b}' for b in cls.BUCKETS] + ['>5000'], histogram)),
+            },
+            'queries': {
+                'mean': sum(sample[1] for sample in samples) / count,
+                'max': max(sample[1] for sample in samples),
+            },
+            'db_ms': {
+                'mean': sum(sample[2] for sample in samples) / count,
+                'max': max(sample[2] for sample in samples),
+            },
+            'requests_with_duplicate_queries': sum(1 for sample in samples if sample[3]),
+        }
+
+    def reset(self):
+        with self.lock:
+            self.samples.clear()
+
+
+request_metrics = RequestMetrics(getattr(settings, 'REQUEST_METRICS_WINDOW', 1000))
+_log_lock = threading.Lock()
+
+
+class RequestMetricsMiddleware:
+    """
+    Measure wall time, query count, database time and repeated SQL for every request.
+
+    Samples go to the in-process `request_metrics` window and, when REQUEST_METRICS_LOG is
+    set, are appended to that file as JSON lines. A Server-Timing header is added to responses.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, 'REQUEST_METRICS_ENABLED', True)
+        self.log_path = getattr(settings, 'REQUEST_METRICS_LOG', None)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.enabled:
+            return self.get_response(request)
+
+        recorder = QueryRecorder()
+        start = time.perf_counter()
+        with self.recording(recorder):
+            response = self.get_response(request)
+        response, entry = self.finish(request, response, recorder, start)
+        if entry:
+            self.write_log(entry)
+        return response
+
+    async def __acall__(self, request):
+        if not self.enabled:
+            return await self.get_response(request)
+
+        recorder = QueryRecorder()
+        start = time.perf_counter()
+        # The async ORM runs queries in the thread-sensitive sync thread, on its connections.
+        recording = await sync_to_async(self.recording)(recorder)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(recording.close)()
+        response, entry = self.finish(request, response, recorder, start)
+        if entry:
+            # File I/O would block the event loop; it doesn't need the thread-sensitive ORM thread.
+            await sync_to_async(self.write_log, thread_sensitive=False)(entry)
+        return response
+
+    def recording(self, recorder):
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(recorder))
+        return stack
+
+    def finish(self, request, response, recorder, start):
+        """Record the sample and set Server-Timing; return the response and the log entry, if any."""
+        wall_ms = (time.perf_counter() - start) * 1000
+        db_ms = recorder.duration * 1000
+
+        view = getattr(request.resolver_match, '_func_path', None) or 'unresolved'
+        duplicates = recorder.duplicates
+        request_metrics.record(view, wall_ms, recorder.count, db_ms, duplicates)
+        response['Server-Timing'] = f'app;dur={wall_ms:.1f}, db;dur={db_ms:.1f};desc="{recorder.count} queries"'
+
+        entry = None
+        if self.log_path:
+            entry = self.log_entry(view, request, response, wall_ms, recorder, db_ms, duplicates)
+        return response, entry
+
+    def log_entry(self, view, request, response, wall_ms, recorder, db_ms, duplicates):
+        entry = {
+            'time': time.time(),
+            'view': view,
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'wall_ms': round(wall_ms, 3),
+            'queries': recorder.count,
+            'db_ms': round(db_ms, 3),
+            'duplicates': duplicates,
+        }
+        if duplicates:
+            entry['most_repeated_sql'] = recorder.statements.most_common(1)[0][0]
+        return entry
+
+    def write_log(self, entry):
+        with _log_lock, open(self.log_path, 'a') as log_file:
+            log_file.write(json.dumps(entry) + '\n')
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.5 on 2026-10-18 05:51
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_active_enrollments(apps, schema_editor):
+    Class = apps.get_model('core', 'Class')
+    Enrollment = apps.get_model('core', 'Enrollment')
+    Class.objects.update(enrolled_count=Coalesce(Subquery(
+        Enrollment.objects.filter(
+            student_class=OuterRef('pk'),
+            status='active'
+        ).order_by().values('student_class').annotate(count=Count('pk')).values('count')
+    ), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_attendance_classsubject_enrollment_period_profile_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='class',
+            name='enrolled_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Number of active enrollments, maintained by Enrollment.save()', verbose_name='Enrolled Students'),
+        ),
+        migrations.RunPython(count_active_enrollments, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.5 on 2026-10-18 05:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, F, FloatField, Max, Min, Sum
+
+
+def build_summaries(apps, schema_editor):
+    Grade = apps.get_model('core', 'Grade')
+    Summary = apps.get_model('core', 'EnrollmentSubjectPeriodSummary')
+    normalized = F('value') / F('max_value') * 20.0
+    rows = Grade.objects.filter(enrollment__isnull=False, period__isnull=False).order_by().values(
+        'enrollment_id', 'subject_id', 'period_id'
+    ).annotate(
+        grade_count=Count('id'),
+        weighted_sum=Sum(normalized * F('coefficient')),
+        coefficient_sum=Sum('coefficient'),
+        min_value=Min(normalized, output_field=FloatField()),
+        max_value=Max(normalized, output_field=FloatField()),
+    )
+    Summary.objects.bulk_create((Summary(**row) for row in rows.iterator()), batch_size=5000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_class_enrolled_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EnrollmentSubjectPeriodSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('grade_count', models.PositiveIntegerField(default=0, verbose_name='Number of Grades')),
+                ('weighted_sum', models.FloatField(default=0, help_text='Sum of the grades out of 20 multiplied by their coefficient', verbose_name='Weighted Sum')),
+                ('coefficient_sum', models.FloatField(default=0, verbose_name='Sum of Coefficients')),
+                ('min_value', models.FloatField(null=True, verbose_name='Lowest Grade')),
+                ('max_value', models.FloatField(null=True, verbose_name='Highest Grade')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('enrollment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='grade_summaries', to='core.enrollment', verbose_name='Enrollment')),
+                ('period', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.period', verbose_name='Period')),
+                ('subject', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.subject', verbose_name='Subject')),
+            ],
+            options={
+                'verbose_name': 'Grade Summary',
+                'verbose_name_plural': 'Grade Summaries',
+                'indexes': [models.Index(fields=['period', 'subject'], name='core_enroll_period__051f2f_idx')],
+                'unique_together': {('enrollment', 'subject', 'period')},
+            },
+        ),
+        migrations.RunPython(build_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.5 on 2026-10-18 06:03
+
+from django.db import migrations, models
+
+
+def keep_single_current(apps, schema_editor):
+    AcademicYear = apps.get_model('core', 'AcademicYear')
+    Period = apps.get_model('core', 'Period')
+    current_years = AcademicYear.objects.filter(is_current=True).order_by('-start_date', '-pk')
+    latest = current_years.first()
+    if latest is not None:
+        current_years.exclude(pk=latest.pk).update(is_current=False)
+    for academic_year_id in Period.objects.filter(is_current=True).values_list('academic_year_id', flat=True).distinct():
+        current_periods = Period.objects.filter(academic_year_id=academic_year_id, is_current=True).order_by('-start_date', '-pk')
+        current_periods.exclude(pk=current_periods.first().pk).update(is_current=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_enrollmentsubjectperiodsummary'),
+    ]
+
+    operations = [
+        migrations.RunPython(keep_single_current, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='academicyear',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_current', True)), fields=('is_current',), name='single_current_academic_year'),
+        ),
+        migrations.AddConstraint(
+            model_name='period',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_current', True)), fields=('academic_year',), name='single_current_period_per_year'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.5 on 2026-10-18 06:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_current_pointer_constraints'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['enrollment', 'date'], name='core_attend_enrollm_5d7cf1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['subject', 'date'], name='core_attend_subject_04fbb8_idx'),
+        ),
+    ]
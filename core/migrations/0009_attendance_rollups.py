@@ -0,0 +1,50 @@
+# Generated by Django 5.2.5 on 2026-10-18 06:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_attendance_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClassAttendanceRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('granularity', models.CharField(choices=[('day', 'Day'), ('week', 'ISO Week')], max_length=4, verbose_name='Granularity')),
+                ('bucket', models.DateField(verbose_name='Day or Monday of the Week')),
+                ('present', models.PositiveIntegerField(default=0, verbose_name='Present')),
+                ('absent', models.PositiveIntegerField(default=0, verbose_name='Absent')),
+                ('late', models.PositiveIntegerField(default=0, verbose_name='Late')),
+                ('excused', models.PositiveIntegerField(default=0, verbose_name='Excused')),
+                ('student_class', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_rollups', to='core.class', verbose_name='Class')),
+            ],
+            options={
+                'verbose_name': 'Class Attendance Rollup',
+                'verbose_name_plural': 'Class Attendance Rollups',
+                'unique_together': {('student_class', 'granularity', 'bucket')},
+            },
+        ),
+        migrations.CreateModel(
+            name='EnrollmentAttendanceRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('granularity', models.CharField(choices=[('day', 'Day'), ('week', 'ISO Week')], max_length=4, verbose_name='Granularity')),
+                ('bucket', models.DateField(verbose_name='Day or Monday of the Week')),
+                ('present', models.PositiveIntegerField(default=0, verbose_name='Present')),
+                ('absent', models.PositiveIntegerField(default=0, verbose_name='Absent')),
+                ('late', models.PositiveIntegerField(default=0, verbose_name='Late')),
+                ('excused', models.PositiveIntegerField(default=0, verbose_name='Excused')),
+                ('enrollment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_rollups', to='core.enrollment', verbose_name='Enrollment')),
+            ],
+            options={
+                'verbose_name': 'Enrollment Attendance Rollup',
+                'verbose_name_plural': 'Enrollment Attendance Rollups',
+                'unique_together': {('enrollment', 'granularity', 'bucket')},
+            },
+        ),
+    ]
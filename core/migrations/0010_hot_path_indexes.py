@@ -0,0 +1,34 @@
+# Generated by Django 5.2.5 on 2026-10-18 06:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('core', '0009_attendance_rollups'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='classsubject',
+            index=models.Index(condition=models.Q(('period__isnull', True)), fields=['student_class', 'subject'], name='classsubject_all_periods_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='enrollment',
+            index=models.Index(fields=['student_class', 'academic_year', 'status'], name='core_enroll_student_f49896_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='enrollment',
+            index=models.Index(condition=models.Q(('status', 'active')), fields=['student_class'], name='enrollment_active_class_idx'),
+        ),
+        # Student and teacher lists are ordered by the user's name, which lives on auth_user.
+        # That table belongs to django.contrib.auth, so the index is plain SQL that Django's
+        # migration state does not know about: both directions are idempotent, and a custom
+        # user model or a swapped auth table has to carry its own equivalent index.
+        migrations.RunSQL(
+            'CREATE INDEX IF NOT EXISTS auth_user_name_idx ON auth_user (last_name, first_name)',
+            'DROP INDEX IF EXISTS auth_user_name_idx',
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-18 06:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='enrollment',
+            name='status',
+            field=models.CharField(choices=[('active', 'Active'), ('transferred', 'Transferred'), ('completed', 'Completed'), ('graduated', 'Graduated'), ('withdrawn', 'Withdrawn')], default='active', max_length=20, verbose_name='Status'),
+        ),
+    ]
@@ -1,9 +1,22 @@
-from django.db import models
+import datetime
+from functools import partial
+from itertools import islice
+
+from django.db import models, transaction
+from django.db.models import Avg, Count, F, FloatField, Max, Min, OuterRef, StdDev, Subquery, Sum
+from django.db.models.functions import Coalesce, TruncWeek
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.core.exceptions import ValidationError
 from django.utils import timezone
 
+from .cache import bump_version
+
+
+class AcademicYearQuerySet(models.QuerySet):
+    def current(self):
+        return self.filter(is_current=True).order_by().first()
+
 
 class AcademicYear(models.Model):
     start_date = models.DateField(
@@ -22,6 +35,8 @@ class AcademicYear(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = AcademicYearQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Academic Year"
         verbose_name_plural = "Academic Years"
@@ -30,7 +45,12 @@ class AcademicYear(models.Model):
             models.CheckConstraint(
                 check=models.Q(end_date__gt=models.F('start_date')),
                 name='end_date_after_start_date'
-            )
+            ),
+            models.UniqueConstraint(
+                fields=['is_current'],
+                condition=models.Q(is_current=True),
+                name='single_current_academic_year'
+            ),
         ]
 
     def clean(self):
@@ -38,16 +58,28 @@ class AcademicYear(models.Model):
             if self.start_date >= self.end_date:
                 raise ValidationError("The end date must be after the start date.")
 
+    def validate_constraints(self, exclude=None):
+        # save() takes the current flag over from the previous current year.
+        super().validate_constraints(exclude={*(exclude or ()), 'is_current'})
+
     def save(self, *args, **kwargs):
-        if self.is_current:
-            AcademicYear.objects.filter(is_current=True).update(is_current=False)
-        super().save(*args, **kwargs)
+        with transaction.atomic():
+            if self.is_current:
+                AcademicYear.objects.filter(is_current=True).exclude(pk=self.pk).update(is_current=False)
+            super().save(*args, **kwargs)
 
     def __str__(self):
         return f"Academic Year {self.start_date.year}/{self.end_date.year}"
 
 
 
+class PeriodQuerySet(models.QuerySet):
+    def current(self, academic_year=None):
+        if academic_year is None:
+            return self.filter(is_current=True, academic_year__is_current=True).order_by().first()
+        return self.filter(is_current=True, academic_year=academic_year).order_by().first()
+
+
 class Period(models.Model):
     name = models.CharField(max_length=50, verbose_name="Period Name")
     academic_year = models.ForeignKey(
@@ -60,6 +92,8 @@ class Period(models.Model):
     end_date = models.DateField(verbose_name="End of Period")
     is_current = models.BooleanField(default=False, verbose_name="Current Period")
 
+    objects = PeriodQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Period"
         verbose_name_plural = "Periods"
@@ -68,7 +102,12 @@ class Period(models.Model):
             models.CheckConstraint(
                 check=models.Q(end_date__gt=models.F('start_date')),
                 name='period_end_after_start'
-            )
+            ),
+            models.UniqueConstraint(
+                fields=['academic_year'],
+                condition=models.Q(is_current=True),
+                name='single_current_period_per_year'
+            ),
         ]
         unique_together = [['name', 'academic_year']]
 
@@ -76,18 +115,45 @@ class Period(models.Model):
         if self.start_date >= self.end_date:
             raise ValidationError("The end of the period must be after the start.")
 
+    def validate_constraints(self, exclude=None):
+        # save() takes the current flag over from the previous current period of the year.
+        super().validate_constraints(exclude={*(exclude or ()), 'is_current'})
+
     def save(self, *args, **kwargs):
-        if self.is_current:
-            Period.objects.filter(
-                academic_year=self.academic_year,
-                is_current=True
-            ).update(is_current=False)
-        super().save(*args, **kwargs)
+        with transaction.atomic():
+            if self.is_current:
+                Period.objects.filter(
+                    academic_year=self.academic_year,
+                    is_current=True
+                ).exclude(pk=self.pk).update(is_current=False)
+            super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.name} - {self.academic_year}"
 
 
+class ClassQuerySet(models.QuerySet):
+    def reserve_seat(self, class_id):
+        return self.filter(
+            pk=class_id,
+            enrolled_count__lt=F('max_students')
+        ).update(enrolled_count=F('enrolled_count') + 1) == 1
+
+    def release_seat(self, class_id):
+        self.filter(pk=class_id, enrolled_count__gt=0).update(enrolled_count=F('enrolled_count') - 1)
+
+    def active_enrollment_counts(self):
+        return Coalesce(Subquery(
+            Enrollment.objects.filter(
+                student_class=OuterRef('pk'),
+                status='active'
+            ).order_by().values('student_class').annotate(count=Count('pk')).values('count')
+        ), 0)
+
+    def refresh_enrollment_counts(self):
+        return self.update(enrolled_count=self.active_enrollment_counts())
+
+
 class Class(models.Model):
     name = models.CharField(
         max_length=100,)
@@ -106,6 +172,12 @@ class Class(models.Model):
         default=30,
         verbose_name="Maximum Number of Students"
     )
+    enrolled_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="Enrolled Students",
+        help_text="Number of active enrollments, maintained by Enrollment.save()"
+    )
 
     
     subjects = models.ManyToManyField(
@@ -118,6 +190,8 @@ class Class(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ClassQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Class"
         verbose_name_plural = "Classes"
@@ -126,12 +200,23 @@ class Class(models.Model):
 
     @property
     def current_students_count(self):
-        return self.student_set.count()
+        return self.enrolled_count
 
     @property
     def is_full(self):
         return self.current_students_count >= self.max_students
 
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if not adding and not kwargs.get('update_fields'):
+                # A full save writes the counter held by this instance, which may be stale. The
+                # row stays locked by that write until the recount commits, so no reservation
+                # made in between is lost.
+                Class.objects.filter(pk=self.pk).refresh_enrollment_counts()
+                self.enrolled_count = Class.objects.filter(pk=self.pk).values_list('enrolled_count', flat=True).get()
+
     def __str__(self):
         return f"Class {self.name} ({self.level}) - {self.academic_year}"
 
@@ -218,6 +303,13 @@ class Student(models.Model):
         verbose_name_plural = "Students"
         ordering = ['user__last_name', 'user__first_name']
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if 'user_id' in field_names:
+            instance._loaded_user_id = instance.user_id
+        return instance
+
     @property
     def full_name(self):
         return f"{self.user.first_name} {self.user.last_name}"
@@ -232,9 +324,14 @@ class Student(models.Model):
         return None
 
     def clean(self):
-        if self.student_class and self.student_class.is_full:
-            if not self.pk or self.student_class != Student.objects.get(pk=self.pk).student_class:
-                raise ValidationError(f"The class {self.student_class.name} is full.")
+        # Seats are held by active enrollments and counted in Class.enrolled_count; a student
+        # with an active enrollment in the class already holds one.
+        if self.student_class_id and Class.objects.filter(
+            pk=self.student_class_id, enrolled_count__gte=F('max_students')
+        ).exists() and not Enrollment.objects.filter(
+            student_id=self.pk, student_class_id=self.student_class_id, status='active'
+        ).exists():
+            raise ValidationError(f"The class {self.student_class.name} is full.")
 
     def __str__(self):
         return f"Student {self.full_name} (ID: {self.student_id})"
@@ -317,6 +414,13 @@ class ClassSubject(models.Model):
         verbose_name = "Class Subject"
         verbose_name_plural = "Class Subjects"
         unique_together = [['student_class', 'subject', 'period']]
+        indexes = [
+            models.Index(
+                fields=['student_class', 'subject'],
+                condition=models.Q(period__isnull=True),
+                name='classsubject_all_periods_idx'
+            ),
+        ]
 
     def __str__(self):
         return f"{self.student_class} - {self.subject} ({self.period or 'all periods'})"
@@ -326,6 +430,7 @@ class Enrollment(models.Model):
     STATUS = [
         ('active', 'Active'),
         ('transferred', 'Transferred'),
+        ('completed', 'Completed'),
         ('graduated', 'Graduated'),
         ('withdrawn', 'Withdrawn'),
     ]
@@ -344,15 +449,84 @@ class Enrollment(models.Model):
         verbose_name_plural = "Enrollments"
         ordering = ['-date_enrolled']
         unique_together = [['student', 'academic_year']]
+        indexes = [
+            models.Index(fields=['student_class', 'academic_year', 'status']),
+            models.Index(
+                fields=['student_class'],
+                condition=models.Q(status='active'),
+                name='enrollment_active_class_idx'
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if 'student_class_id' in field_names:
+            instance._loaded_class_id = instance.student_class_id
+        if 'student_class_id' in field_names and 'status' in field_names:
+            instance._held_seat = instance.seat
+        return instance
+
+    @property
+    def seat(self):
+        return self.student_class_id if self.status == 'active' else None
+
+    @property
+    def held_seat(self):
+        if not hasattr(self, '_held_seat'):
+            if self._state.adding:
+                return None
+            return Enrollment.objects.filter(
+                pk=self.pk,
+                status='active'
+            ).values_list('student_class_id', flat=True).first()
+        return self._held_seat
 
     def clean(self):
         if self.student_class.academic_year and self.student_class.academic_year != self.academic_year:
             raise ValidationError("The enrollment year must match the class's academic year.")
 
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            held, wanted = self.held_seat, self.seat
+            if held != wanted:
+                if wanted is not None and not Class.objects.reserve_seat(wanted):
+                    raise ValidationError(f"The class {self.student_class.name} is full.")
+                if held is not None:
+                    Class.objects.release_seat(held)
+            super().save(*args, **kwargs)
+        self._held_seat = wanted
+
     def __str__(self):
         return f"Enrollment {self.student.full_name} → {self.student_class} ({self.academic_year})"
 
 
+class GradeQuerySet(models.QuerySet):
+    normalized = F('value') / F('max_value') * 20.0
+
+    def _statistics(self):
+        return {
+            'average': Sum(self.normalized * F('coefficient')) / Sum('coefficient'),
+            'mean': Avg(self.normalized, output_field=FloatField()),
+            'minimum': Min(self.normalized, output_field=FloatField()),
+            'maximum': Max(self.normalized, output_field=FloatField()),
+            'std_dev': StdDev(self.normalized, output_field=FloatField()),
+            'count': Count('id'),
+        }
+
+    def class_averages(self, period):
+        return self.filter(period=period, enrollment__isnull=False).values(
+            'enrollment__student_class', 'subject'
+        ).annotate(**self._statistics()).order_by('enrollment__student_class', 'subject')
+
+    def subject_distribution(self, subject, period):
+        return self.filter(subject=subject, period=period).aggregate(**self._statistics())
+
+    def enrollment_averages(self):
+        return self.filter(enrollment__isnull=False).values(
+            'enrollment', 'period', 'subject'
+        ).annotate(**self._statistics()).order_by('enrollment', 'period', 'subject')
+
 
 class Grade(models.Model):
     GRADE_TYPES = [
@@ -415,6 +589,8 @@ class Grade(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = GradeQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Grade"
         verbose_name_plural = "Grades"
@@ -425,6 +601,17 @@ class Grade(models.Model):
         ]
         unique_together = [['enrollment', 'subject', 'period', 'date_graded', 'grade_type']]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if {'enrollment_id', 'subject_id', 'period_id'} <= set(field_names):
+            instance._loaded_summary_key = instance.summary_key
+        return instance
+
+    @property
+    def summary_key(self):
+        return (self.enrollment_id, self.subject_id, self.period_id)
+
     @property
     def normalized_value(self):
         return (self.value / self.max_value) * 20
@@ -438,16 +625,169 @@ class Grade(models.Model):
             raise ValidationError("The grade cannot exceed the maximum grade.")
         if self.period.academic_year_id != self.enrollment.academic_year_id:
             raise ValidationError("The period must belong to the same academic year as the enrollment.")
-        if not ClassSubject.objects.filter(
-            student_class=self.enrollment.student_class,
-            subject=self.subject
-        ).filter(models.Q(period__isnull=True) | models.Q(period=self.period)).exists():
+        # Imported here: the reference caches are built on these models.
+        from .reference import is_taught
+        if not is_taught(self.enrollment.student_class_id, self.subject_id, self.period):
             raise ValidationError("This subject is not assigned to the class for this period.")
 
     def __str__(self):
         return f"{self.enrollment.student.full_name} - {self.subject.name}: {self.value}/{self.max_value}"
 
 
+RANKINGS_NAMESPACE = 'rankings'
+
+
+def rankings_namespace(class_id, period_id):
+    return f'{RANKINGS_NAMESPACE}:{class_id}:{period_id}'
+
+
+class SummaryQuerySet(models.QuerySet):
+    """
+    Grade saves and deletes (including cascades) refresh their summaries through signals once
+    the transaction commits. Grade.objects.bulk_create() and update() send no signals: their
+    callers must refresh() the keys they touched (as grade_entry does) or rebuild().
+    """
+    def _aggregate(self, grades):
+        normalized = GradeQuerySet.normalized
+        return grades.order_by().values('enrollment_id', 'subject_id', 'period_id').annotate(
+            grade_count=Count('id'),
+            weighted_sum=Sum(normalized * F('coefficient')),
+            coefficient_sum=Sum('coefficient'),
+            min_value=Min(normalized, output_field=FloatField()),
+            max_value=Max(normalized, output_field=FloatField()),
+        )
+
+    def refresh(self, keys):
+        """
+        Recompute the summaries of the given (enrollment_id, subject_id, period_id) keys from
+        their grades with one aggregate query, then upsert them, drop the ones left without
+        grades and invalidate the cached rankings of the classes and periods involved.
+        """
+        keys = {key for key in keys if None not in key}
+        if not keys:
+            return
+        enrollment_ids, subject_ids, period_ids = (set(column) for column in zip(*keys))
+        rows = self._aggregate(Grade.objects.filter(
+            enrollment_id__in=enrollment_ids,
+            subject_id__in=subject_ids,
+            period_id__in=period_ids
+        ))
+        summaries = [
+            self.model(**row) for row in rows
+            if (row['enrollment_id'], row['subject_id'], row['period_id']) in keys
+        ]
+        with transaction.atomic():
+            self.bulk_create(
+                summaries,
+                update_conflicts=True,
+                unique_fields=['enrollment', 'subject', 'period'],
+                update_fields=['grade_count', 'weighted_sum', 'coefficient_sum', 'min_value', 'max_value', 'updated_at'],
+            )
+            emptied = keys - {summary.key for summary in summaries}
+            if emptied:
+                condition = models.Q()
+                for enrollment_id, subject_id, period_id in emptied:
+                    condition |= models.Q(enrollment_id=enrollment_id, subject_id=subject_id, period_id=period_id)
+                self.filter(condition).delete()
+        classes = dict(
+            Enrollment.objects.filter(pk__in=enrollment_ids).order_by().values_list('pk', 'student_class_id')
+        )
+        # Rankings computed before the commit would otherwise be cached under the new versions.
+        for class_id, period_id in {(classes.get(enrollment_id), period_id) for enrollment_id, _, period_id in keys}:
+            transaction.on_commit(partial(bump_version, rankings_namespace(class_id, period_id)))
+
+    def rebuild(self, periods=None, batch_size=5000):
+        """Recompute every summary, or only those of `periods`, from the Grade table."""
+        grades = Grade.objects.filter(enrollment__isnull=False, period__isnull=False)
+        summaries = self.all()
+        if periods is not None:
+            grades = grades.filter(period__in=periods)
+            summaries = summaries.filter(period__in=periods)
+        with transaction.atomic():
+            summaries.delete()
+            batch = []
+            created = 0
+            for row in self._aggregate(grades).iterator(chunk_size=batch_size):
+                batch.append(self.model(**row))
+                if len(batch) >= batch_size:
+                    created += len(self.bulk_create(batch))
+                    batch = []
+            created += len(self.bulk_create(batch))
+        transaction.on_commit(partial(bump_version, RANKINGS_NAMESPACE))
+        return created
+
+
+class EnrollmentSubjectPeriodSummary(models.Model):
+    enrollment = models.ForeignKey(
+        Enrollment,
+        on_delete=models.CASCADE,
+        related_name='grade_summaries',
+        verbose_name="Enrollment"
+    )
+    subject = models.ForeignKey(Subject, on_delete=models.CASCADE, verbose_name="Subject")
+    period = models.ForeignKey(Period, on_delete=models.CASCADE, verbose_name="Period")
+    grade_count = models.PositiveIntegerField(default=0, verbose_name="Number of Grades")
+    weighted_sum = models.FloatField(
+        default=0,
+        verbose_name="Weighted Sum",
+        help_text="Sum of the grades out of 20 multiplied by their coefficient"
+    )
+    coefficient_sum = models.FloatField(default=0, verbose_name="Sum of Coefficients")
+    min_value = models.FloatField(null=True, verbose_name="Lowest Grade")
+    max_value = models.FloatField(null=True, verbose_name="Highest Grade")
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = SummaryQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = "Grade Summary"
+        verbose_name_plural = "Grade Summaries"
+        unique_together = [['enrollment', 'subject', 'period']]
+        indexes = [
+            models.Index(fields=['period', 'subject']),
+        ]
+
+    @property
+    def key(self):
+        return (self.enrollment_id, self.subject_id, self.period_id)
+
+    @property
+    def average(self):
+        if not self.coefficient_sum:
+            return None
+        return self.weighted_sum / self.coefficient_sum
+
+    def __str__(self):
+        return f"{self.enrollment.student.full_name} - {self.subject.name} ({self.period.name})"
+
+
+class AttendanceQuerySet(models.QuerySet):
+    ABSENT = ['absent', 'excused']
+
+    def between(self, start_date, end_date):
+        return self.filter(date__range=(start_date, end_date))
+
+    def in_period(self, period):
+        return self.between(period.start_date, period.end_date)
+
+    def _rates(self):
+        total = Count('id')
+        return {
+            'total': total,
+            'present': Count('id', filter=models.Q(status='present')),
+            'absent': Count('id', filter=models.Q(status='absent')),
+            'late': Count('id', filter=models.Q(status='late')),
+            'excused': Count('id', filter=models.Q(status='excused')),
+            'absence_rate': Count('id', filter=models.Q(status__in=self.ABSENT)) * 100.0 / total,
+            'unexcused_rate': Count('id', filter=models.Q(status='absent')) * 100.0 / total,
+            'lateness_rate': Count('id', filter=models.Q(status='late')) * 100.0 / total,
+        }
+
+    def rates(self, *fields):
+        """Attendance counts and absence/lateness rates (percent of sessions) grouped by `fields`."""
+        return self.order_by().values(*fields).annotate(**self._rates()).order_by(*fields)
+
 
 class Attendance(models.Model):
     STATUS = [
@@ -467,16 +807,167 @@ class Attendance(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = AttendanceQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Attendance"
         verbose_name_plural = "Attendances"
         ordering = ['-date']
         unique_together = [['enrollment', 'subject', 'date']]
+        indexes = [
+            models.Index(fields=['enrollment', 'date']),
+            models.Index(fields=['subject', 'date']),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if {'enrollment_id', 'date'} <= set(field_names):
+            instance._loaded_rollup_key = instance.rollup_key
+        return instance
+
+    @property
+    def rollup_key(self):
+        return (self.enrollment_id, self.date)
 
     def __str__(self):
         return f"{self.enrollment.student.full_name} - {self.subject} - {self.date} ({self.status})"
 
 
+def week_start(date):
+    return date - datetime.timedelta(days=date.weekday())
+
+
+class RollupQuerySet(models.QuerySet):
+    def _counts(self, attendances, granularity):
+        source = self.model.source_field
+        bucket = F('date') if granularity == 'day' else TruncWeek('date')
+        return attendances.order_by().annotate(bucket=bucket).values(source, 'bucket').annotate(
+            present=Count('id', filter=models.Q(status='present')),
+            absent=Count('id', filter=models.Q(status='absent')),
+            late=Count('id', filter=models.Q(status='late')),
+            excused=Count('id', filter=models.Q(status='excused')),
+        )
+
+    def _rollups(self, attendances, granularity):
+        source = self.model.source_field
+        for row in self._counts(attendances, granularity).iterator():
+            yield self.model(
+                granularity=granularity,
+                bucket=row['bucket'],
+                present=row['present'],
+                absent=row['absent'],
+                late=row['late'],
+                excused=row['excused'],
+                **{f'{self.model.owner_field}_id': row[source]},
+            )
+
+    def refresh(self, keys):
+        """
+        Recompute the day and week rollups of the given (owner id, date) keys from the
+        attendance rows of their ISO weeks.
+        """
+        weeks = {(owner_id, week_start(date)) for owner_id, date in keys if owner_id is not None}
+        if not weeks:
+            return
+        owner = self.model.owner_field
+        source = self.model.source_field
+        condition = models.Q()
+        attendances = models.Q()
+        for owner_id, week in weeks:
+            week_range = (week, week + datetime.timedelta(days=6))
+            condition |= models.Q(**{f'{owner}_id': owner_id, 'bucket__range': week_range})
+            attendances |= models.Q(**{source: owner_id, 'date__range': week_range})
+        with transaction.atomic():
+            self.filter(condition).delete()
+            for granularity, _ in self.model.GRANULARITIES:
+                self.bulk_create(self._rollups(Attendance.objects.filter(attendances), granularity))
+
+    def rebuild(self, start_date=None, end_date=None, batch_size=5000):
+        """Recompute every rollup, or those of the weeks between two dates, from the Attendance table."""
+        rollups = self.all()
+        attendances = Attendance.objects.all()
+        if start_date:
+            start_date = week_start(start_date)
+            rollups = rollups.filter(bucket__gte=start_date)
+            attendances = attendances.filter(date__gte=start_date)
+        if end_date:
+            end_date = week_start(end_date) + datetime.timedelta(days=6)
+            rollups = rollups.filter(bucket__lte=end_date)
+            attendances = attendances.filter(date__lte=end_date)
+        created = 0
+        with transaction.atomic():
+            rollups.delete()
+            for granularity, _ in self.model.GRANULARITIES:
+                rows = self._rollups(attendances, granularity)
+                while batch := list(islice(rows, batch_size)):
+                    created += len(self.bulk_create(batch))
+        return created
+
+
+class AttendanceRollup(models.Model):
+    GRANULARITIES = [
+        ('day', 'Day'),
+        ('week', 'ISO Week'),
+    ]
+
+    granularity = models.CharField(max_length=4, choices=GRANULARITIES, verbose_name="Granularity")
+    bucket = models.DateField(verbose_name="Day or Monday of the Week")
+    present = models.PositiveIntegerField(default=0, verbose_name="Present")
+    absent = models.PositiveIntegerField(default=0, verbose_name="Absent")
+    late = models.PositiveIntegerField(default=0, verbose_name="Late")
+    excused = models.PositiveIntegerField(default=0, verbose_name="Excused")
+
+    objects = RollupQuerySet.as_manager()
+
+    class Meta:
+        abstract = True
+
+    @property
+    def total(self):
+        return self.present + self.absent + self.late + self.excused
+
+
+class EnrollmentAttendanceRollup(AttendanceRollup):
+    owner_field = 'enrollment'
+    source_field = 'enrollment'
+
+    enrollment = models.ForeignKey(
+        Enrollment,
+        on_delete=models.CASCADE,
+        related_name='attendance_rollups',
+        verbose_name="Enrollment"
+    )
+
+    class Meta:
+        verbose_name = "Enrollment Attendance Rollup"
+        verbose_name_plural = "Enrollment Attendance Rollups"
+        unique_together = [['enrollment', 'granularity', 'bucket']]
+
+    def __str__(self):
+        return f"{self.enrollment} - {self.get_granularity_display()} {self.bucket}"
+
+
+class ClassAttendanceRollup(AttendanceRollup):
+    owner_field = 'student_class'
+    source_field = 'enrollment__student_class'
+
+    student_class = models.ForeignKey(
+        Class,
+        on_delete=models.CASCADE,
+        related_name='attendance_rollups',
+        verbose_name="Class"
+    )
+
+    class Meta:
+        verbose_name = "Class Attendance Rollup"
+        verbose_name_plural = "Class Attendance Rollups"
+        unique_together = [['student_class', 'granularity', 'bucket']]
+
+    def __str__(self):
+        return f"{self.student_class} - {self.get_granularity_display()} {self.bucket}"
+
+
 
 class Profile(models.Model):
     ROLES = [
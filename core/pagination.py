@@ -0,0 +1,110 @@
+import base64
+import binascii
+import json
+
+from django.core.exceptions import BadRequest, ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, Q
+
+
+class KeysetPage:
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+class KeysetPaginationMixin:
+    """
+    ListView mixin that pages by seeking on the ordering columns plus pk instead of OFFSET.
+
+    The page is exposed as `page_obj` with `next_cursor` and `previous_cursor`, to be passed
+    back in the `cursor` query parameter; a cursor that does not decode is a 400. Ordering
+    columns must be non-null scalar fields; `keyset_ordering` defaults to the model's Meta.ordering.
+    """
+    paginate_by = 25
+    keyset_ordering = None
+    cursor_kwarg = 'cursor'
+
+    def get_keyset_ordering(self):
+        ordering = list(self.keyset_ordering or self.model._meta.ordering)
+        if not any(field.lstrip('-') in ('pk', 'id') for field in ordering):
+            ordering.append('pk')
+        return ordering
+
+    def paginate_queryset(self, queryset, page_size):
+        ordering = self.get_keyset_ordering()
+        aliases = [f'_keyset_{index}' for index in range(len(ordering))]
+        descending = [field.startswith('-') for field in ordering]
+        queryset = queryset.annotate(**{
+            alias: F(field.lstrip('-')) for alias, field in zip(aliases, ordering)
+        })
+
+        direction, values = self.decode_cursor(self.request.GET.get(self.cursor_kwarg), len(ordering))
+        backwards = direction == 'previous'
+        if values is not None:
+            try:
+                queryset = queryset.filter(self.seek(aliases, descending, values, backwards))
+            except (ValidationError, ValueError, TypeError):
+                raise BadRequest("Invalid cursor.")
+        queryset = queryset.order_by(*[
+            F(alias).asc() if desc == backwards else F(alias).desc()
+            for alias, desc in zip(aliases, descending)
+        ])
+
+        object_list = list(queryset[:page_size + 1])
+        more = len(object_list) > page_size
+        object_list = object_list[:page_size]
+        if backwards:
+            object_list.reverse()
+
+        has_next = more if not backwards else values is not None
+        has_previous = values is not None if not backwards else more
+        page = KeysetPage(
+            object_list,
+            next_cursor=self.encode_cursor('next', aliases, object_list[-1]) if has_next and object_list else None,
+            previous_cursor=self.encode_cursor('previous', aliases, object_list[0]) if has_previous and object_list else None,
+        )
+        return (None, page, object_list, page.has_other_pages())
+
+    @staticmethod
+    def seek(aliases, descending, values, backwards):
+        condition = Q()
+        equal = Q()
+        for alias, desc, value in zip(aliases, descending, values):
+            lookup = 'lt' if desc != backwards else 'gt'
+            condition |= equal & Q(**{f'{alias}__{lookup}': value})
+            equal &= Q(**{alias: value})
+        return condition
+
+    @staticmethod
+    def encode_cursor(direction, aliases, obj):
+        payload = json.dumps([direction, [getattr(obj, alias) for alias in aliases]], cls=DjangoJSONEncoder)
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+
+    @staticmethod
+    def decode_cursor(cursor, length):
+        if not cursor:
+            return 'next', None
+        try:
+            direction, values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        except (ValueError, TypeError, binascii.Error):
+            raise BadRequest("Invalid cursor.")
+        if direction not in ('next', 'previous') or not isinstance(values, list) or len(values) != length:
+            raise BadRequest("Invalid cursor.")
+        return direction, values
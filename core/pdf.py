@@ -0,0 +1,74 @@
+A4 = (595, 842)
+
+FONTS = {
+    'regular': ('F1', 'Helvetica'),
+    'bold': ('F2', 'Helvetica-Bold'),
+}
+
+
+def _escape(text):
+    return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)').replace('\r', '').replace('\n', ' ')
+
+
+def _number(value):
+    return f'{value:.2f}'.rstrip('0').rstrip('.')
+
+
+class PDFDocument:
+    """
+    Minimal PDF writer: text in the standard Helvetica fonts and straight lines, page by page.
+
+    Only what report cards need, so the project does not depend on a PDF library. Text is
+    encoded in WinAnsi (cp1252), which covers French; other characters are replaced by '?'.
+    """
+    def __init__(self, page_size=A4):
+        self.page_size = page_size
+        self.pages = []
+
+    def add_page(self):
+        self.pages.append([])
+
+    def text(self, x, y, text, size=10, font='regular'):
+        """Draw `text` with its baseline starting at (x, y), in points from the bottom left corner."""
+        name, _ = FONTS[font]
+        self.pages[-1].append(
+            f'BT /{name} {_number(size)} Tf {_number(x)} {_number(y)} Td ({_escape(str(text))}) Tj ET'
+        )
+
+    def line(self, x1, y1, x2, y2, width=0.5):
+        self.pages[-1].append(f'{_number(width)} w {_number(x1)} {_number(y1)} m {_number(x2)} {_number(y2)} l S')
+
+    def render(self):
+        """Return the document as PDF bytes."""
+        fonts = len(FONTS)
+        first_page = 3 + fonts
+        objects = [
+            b'<< /Type /Catalog /Pages 2 0 R >>',
+            '<< /Type /Pages /Kids [{}] /Count {} >>'.format(
+                ' '.join(f'{first_page + 2 * index} 0 R' for index in range(len(self.pages))), len(self.pages)
+            ).encode(),
+        ]
+        for _, base_font in FONTS.values():
+            objects.append(
+                f'<< /Type /Font /Subtype /Type1 /BaseFont /{base_font} /Encoding /WinAnsiEncoding >>'.encode()
+            )
+        resources = ' '.join(f'/{name} {3 + index} 0 R' for index, (name, _) in enumerate(FONTS.values()))
+        width, height = self.page_size
+        for index, operations in enumerate(self.pages):
+            objects.append((
+                f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {width} {height}] '
+                f'/Resources << /Font << {resources} >> >> /Contents {first_page + 2 * index + 1} 0 R >>'
+            ).encode())
+            content = '\n'.join(operations).encode('cp1252', errors='replace')
+            objects.append(b'<< /Length %d >>\nstream\n%s\nendstream' % (len(content), content))
+
+        output = bytearray(b'%PDF-1.4\n')
+        offsets = []
+        for number, body in enumerate(objects, 1):
+            offsets.append(len(output))
+            output += b'%d 0 obj\n%s\nendobj\n' % (number, body)
+        xref = len(output)
+        output += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+        output += b''.join(b'%010d 00000 n \n' % offset for offset in offsets)
+        output += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%EOF\n' % (len(objects) + 1, xref)
+        return bytes(output)
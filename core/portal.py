@@ -0,0 +1,70 @@
+import datetime
+
+from django.core.cache import cache
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import Enrollment, Grade, Subject
+
+
+TIMEOUT = 24 * 60 * 60
+NEVER = datetime.datetime(2000, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def _modified_key(enrollment_id):
+    return f'portal:grades-modified:{enrollment_id}'
+
+
+def _owner_key(enrollment_id):
+    return f'portal:owner:{enrollment_id}'
+
+
+SUBJECTS_MODIFIED_KEY = 'portal:subjects-modified'
+
+
+def touch_grades(enrollment_ids):
+    """Record that the grades of these enrollments changed now, for conditional portal requests."""
+    now = timezone.now()
+    cache.set_many({_modified_key(pk): now for pk in set(enrollment_ids) if pk is not None}, TIMEOUT)
+
+
+def touch_subjects():
+    """Record that subjects (and so their coefficients) changed now."""
+    cache.set(SUBJECTS_MODIFIED_KEY, timezone.now(), TIMEOUT)
+
+
+def forget_owner(enrollment_id):
+    cache.delete(_owner_key(enrollment_id))
+
+
+async def grades_last_modified(enrollment_id):
+    """
+    When the grades of an enrollment last changed. Served from the cache, which grade saves,
+    deletes and bulk entry keep up to date; computed from Grade.updated_at on a cold cache.
+    """
+    last_modified = await cache.aget(_modified_key(enrollment_id))
+    if last_modified is None:
+        result = await Grade.objects.filter(enrollment_id=enrollment_id).aaggregate(last_modified=Max('updated_at'))
+        last_modified = result['last_modified'] or NEVER
+        await cache.aset(_modified_key(enrollment_id), last_modified, TIMEOUT)
+    return last_modified
+
+
+async def subjects_last_modified():
+    """When a subject last changed; computed from Subject.updated_at on a cold cache."""
+    last_modified = await cache.aget(SUBJECTS_MODIFIED_KEY)
+    if last_modified is None:
+        result = await Subject.objects.aaggregate(last_modified=Max('updated_at'))
+        last_modified = result['last_modified'] or NEVER
+        await cache.aset(SUBJECTS_MODIFIED_KEY, last_modified, TIMEOUT)
+    return last_modified
+
+
+async def enrollment_owner(enrollment_id):
+    """The user id of the student of an enrollment, or None when the enrollment does not exist."""
+    owner = await cache.aget(_owner_key(enrollment_id))
+    if owner is None:
+        owner = await Enrollment.objects.filter(pk=enrollment_id).values_list('student__user_id', flat=True).afirst()
+        if owner is not None:
+            await cache.aset(_owner_key(enrollment_id), owner, TIMEOUT)
+    return owner
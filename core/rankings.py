@@ -0,0 +1,166 @@
+from collections import Counter, defaultdict, namedtuple
+
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import F, FloatField, Window
+from django.db.models.functions import DenseRank, PercentRank, Rank, Round
+
+from .cache import get_version, versioned_key
+from .db_routers import replica_in_use
+from .models import EnrollmentSubjectPeriodSummary, RANKINGS_NAMESPACE, rankings_namespace
+from .report_cards import _combine
+
+
+PRECISION = 2
+# Versions are bumped on commit; the timeout bounds what a missed bump could leave stale.
+TIMEOUT = 60 * 60
+
+Ranking = namedtuple('Ranking', ['average', 'rank', 'dense_rank', 'percentile', 'ex_aequo', 'size'])
+ClassRanking = namedtuple('ClassRanking', ['subjects', 'overall'])
+
+
+def _cache_key(class_id, period_id):
+    return versioned_key(RANKINGS_NAMESPACE, class_id, period_id, get_version(rankings_namespace(class_id, period_id)))
+
+
+def _percentile(percent_rank):
+    return round(100 * (1 - percent_rank), 1)
+
+
+def rank_averages(averages):
+    """
+    Rank a {key: average} dict, best average first, and return {key: Ranking}.
+
+    Averages are compared at report-card precision (PRECISION decimals); equal averages
+    share the same rank (1, 1, 3) and dense rank (1, 1, 2) and are flagged ex aequo.
+    The percentile is the share of the group ranked at or below the student.
+    """
+    rounded = {key: round(average, PRECISION) for key, average in averages.items()}
+    ordered = sorted(rounded.values(), reverse=True)
+    size = len(ordered)
+    ranks = {}
+    dense_ranks = {}
+    for index, average in enumerate(ordered):
+        if average not in ranks:
+            ranks[average] = index + 1
+            dense_ranks[average] = len(dense_ranks) + 1
+    ties = Counter(ordered)
+    return {
+        key: Ranking(
+            average=average,
+            rank=ranks[average],
+            dense_rank=dense_ranks[average],
+            percentile=_percentile((ranks[average] - 1) / (size - 1) if size > 1 else 0),
+            ex_aequo=ties[average] > 1,
+            size=size,
+        )
+        for key, average in rounded.items()
+    }
+
+
+def _summary_rows(class_ids, period):
+    return EnrollmentSubjectPeriodSummary.objects.filter(
+        enrollment__student_class_id__in=class_ids, period=period, coefficient_sum__gt=0
+    ).exclude(enrollment__status='withdrawn').order_by()
+
+
+def _window_subject_rankings(class_ids, period):
+    average = Round(F('weighted_sum') / F('coefficient_sum'), PRECISION, output_field=FloatField())
+    partition = [F('enrollment__student_class'), F('subject')]
+    rows = _summary_rows(class_ids, period).annotate(
+        rounded_average=average,
+        rank=Window(Rank(), partition_by=partition, order_by=average.desc()),
+        dense_rank=Window(DenseRank(), partition_by=partition, order_by=average.desc()),
+        percent_rank=Window(PercentRank(), partition_by=partition, order_by=average.desc()),
+    ).values_list(
+        'enrollment__student_class_id', 'subject_id', 'enrollment_id',
+        'rounded_average', 'rank', 'dense_rank', 'percent_rank'
+    )
+
+    rows = list(rows)
+    sizes = Counter((class_id, subject_id) for class_id, subject_id, *_ in rows)
+    ties = Counter((class_id, subject_id, rank) for class_id, subject_id, _, _, rank, _, _ in rows)
+    subjects = defaultdict(lambda: defaultdict(dict))
+    for class_id, subject_id, enrollment_id, average, rank, dense_rank, percent_rank in rows:
+        subjects[class_id][subject_id][enrollment_id] = Ranking(
+            average=average,
+            rank=rank,
+            dense_rank=dense_rank,
+            percentile=_percentile(percent_rank),
+            ex_aequo=ties[class_id, subject_id, rank] > 1,
+            size=sizes[class_id, subject_id],
+        )
+    return subjects
+
+
+def _memory_subject_rankings(class_ids, period):
+    averages = defaultdict(lambda: defaultdict(dict))
+    for class_id, subject_id, enrollment_id, weighted_sum, coefficient_sum in _summary_rows(class_ids, period).values_list(
+        'enrollment__student_class_id', 'subject_id', 'enrollment_id', 'weighted_sum', 'coefficient_sum'
+    ):
+        averages[class_id][subject_id][enrollment_id] = weighted_sum / coefficient_sum
+    return {
+        class_id: {subject_id: rank_averages(scores) for subject_id, scores in subjects.items()}
+        for class_id, subjects in averages.items()
+    }
+
+
+def _overall_rankings(class_ids, period):
+    rows = _summary_rows(class_ids, period).values_list(
+        'enrollment__student_class_id', 'enrollment_id', 'subject_id',
+        'weighted_sum', 'coefficient_sum', 'subject__coefficient'
+    )
+    classes = {}
+    subject_averages = []
+    subject_weight = {}
+    for class_id, enrollment_id, subject_id, weighted_sum, coefficient_sum, subject_coefficient in rows:
+        classes[enrollment_id] = class_id
+        subject_averages.append(((enrollment_id, subject_id), weighted_sum / coefficient_sum))
+        subject_weight[subject_id] = subject_coefficient
+
+    overall = defaultdict(dict)
+    for enrollment_id, averages in _combine(subject_averages, subject_weight).items():
+        overall[classes[enrollment_id]][enrollment_id] = averages.overall
+    return {class_id: rank_averages(averages) for class_id, averages in overall.items()}
+
+
+def rank_classes(classes, period, use_window=None):
+    """
+    Rank the students of several classes in a period, per subject and overall.
+
+    Returns {class_id: ClassRanking(subjects={subject_id: {enrollment_id: Ranking}},
+    overall={enrollment_id: Ranking})}. Withdrawn enrollments are not ranked. Rankings are
+    read from the grade summaries: subject ranks come from Rank/DenseRank/PercentRank window
+    functions partitioned by class and subject (or are computed in memory when the database
+    has no window functions), the overall rank from the Subject.coefficient-weighted
+    averages. All classes missing from the cache are ranked together with two queries, and
+    the results are cached per class and period until a grade in that scope changes, for an
+    hour at most. Rankings read from the replica are not cached, since it may lag behind
+    that invalidation.
+    """
+    class_ids = [getattr(student_class, 'pk', student_class) for student_class in classes]
+    keys = {class_id: _cache_key(class_id, period.pk) for class_id in class_ids}
+    cached = cache.get_many(keys.values())
+    rankings = {class_id: cached[key] for class_id, key in keys.items() if key in cached}
+
+    missing = [class_id for class_id in class_ids if class_id not in rankings]
+    if missing:
+        if use_window is None:
+            use_window = connection.features.supports_over_clause
+        subjects = (_window_subject_rankings if use_window else _memory_subject_rankings)(missing, period)
+        overall = _overall_rankings(missing, period)
+        computed = {
+            class_id: ClassRanking(
+                subjects={subject_id: dict(ranks) for subject_id, ranks in subjects.get(class_id, {}).items()},
+                overall=overall.get(class_id, {}),
+            )
+            for class_id in missing
+        }
+        if not replica_in_use():
+            cache.set_many({keys[class_id]: ranking for class_id, ranking in computed.items()}, TIMEOUT)
+        rankings.update(computed)
+    return rankings
+
+
+def rank_class(student_class, period, use_window=None):
+    return rank_classes([student_class], period, use_window)[student_class.pk]
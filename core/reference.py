@@ -0,0 +1,170 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .cache import bump_version, get_version
+from .models import AcademicYear, Period, Class, ClassSubject, Subject
+
+
+MISSING = object()
+
+
+class LocalLRU:
+    """Thread-safe, process-local least-recently-used mapping of at most `maxsize` entries."""
+
+    def __init__(self, maxsize=512):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self.lock:
+            try:
+                self.entries.move_to_end(key)
+            except KeyError:
+                return default
+            return self.entries[key]
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+local_cache = LocalLRU(getattr(settings, 'REFERENCE_CACHE_SIZE', 512))
+
+
+class ReferenceCache:
+    """
+    Read-through cache for one reference table.
+
+    Values are looked up in the process-local LRU, then in the shared cache, and only then
+    loaded from the database. Keys embed the table's cache version, so `invalidate()` (called
+    from the save/delete signals) makes every process miss and reload. The version itself is
+    kept in this process for REFERENCE_VERSION_TTL seconds, so an LRU hit costs no shared
+    cache round trip and other processes see an invalidation up to that long after it.
+    """
+    timeout = 24 * 60 * 60
+
+    def __init__(self, name):
+        self.name = name
+        self.local_version = None
+
+    @property
+    def namespace(self):
+        return f'reference:{self.name}'
+
+    def version(self):
+        now = time.monotonic()
+        local_version = self.local_version
+        if local_version is None or now - local_version[1] >= getattr(settings, 'REFERENCE_VERSION_TTL', 5):
+            local_version = self.local_version = (get_version(self.namespace), now)
+        return local_version[0]
+
+    def get(self, key, loader):
+        key = f'{self.namespace}:{self.version()}:{key}'
+        value = local_cache.get(key, MISSING)
+        if value is MISSING:
+            value = cache.get(key, MISSING)
+            if value is MISSING:
+                value = loader()
+                cache.set(key, value, self.timeout)
+            local_cache.set(key, value)
+        return value
+
+    def invalidate(self):
+        bump_version(self.namespace)
+        self.local_version = None
+
+
+ACADEMIC_YEARS = ReferenceCache('academic_year')
+PERIODS = ReferenceCache('period')
+SUBJECTS = ReferenceCache('subject')
+CLASSES = ReferenceCache('class')
+CLASS_SUBJECTS = ReferenceCache('class_subject')
+
+
+def current_academic_year():
+    return ACADEMIC_YEARS.get('current', AcademicYear.objects.current)
+
+
+def current_period():
+    academic_year = current_academic_year()
+    if academic_year is None:
+        return None
+    return PERIODS.get(
+        f'current:{academic_year.pk}',
+        lambda: Period.objects.current(academic_year)
+    )
+
+
+def periods(academic_year):
+    return PERIODS.get(
+        f'year:{academic_year.pk}',
+        lambda: list(Period.objects.filter(academic_year=academic_year).order_by('start_date'))
+    )
+
+
+def subjects():
+    return SUBJECTS.get('all', lambda: list(Subject.objects.all()))
+
+
+def subject_coefficients():
+    return SUBJECTS.get('coefficients', lambda: dict(Subject.objects.order_by().values_list('pk', 'coefficient')))
+
+
+def classes(academic_year):
+    """The classes of a year; their enrolled_count is the one at load time and may be stale."""
+    return CLASSES.get(
+        f'year:{academic_year.pk}',
+        lambda: list(Class.objects.filter(academic_year=academic_year).order_by('level', 'name'))
+    )
+
+
+ALL_PERIODS = 'all'
+
+
+def class_subject_periods(academic_year_id):
+    """
+    Map each (class_id, subject_id) taught in a year to ALL_PERIODS, for assignments without
+    a period, or to the frozenset of the ids of the periods it is taught in.
+    """
+    def load():
+        assignments = {}
+        for class_id, subject_id, period_id in ClassSubject.objects.filter(
+            student_class__academic_year_id=academic_year_id
+        ).order_by().values_list('student_class_id', 'subject_id', 'period_id'):
+            key = (class_id, subject_id)
+            if period_id is None:
+                assignments[key] = ALL_PERIODS
+            elif assignments.get(key) != ALL_PERIODS:
+                assignments[key] = assignments.get(key, frozenset()) | {period_id}
+        return assignments
+
+    return CLASS_SUBJECTS.get(f'year:{academic_year_id}', load)
+
+
+def is_taught(class_id, subject_id, period):
+    """Whether a subject is assigned to a class for a period, checked against the cached map of its year."""
+    allowed = class_subject_periods(period.academic_year_id).get((class_id, subject_id), frozenset())
+    return allowed == ALL_PERIODS or period.pk in allowed
+
+
+def is_taught_on(student_class, subject_id, date):
+    """
+    Whether a subject is taught to a class on a date: in the period of the class's year that
+    contains it, or in every period when the date falls in none.
+    """
+    period = next((p for p in periods(student_class.academic_year) if p.start_date <= date <= p.end_date), None)
+    if period is None:
+        return class_subject_periods(student_class.academic_year_id).get((student_class.pk, subject_id)) == ALL_PERIODS
+    return is_taught(student_class.pk, subject_id, period)
@@ -0,0 +1,249 @@
+import multiprocessing
+import os
+import textwrap
+import zipfile
+from collections import defaultdict, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import django
+from django.conf import settings
+from django.utils.text import slugify
+
+from .models import AcademicYear, Class, Enrollment, Attendance, Grade
+from .pdf import A4, PDFDocument
+from .rankings import ClassRanking, rank_averages, rank_classes
+from .reference import subjects
+from .report_cards import _scope_filter, compute_averages
+
+
+ReportCard = namedtuple('ReportCard', [
+    'filename', 'title', 'student', 'student_id', 'student_class', 'subjects', 'overall', 'attendance', 'comments'
+])
+SubjectLine = namedtuple('SubjectLine', ['name', 'coefficient', 'average', 'ranking'])
+
+CHUNK_SIZE = 50
+MARGIN = 50
+
+
+def _year_rankings(averages, class_of):
+    """Rank annual averages per class, as rank_classes() does for a period."""
+    subject_averages = defaultdict(lambda: defaultdict(dict))
+    overall = defaultdict(dict)
+    for enrollment_id, enrollment_averages in averages.items():
+        class_id = class_of[enrollment_id]
+        for subject_id, average in enrollment_averages.subjects.items():
+            subject_averages[class_id][subject_id][enrollment_id] = average
+        overall[class_id][enrollment_id] = enrollment_averages.overall
+    return {
+        class_id: ClassRanking(
+            subjects={subject_id: rank_averages(scores) for subject_id, scores in subject_averages[class_id].items()},
+            overall=rank_averages(overall[class_id]),
+        )
+        for class_id in overall
+    }
+
+
+def build_report_cards(scope, classes=None):
+    """
+    Load the report cards of a Period or of a whole AcademicYear for every enrollment (but
+    withdrawn ones) of `classes`, all classes of the year by default.
+
+    Everything is preloaded with a fixed number of queries whatever the number of students:
+    enrollments, averages (from the grade summaries), rankings (cached per class and period),
+    attendance rates and grade comments. Returns a list of picklable ReportCard tuples ordered
+    by class and student name, ready to be rendered in other processes.
+    """
+    academic_year = scope if isinstance(scope, AcademicYear) else scope.academic_year
+    if classes is None:
+        classes = Class.objects.filter(academic_year=academic_year)
+    class_ids = [getattr(student_class, 'pk', student_class) for student_class in classes]
+
+    enrollments = list(Enrollment.objects.filter(
+        student_class_id__in=class_ids, academic_year=academic_year
+    ).exclude(status='withdrawn').select_related('student__user', 'student_class').order_by(
+        'student_class__level', 'student_class__name', 'student__user__last_name', 'student__user__first_name'
+    ))
+    class_of = {enrollment.pk: enrollment.student_class_id for enrollment in enrollments}
+    # Withdrawn enrollments keep their grades but get no report card and are not ranked.
+    averages = {
+        enrollment_id: enrollment_averages
+        for enrollment_id, enrollment_averages in compute_averages(scope, classes=class_ids).items()
+        if enrollment_id in class_of
+    }
+    if isinstance(scope, AcademicYear):
+        rankings = _year_rankings(averages, class_of)
+        start_date, end_date = academic_year.start_date, academic_year.end_date
+    else:
+        rankings = rank_classes(class_ids, scope)
+        start_date, end_date = scope.start_date, scope.end_date
+    attendance = {
+        row['enrollment']: row
+        for row in Attendance.objects.between(start_date, end_date).filter(
+            enrollment__student_class_id__in=class_ids
+        ).rates('enrollment')
+    }
+    comments = defaultdict(list)
+    for enrollment_id, subject_id, comment in Grade.objects.filter(
+        **_scope_filter(scope, class_ids)
+    ).exclude(comment='').order_by('date_graded', 'pk').values_list('enrollment_id', 'subject_id', 'comment'):
+        comments[enrollment_id].append((subject_id, comment))
+    subject_by_id = {subject.pk: subject for subject in subjects()}
+
+    cards = []
+    for enrollment in enrollments:
+        student = enrollment.student
+        student_class = enrollment.student_class
+        enrollment_averages = averages.get(enrollment.pk)
+        ranking = rankings.get(student_class.pk, ClassRanking({}, {}))
+        lines = sorted(
+            (
+                SubjectLine(
+                    name=subject_by_id[subject_id].name,
+                    coefficient=subject_by_id[subject_id].coefficient,
+                    average=average,
+                    ranking=ranking.subjects.get(subject_id, {}).get(enrollment.pk),
+                )
+                for subject_id, average in (enrollment_averages.subjects.items() if enrollment_averages else ())
+            ),
+            key=lambda line: line.name
+        )
+        cards.append(ReportCard(
+            filename=f'{slugify(student_class.name)}/{slugify(student.student_id)}-{slugify(student.full_name)}.pdf',
+            title=str(scope),
+            student=student.full_name,
+            student_id=student.student_id,
+            student_class=f'{student_class.name} ({student_class.level})',
+            subjects=lines,
+            overall=ranking.overall.get(enrollment.pk) if enrollment_averages else None,
+            attendance=attendance.get(enrollment.pk),
+            comments=[(subject_by_id[subject_id].name, comment) for subject_id, comment in comments[enrollment.pk]],
+        ))
+    return cards
+
+
+def _rank(ranking):
+    if ranking is None:
+        return '-'
+    return f"{ranking.rank}{'=' if ranking.ex_aequo else ''} / {ranking.size}"
+
+
+def render_report_card(card):
+    """Render a ReportCard, returning `(filename, pdf bytes)`. Does not touch the database."""
+    document = PDFDocument()
+    width, height = A4
+    y = 0
+
+    def write(text, x=MARGIN, size=10, font='regular', advance=14):
+        nonlocal y
+        if y < MARGIN + advance:
+            document.add_page()
+            y = height - MARGIN
+        document.text(x, y, text, size, font)
+
+    def next_line(advance=14):
+        nonlocal y
+        y -= advance
+
+    write("Report card", size=16, font='bold')
+    next_line(20)
+    write(card.title)
+    next_line(24)
+    write(f"Student: {card.student}", font='bold')
+    write(f"ID: {card.student_id}", x=380)
+    next_line()
+    write(f"Class: {card.student_class}")
+    next_line(24)
+
+    columns = [("Subject", MARGIN), ("Coef.", 260), ("Average / 20", 320), ("Rank", 410), ("Percentile", 480)]
+    for label, x in columns:
+        write(label, x=x, font='bold')
+    next_line(6)
+    document.line(MARGIN, y, width - MARGIN, y)
+    next_line(14)
+    for line in card.subjects:
+        write(line.name[:40])
+        write(f'{line.coefficient:g}', x=260)
+        write(f'{line.average:.2f}', x=320)
+        write(_rank(line.ranking), x=410)
+        write(f'{line.ranking.percentile:g}' if line.ranking else '-', x=480)
+        next_line()
+    if not card.subjects:
+        write("No grades recorded.")
+        next_line()
+    document.line(MARGIN, y + 8, width - MARGIN, y + 8)
+    next_line(10)
+    if card.overall is not None:
+        write(f"Overall average: {card.overall.average:.2f} / 20", font='bold')
+        write(f"Rank: {_rank(card.overall)}", x=320, font='bold')
+        write(f"Percentile: {card.overall.percentile:g}", x=480)
+        next_line(24)
+
+    write("Attendance", size=12, font='bold')
+    next_line(16)
+    attendance = card.attendance
+    if attendance:
+        write(
+            f"{attendance['total']} sessions: {attendance['present']} present, {attendance['late']} late, "
+            f"{attendance['absent']} absent, {attendance['excused']} excused "
+            f"({attendance['absence_rate']:.1f}% absence rate)."
+        )
+    else:
+        write("No attendance recorded.")
+    next_line(24)
+
+    if card.comments:
+        write("Teacher comments", size=12, font='bold')
+        next_line(16)
+        for subject, comment in card.comments:
+            for text in textwrap.wrap(f"{subject}: {comment}", 95, subsequent_indent='    '):
+                write(text, size=9)
+                next_line(12)
+    return card.filename, document.render()
+
+
+def _render_chunk(cards):
+    return [render_report_card(card) for card in cards]
+
+
+def render_report_cards(cards, workers=None):
+    """
+    Render report cards and yield `(filename, pdf bytes)` in order.
+
+    Rendering is fanned out in chunks over a pool of `workers` processes (REPORT_CARD_WORKERS,
+    or one per CPU, by default). Workers are spawned rather than forked so they never share
+    the database connections of this process; small batches and `workers=1` are rendered here.
+    """
+    if workers is None:
+        workers = getattr(settings, 'REPORT_CARD_WORKERS', None) or os.cpu_count() or 1
+    if workers == 1 or len(cards) <= CHUNK_SIZE:
+        yield from map(render_report_card, cards)
+        return
+
+    cards = iter(cards)
+    chunks = iter(lambda: list(islice(cards, CHUNK_SIZE)), [])
+    with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn'), initializer=django.setup) as executor:
+        for rendered in executor.map(_render_chunk, chunks):
+            yield from rendered
+
+
+def write_zip(rendered, target):
+    """Write rendered report cards into a zip archive at `target` (a path or a binary file); return their number."""
+    count = 0
+    with zipfile.ZipFile(target, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for filename, content in rendered:
+            archive.writestr(filename, content)
+            count += 1
+    return count
+
+
+def write_files(rendered, directory):
+    """Write rendered report cards as files under `directory`, one folder per class; return their number."""
+    count = 0
+    for filename, content in rendered:
+        path = os.path.join(directory, filename)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as output:
+            output.write(content)
+        count += 1
+    return count
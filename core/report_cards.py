@@ -0,0 +1,89 @@
+from collections import defaultdict, namedtuple
+
+from .models import AcademicYear, Period, Grade, EnrollmentSubjectPeriodSummary
+
+
+EnrollmentAverages = namedtuple('EnrollmentAverages', ['subjects', 'overall'])
+
+
+def _scope_filter(scope, classes=None):
+    if isinstance(scope, Period):
+        filters = {'period': scope}
+    elif isinstance(scope, AcademicYear):
+        filters = {'period__academic_year': scope}
+    else:
+        raise TypeError("Report cards are computed for a Period or an AcademicYear.")
+    if classes is not None:
+        filters['enrollment__student_class__in'] = classes
+    return filters
+
+
+def grade_columns(scope, classes=None):
+    """
+    Fetch the grade columns needed for averages in a single query.
+
+    Returns the rows transposed into parallel tuples: enrollment ids, subject ids,
+    weighted points (grade out of 20 times its coefficient), grade coefficients and
+    subject coefficients.
+    """
+    rows = Grade.objects.filter(
+        enrollment__isnull=False, **_scope_filter(scope, classes)
+    ).order_by().values_list(
+        'enrollment_id', 'subject_id', 'value', 'max_value', 'coefficient', 'subject__coefficient'
+    )
+    enrollment_ids, subject_ids, values, max_values, coefficients, subject_coefficients = (
+        tuple(zip(*rows)) or ((), (), (), (), (), ())
+    )
+    points = [v / m * 20 * c for v, m, c in zip(values, max_values, coefficients)]
+    return enrollment_ids, subject_ids, points, coefficients, subject_coefficients
+
+
+def summary_columns(scope, classes=None):
+    """Same columns as `grade_columns`, read from the grade summaries (one row per subject and period)."""
+    rows = EnrollmentSubjectPeriodSummary.objects.filter(
+        **_scope_filter(scope, classes)
+    ).order_by().values_list(
+        'enrollment_id', 'subject_id', 'weighted_sum', 'coefficient_sum', 'subject__coefficient'
+    )
+    return tuple(zip(*rows)) or ((), (), (), (), ())
+
+
+def compute_averages(scope, from_grades=False, classes=None):
+    """
+    Compute weighted averages (out of 20) for every enrollment graded in a Period or AcademicYear.
+
+    Subject averages weight each grade by `Grade.coefficient`; the overall average weights
+    each subject average by `Subject.coefficient`. Returns a dict mapping enrollment ids to
+    `EnrollmentAverages(subjects={subject_id: average}, overall=average)`.
+
+    Averages are read from the grade summaries unless `from_grades` is set, in which case
+    they are recomputed from the Grade rows. `classes` restricts them to the enrollments of
+    these classes (instances or ids).
+    """
+    columns = grade_columns(scope, classes) if from_grades else summary_columns(scope, classes)
+    enrollment_ids, subject_ids, points, coefficients, subject_coefficients = columns
+
+    sums = defaultdict(float)
+    weights = defaultdict(float)
+    subject_weight = {}
+    for key, key_points, coefficient, subject_coefficient in zip(
+        zip(enrollment_ids, subject_ids), points, coefficients, subject_coefficients
+    ):
+        sums[key] += key_points
+        weights[key] += coefficient
+        subject_weight[key[1]] = subject_coefficient
+
+    return _combine(((key, sums[key] / weights[key]) for key in sums), subject_weight)
+
+
+def _combine(subject_averages, subject_weight):
+    results = defaultdict(dict)
+    for (enrollment_id, subject_id), average in subject_averages:
+        results[enrollment_id][subject_id] = average
+
+    averages = {}
+    for enrollment_id, subjects in results.items():
+        total = sum(average * subject_weight[subject_id] for subject_id, average in subjects.items())
+        weight = sum(subject_weight[subject_id] for subject_id in subjects)
+        averages[enrollment_id] = EnrollmentAverages(subjects=subjects, overall=total / weight)
+    return averages
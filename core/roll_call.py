@@ -0,0 +1,111 @@
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+
+from .attendance import refresh_rollups
+from .models import Attendance, Enrollment
+from .reference import is_taught_on
+
+
+NOT_ACTIVE = "This enrollment is not active in the class."
+
+
+def roll_call_roster(student_class, subject, date):
+    """
+    List the active enrollments of a class with the status already recorded, if any,
+    for this subject and date.
+    """
+    enrollments = Enrollment.objects.filter(
+        student_class=student_class,
+        status='active'
+    ).select_related('student__user').order_by('student__user__last_name', 'student__user__first_name')
+    recorded = dict(Attendance.objects.filter(
+        enrollment__student_class=student_class,
+        subject=subject,
+        date=date
+    ).order_by().values_list('enrollment_id', 'status'))
+    return [
+        {
+            'enrollment': enrollment.pk,
+            'student': enrollment.student.full_name,
+            'status': recorded.get(enrollment.pk),
+        }
+        for enrollment in enrollments
+    ]
+
+
+def record_roll_call(student_class, subject, date, rows, teacher=None):
+    """
+    Save a whole roll call for a class in one transaction.
+
+    `rows` is a sequence of dicts with `enrollment` (id), `status` and an optional `reason`.
+    Rows are written with a single insert that updates the existing record for the same
+    (enrollment, subject, date), so a sheet can be submitted again to correct it.
+    Returns `(records, errors)` where `errors` maps row indexes to lists of messages;
+    nothing is saved when any row is invalid, including enrollments withdrawn or deleted
+    while the sheet was being checked. Raises ValidationError when the subject is not taught
+    to the class on that date.
+    """
+    if not is_taught_on(student_class, subject.pk, date):
+        raise ValidationError("This subject is not assigned to the class on this date.")
+
+    active = set(Enrollment.objects.filter(
+        student_class=student_class,
+        status='active'
+    ).order_by().values_list('pk', flat=True))
+    statuses = dict(Attendance.STATUS)
+
+    records = []
+    errors = {}
+    seen = set()
+    for index, row in enumerate(rows):
+        row_errors = []
+        try:
+            enrollment_id = int(row.get('enrollment'))
+        except (TypeError, ValueError):
+            enrollment_id = None
+        if enrollment_id not in active:
+            row_errors.append(NOT_ACTIVE)
+        elif enrollment_id in seen:
+            row_errors.append("This enrollment appears more than once in the roll call.")
+        seen.add(enrollment_id)
+        if row.get('status') not in statuses:
+            row_errors.append(f"Unknown status {row.get('status')!r}.")
+
+        if row_errors:
+            errors[index] = row_errors
+        else:
+            records.append(Attendance(
+                enrollment_id=enrollment_id,
+                teacher=teacher,
+                subject=subject,
+                date=date,
+                status=row['status'],
+                reason=row.get('reason') or '',
+            ))
+
+    if errors:
+        return [], errors
+
+    try:
+        with transaction.atomic():
+            # Lock the roster so no enrollment is withdrawn or deleted until the sheet is saved.
+            still_active = set(Enrollment.objects.select_for_update().filter(
+                pk__in=[record.enrollment_id for record in records],
+                status='active'
+            ).order_by().values_list('pk', flat=True))
+            if len(still_active) == len(records):
+                records = Attendance.objects.bulk_create(
+                    records,
+                    update_conflicts=True,
+                    unique_fields=['enrollment', 'subject', 'date'],
+                    update_fields=['teacher', 'status', 'reason', 'updated_at'],
+                )
+                refresh_rollups(record.rollup_key for record in records)
+    except IntegrityError:
+        still_active = set()
+    if len(still_active) < len(records):
+        # Every row is valid at this point, so records and rows line up.
+        return [], {
+            index: [NOT_ACTIVE] for index, record in enumerate(records) if record.enrollment_id not in still_active
+        }
+    return records, {}
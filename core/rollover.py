@@ -0,0 +1,161 @@
+from collections import Counter, defaultdict, namedtuple
+
+from django.db import transaction
+from django.db.models.functions import Now
+
+from .autocomplete import SOURCES
+from .cache import bump_version
+from .models import AcademicYear, Period, Class, ClassSubject, Enrollment, RANKINGS_NAMESPACE
+from .reference import ACADEMIC_YEARS, PERIODS, CLASSES, CLASS_SUBJECTS
+
+
+RolloverResult = namedtuple(
+    'RolloverResult',
+    ['academic_year', 'periods', 'classes', 'class_subjects', 'promoted', 'graduated']
+)
+
+
+class Rollback(Exception):
+    pass
+
+
+def _next_year(date):
+    try:
+        return date.replace(year=date.year + 1)
+    except ValueError:
+        return date.replace(year=date.year + 1, day=28)
+
+
+def rollover_academic_year(source, level_map, start_date=None, end_date=None, make_current=False, dry_run=False):
+    """
+    Create the academic year following `source` and promote its active enrollments into it.
+
+    The new year gets a copy of the periods (shifted to the new dates), classes and
+    ClassSubject assignments of `source`. `level_map` maps every class level of `source`
+    to the level students move up to, or to None for the final level, whose active
+    enrollments are marked graduated. The other active enrollments of `source` are marked
+    completed, so each student is active in the new year only. Within a level, classes are
+    paired with the next-level classes by name order (6A -> 5A, 6B -> 5B, ...).
+
+    Everything runs in one transaction with bulk inserts and updates, so the number of
+    queries does not depend on the number of students. With `dry_run`, the transaction
+    is rolled back and only the counts are returned. Raises ValueError when a level is
+    missing from `level_map`, when a class of the new year would exceed max_students, or
+    when an academic year already starts in the year of `start_date` (a second run).
+    """
+    start_date = start_date or _next_year(source.start_date)
+    end_date = end_date or _next_year(source.end_date)
+    shift = start_date - source.start_date
+
+    source_classes = list(Class.objects.filter(academic_year=source).order_by('level', 'name'))
+    unmapped = {c.level for c in source_classes} - set(level_map)
+    if unmapped:
+        raise ValueError(f"No promotion rule for level(s): {', '.join(sorted(unmapped))}.")
+
+    result = None
+    try:
+        with transaction.atomic():
+            # Lock the source year so concurrent rollovers of it run one after the other.
+            AcademicYear.objects.select_for_update().filter(pk=source.pk).exists()
+            if AcademicYear.objects.filter(start_date__year=start_date.year).exists():
+                raise ValueError(f"An academic year starting in {start_date.year} already exists.")
+            academic_year = AcademicYear.objects.create(
+                start_date=start_date, end_date=end_date, is_current=make_current
+            )
+
+            source_periods = list(Period.objects.filter(academic_year=source))
+            periods = Period.objects.bulk_create([
+                Period(
+                    name=period.name,
+                    academic_year=academic_year,
+                    start_date=period.start_date + shift,
+                    end_date=period.end_date + shift,
+                )
+                for period in source_periods
+            ])
+            period_map = {old.pk: new for old, new in zip(source_periods, periods)}
+
+            classes = Class.objects.bulk_create([
+                Class(
+                    name=student_class.name,
+                    level=student_class.level,
+                    academic_year=academic_year,
+                    max_students=student_class.max_students,
+                )
+                for student_class in source_classes
+            ])
+            class_map = {old.pk: new for old, new in zip(source_classes, classes)}
+
+            class_subjects = ClassSubject.objects.bulk_create([
+                ClassSubject(
+                    student_class=class_map[class_subject.student_class_id],
+                    subject_id=class_subject.subject_id,
+                    teacher_id=class_subject.teacher_id,
+                    period=period_map.get(class_subject.period_id),
+                    is_active=class_subject.is_active,
+                )
+                for class_subject in ClassSubject.objects.filter(student_class__academic_year=source)
+            ])
+
+            by_level = _group(classes)
+            promotion = {}
+            for level, level_classes in _group(source_classes).items():
+                next_level = level_map[level]
+                if next_level is None:
+                    continue
+                targets = by_level.get(next_level)
+                if not targets:
+                    raise ValueError(f"Level {level} is promoted to {next_level}, which has no class.")
+                for index, student_class in enumerate(level_classes):
+                    promotion[student_class.pk] = targets[index % len(targets)]
+
+            enrollments = Enrollment.objects.filter(academic_year=source, status='active').order_by().values_list(
+                'pk', 'student_id', 'student_class_id'
+            )
+            graduated = []
+            completed = []
+            promoted = []
+            for pk, student_id, class_id in enrollments:
+                if class_id in promotion:
+                    completed.append(pk)
+                    promoted.append(Enrollment(
+                        student_id=student_id,
+                        student_class=promotion[class_id],
+                        academic_year=academic_year,
+                        date_enrolled=start_date,
+                    ))
+                else:
+                    graduated.append(pk)
+
+            sizes = Counter(enrollment.student_class.pk for enrollment in promoted)
+            overfilled = [c.name for c in classes if sizes[c.pk] > c.max_students]
+            if overfilled:
+                raise ValueError(f"Promotion would overfill class(es): {', '.join(overfilled)}.")
+
+            Enrollment.objects.bulk_create(promoted)
+            # update() skips the Enrollment signals: counters and caches are refreshed explicitly.
+            Enrollment.objects.filter(pk__in=graduated).update(status='graduated', updated_at=Now())
+            Enrollment.objects.filter(pk__in=completed).update(status='completed', updated_at=Now())
+            Class.objects.filter(pk__in=[c.pk for c in source_classes + classes]).refresh_enrollment_counts()
+
+            result = RolloverResult(
+                academic_year, len(periods), len(classes), len(class_subjects), len(promoted), len(graduated)
+            )
+            if dry_run:
+                raise Rollback
+    except Rollback:
+        return result
+
+    for name in ('class', 'enrollment'):
+        SOURCES[name].invalidate()
+    for reference in (ACADEMIC_YEARS, PERIODS, CLASSES, CLASS_SUBJECTS):
+        reference.invalidate()
+    bump_version(RANKINGS_NAMESPACE)
+    return result
+
+
+def _group(classes):
+    grouped = defaultdict(list)
+    for student_class in classes:
+        grouped[student_class.level].append(student_class)
+    return grouped
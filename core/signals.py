@@ -0,0 +1,187 @@
+import threading
+from functools import partial
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.functions import Now
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .attendance import refresh_rollups
+from .autocomplete import SOURCES
+from .cache import bump_version
+from .models import (
+    AcademicYear, Period, Class, ClassSubject, Enrollment, Attendance, ClassAttendanceRollup,
+    EnrollmentSubjectPeriodSummary, Grade, Student, Subject, Teacher, RANKINGS_NAMESPACE
+)
+from .portal import forget_owner, touch_grades, touch_subjects
+from .reference import ACADEMIC_YEARS, PERIODS, SUBJECTS, CLASSES, CLASS_SUBJECTS
+
+
+@receiver(post_delete, sender=Enrollment)
+def release_enrollment_seat(sender, instance, **kwargs):
+    seat = getattr(instance, '_held_seat', instance.seat)
+    if seat is not None:
+        Class.objects.release_seat(seat)
+
+
+_pending = threading.local()
+
+
+def refresh_on_commit(name, keys, refresh):
+    """
+    Queue `keys` under `name` and pass every key queued in the transaction to `refresh` once
+    it commits (right away in autocommit mode), so a cascade delete or a loop of saves sending
+    one signal per row costs one refresh per transaction. Keys queued by a transaction that
+    rolls back are refreshed with the next one, which is harmless since refreshes recompute
+    from the source rows.
+    """
+    batches = _pending.__dict__.setdefault('batches', {})
+    batches.setdefault(name, set()).update(keys)
+
+    def flush():
+        queued = batches.pop(name, None)
+        if queued:
+            refresh(queued)
+
+    transaction.on_commit(flush)
+
+
+def refresh_summaries(keys):
+    EnrollmentSubjectPeriodSummary.objects.refresh(keys)
+    touch_grades({enrollment_id for enrollment_id, _, _ in keys})
+
+
+@receiver(post_save, sender=Grade)
+def refresh_summary_on_save(sender, instance, **kwargs):
+    keys = {instance.summary_key, getattr(instance, '_loaded_summary_key', instance.summary_key)}
+    refresh_on_commit('summaries', keys, refresh_summaries)
+    instance._loaded_summary_key = instance.summary_key
+
+
+@receiver(post_delete, sender=Grade)
+def refresh_summary_on_delete(sender, instance, **kwargs):
+    refresh_on_commit(
+        'summaries', {getattr(instance, '_loaded_summary_key', instance.summary_key)}, refresh_summaries
+    )
+
+
+@receiver(post_save, sender=Attendance)
+def refresh_rollups_on_save(sender, instance, **kwargs):
+    keys = {instance.rollup_key, getattr(instance, '_loaded_rollup_key', instance.rollup_key)}
+    refresh_on_commit('rollups', keys, refresh_rollups)
+    instance._loaded_rollup_key = instance.rollup_key
+
+
+@receiver(post_delete, sender=Attendance)
+def refresh_rollups_on_delete(sender, instance, **kwargs):
+    refresh_on_commit('rollups', {getattr(instance, '_loaded_rollup_key', instance.rollup_key)}, refresh_rollups)
+
+
+def refresh_class_rollups(enrollment, class_ids):
+    """Queue a refresh of the class rollups of `class_ids` on every day `enrollment` has attendance."""
+    dates = set(Attendance.objects.filter(enrollment=enrollment).order_by().values_list('date', flat=True))
+    refresh_on_commit(
+        'class_rollups',
+        {(class_id, date) for class_id in class_ids for date in dates},
+        ClassAttendanceRollup.objects.refresh
+    )
+
+
+@receiver(pre_delete, sender=Enrollment)
+def refresh_class_rollups_on_delete(sender, instance, **kwargs):
+    # Once the enrollment is gone its attendance keys no longer lead to its class.
+    refresh_class_rollups(instance, [instance.student_class_id])
+
+
+@receiver(post_save, sender=Enrollment)
+def refresh_class_rollups_on_move(sender, instance, **kwargs):
+    loaded_class_id = getattr(instance, '_loaded_class_id', instance.student_class_id)
+    if loaded_class_id != instance.student_class_id:
+        refresh_class_rollups(instance, [loaded_class_id, instance.student_class_id])
+    instance._loaded_class_id = instance.student_class_id
+
+
+@receiver(post_save, sender=Enrollment)
+@receiver(post_delete, sender=Enrollment)
+@receiver(post_save, sender=Subject)
+def invalidate_rankings(sender, **kwargs):
+    transaction.on_commit(partial(bump_version, RANKINGS_NAMESPACE))
+
+
+@receiver(post_save, sender=Enrollment)
+@receiver(post_delete, sender=Enrollment)
+def forget_enrollment_owner(sender, instance, **kwargs):
+    transaction.on_commit(partial(forget_owner, instance.pk))
+
+
+@receiver(post_save, sender=Student)
+def forget_student_owner(sender, instance, created=False, **kwargs):
+    # The portal caches the user owning each enrollment: a student handed to another user
+    # must not stay visible to the previous one. Deleted students take their enrollments along.
+    if not created and getattr(instance, '_loaded_user_id', None) != instance.user_id:
+        for enrollment_id in Enrollment.objects.filter(student=instance).values_list('pk', flat=True):
+            transaction.on_commit(partial(forget_owner, enrollment_id))
+    instance._loaded_user_id = instance.user_id
+
+
+@receiver(post_save, sender=Subject)
+@receiver(post_delete, sender=Subject)
+def touch_portal_subjects(sender, **kwargs):
+    touch_subjects()
+
+
+@receiver(post_save, sender=User)
+def touch_user_profiles(sender, instance, created=False, update_fields=None, **kwargs):
+    """
+    Students and teachers are shown with their user's name and email, so a user change
+    bumps their updated_at, which conditional detail views and fragment keys are built from.
+    """
+    if created or (update_fields is not None and set(update_fields) <= {'last_login'}):
+        return
+    for model in (Student, Teacher):
+        model.objects.filter(user=instance).update(updated_at=Now())
+
+
+AUTOCOMPLETE_DEPENDENCIES = {
+    Enrollment: ['enrollment'],
+    Student: ['enrollment', 'student'],
+    User: ['enrollment', 'student'],
+    Class: ['enrollment', 'class'],
+    Subject: ['subject'],
+}
+
+
+def invalidate_autocomplete(sender, update_fields=None, **kwargs):
+    if update_fields is not None and set(update_fields) <= {'last_login', 'enrolled_count'}:
+        return
+    for name in AUTOCOMPLETE_DEPENDENCIES[sender]:
+        SOURCES[name].invalidate()
+
+
+for model in AUTOCOMPLETE_DEPENDENCIES:
+    post_save.connect(invalidate_autocomplete, sender=model, dispatch_uid=f'autocomplete_save_{model.__name__}')
+    post_delete.connect(invalidate_autocomplete, sender=model, dispatch_uid=f'autocomplete_delete_{model.__name__}')
+
+
+REFERENCE_DEPENDENCIES = {
+    AcademicYear: [ACADEMIC_YEARS],
+    # Deleting a period sets the period of its class subjects to NULL without signals.
+    Period: [PERIODS, CLASS_SUBJECTS],
+    Subject: [SUBJECTS],
+    Class: [CLASSES],
+    ClassSubject: [CLASS_SUBJECTS],
+}
+
+
+def invalidate_reference(sender, update_fields=None, **kwargs):
+    if update_fields is not None and set(update_fields) <= {'enrolled_count'}:
+        return
+    # After the commit, so that a concurrent read of the old rows cannot be cached under the new version.
+    for reference in REFERENCE_DEPENDENCIES[sender]:
+        transaction.on_commit(reference.invalidate)
+
+
+for model in REFERENCE_DEPENDENCIES:
+    post_save.connect(invalidate_reference, sender=model, dispatch_uid=f'reference_save_{model.__name__}')
+    post_delete.connect(invalidate_reference, sender=model, dispatch_uid=f'reference_delete_{model.__name__}')
@@ -0,0 +1,36 @@
+(function () {
+    function attach(select) {
+        var search = document.createElement('input');
+        search.type = 'search';
+        search.className = 'form-control mb-1';
+        search.placeholder = 'Search…';
+        select.parentNode.insertBefore(search, select);
+
+        var timer = null;
+        search.addEventListener('input', function () {
+            clearTimeout(timer);
+            timer = setTimeout(function () {
+                var url = select.dataset.autocompleteUrl + '?term=' + encodeURIComponent(search.value);
+                fetch(url, {headers: {'Accept': 'application/json'}})
+                    .then(function (response) { return response.json(); })
+                    .then(function (data) {
+                        var current = select.value;
+                        Array.from(select.options).forEach(function (option) {
+                            if (option.value && option.value !== current) {
+                                select.removeChild(option);
+                            }
+                        });
+                        data.results.forEach(function (result) {
+                            if (String(result.id) !== current) {
+                                select.appendChild(new Option(result.label, result.id));
+                            }
+                        });
+                    });
+            }, 250);
+        });
+    }
+
+    document.addEventListener('DOMContentLoaded', function () {
+        document.querySelectorAll('select[data-autocomplete-url]').forEach(attach);
+    });
+})();
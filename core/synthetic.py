@@ -0,0 +1,177 @@
+import datetime
+import random
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+
+from .attendance import rebuild_rollups
+from .models import (
+    AcademicYear, Period, Class, Teacher, Student, Subject,
+    ClassSubject, Enrollment, EnrollmentSubjectPeriodSummary, Attendance, Grade
+)
+from .reference import ACADEMIC_YEARS, PERIODS, SUBJECTS, CLASSES, CLASS_SUBJECTS
+
+
+FIRST_NAMES = [
+    'Alice', 'Bruno', 'Chloe', 'David', 'Emma', 'Fatou', 'Gabriel', 'Hugo', 'Ines', 'Jules',
+    'Karim', 'Lea', 'Mamadou', 'Nina', 'Oscar', 'Paul', 'Quentin', 'Rose', 'Sarah', 'Theo',
+]
+LAST_NAMES = [
+    'Martin', 'Bernard', 'Diallo', 'Dubois', 'Durand', 'Leroy', 'Moreau', 'Simon', 'Laurent', 'Michel',
+    'Garcia', 'Ndiaye', 'Roux', 'Fournier', 'Girard', 'Bonnet', 'Dupont', 'Lambert', 'Fontaine', 'Rousseau',
+]
+ATTENDANCE_STATUSES = ['present', 'absent', 'late', 'excused']
+ATTENDANCE_WEIGHTS = [90, 5, 3, 2]
+# A fixed default rather than today's date, so that a seed always gives the same dataset.
+START_YEAR = 2024
+
+
+def _batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def _school_days(start_date, end_date, count):
+    day = start_date
+    while count and day < end_date:
+        if day.weekday() < 5:
+            yield day
+            count -= 1
+        day += datetime.timedelta(days=1)
+
+
+def generate_school(years=1, periods=3, levels=4, classes_per_level=3, students_per_class=30,
+                    subjects=8, grades_per_subject=4, attendance_days=20, start_year=START_YEAR,
+                    prefix='synthetic', seed=0, batch_size=5000, log=None):
+    """
+    Insert a reproducible synthetic school with bulk inserts and return the number of rows
+    created per model. The same `seed` and arguments always produce the same data. The first
+    academic year starts in September of `start_year`.
+
+    Every academic year gets `periods` periods, `levels` x `classes_per_level` classes
+    and one enrollment per student. Each enrollment gets `grades_per_subject` grades per
+    subject and period. Each class gets one attendance row per enrollment on each of
+    `attendance_days` school days per period, for the subject of the day.
+    """
+    rng = random.Random(seed)
+    log = log or (lambda message: None)
+    counts = {}
+
+    def insert(model, objects, keep=True):
+        # Grades and attendance are not kept (keep=False), so memory does not grow with them.
+        created = []
+        for batch in _batched(objects, batch_size):
+            batch = model.objects.bulk_create(batch, batch_size=batch_size)
+            counts[model.__name__] = counts.get(model.__name__, 0) + len(batch)
+            if keep:
+                created.extend(batch)
+        log(f"{model.__name__}: {counts.get(model.__name__, 0)}")
+        return created
+
+    def users(kind, count):
+        return insert(User, (
+            User(
+                username=f'{prefix}-{kind}-{index}',
+                first_name=rng.choice(FIRST_NAMES),
+                last_name=rng.choice(LAST_NAMES),
+                password=make_password(None),
+            )
+            for index in range(count)
+        ))
+
+    with transaction.atomic():
+        subject_rows = insert(Subject, (
+            Subject(name=f'{prefix} subject {index}', code=f'{prefix[:3].upper()}{index:04}',
+                    coefficient=rng.choice([1, 1, 2, 2, 3, 4]))
+            for index in range(subjects)
+        ))
+        teachers = insert(Teacher, (
+            Teacher(user=user, employee_id=f'{prefix[:10]}-T{index}', specialty=subject.name)
+            for index, (user, subject) in enumerate(zip(users('teacher', subjects), subject_rows))
+        ))
+
+        if years:
+            AcademicYear.objects.filter(is_current=True).update(is_current=False)
+        academic_years = insert(AcademicYear, (
+            AcademicYear(
+                start_date=datetime.date(start_year + offset, 9, 1),
+                end_date=datetime.date(start_year + offset + 1, 7, 1),
+                is_current=offset == years - 1,
+            )
+            for offset in range(years)
+        ))
+
+        students = insert(Student, (
+            Student(user=user, student_id=f'{prefix[:10]}-{index}')
+            for index, user in enumerate(users('student', levels * classes_per_level * students_per_class))
+        ))
+
+        for academic_year in academic_years:
+            length = (academic_year.end_date - academic_year.start_date).days // periods
+            year_periods = insert(Period, (
+                Period(
+                    name=f'Term {index + 1}',
+                    academic_year=academic_year,
+                    start_date=academic_year.start_date + datetime.timedelta(days=index * length),
+                    end_date=academic_year.start_date + datetime.timedelta(days=(index + 1) * length - 1),
+                    is_current=academic_year.is_current and index == 0,
+                )
+                for index in range(periods)
+            ))
+            classes = insert(Class, (
+                Class(name=f'{level + 1}{chr(65 + index)}', level=str(level + 1),
+                      academic_year=academic_year, max_students=students_per_class)
+                for level in range(levels)
+                for index in range(classes_per_level)
+            ))
+            insert(ClassSubject, (
+                ClassSubject(student_class=student_class, subject=subject, teacher=teacher)
+                for student_class in classes
+                for subject, teacher in zip(subject_rows, teachers)
+            ))
+            enrollments = insert(Enrollment, (
+                Enrollment(student=student, student_class=classes[index // students_per_class],
+                           academic_year=academic_year, date_enrolled=academic_year.start_date)
+                for index, student in enumerate(students)
+            ))
+            Class.objects.filter(pk__in=[c.pk for c in classes]).refresh_enrollment_counts()
+
+            insert(Grade, (
+                Grade(
+                    enrollment=enrollment,
+                    subject=subject,
+                    period=period,
+                    value=round(min(20.0, max(0.0, rng.gauss(12, 3.5))) * 2) / 2,
+                    max_value=20,
+                    grade_type=Grade.GRADE_TYPES[number % len(Grade.GRADE_TYPES)][0],
+                    date_graded=period.start_date + datetime.timedelta(days=7 * (number + 1)),
+                    coefficient=rng.choice([1, 1, 1, 2]),
+                )
+                for period in year_periods
+                for enrollment in enrollments
+                for subject in subject_rows
+                for number in range(grades_per_subject)
+            ), keep=False)
+            counts['EnrollmentSubjectPeriodSummary'] = counts.get('EnrollmentSubjectPeriodSummary', 0) + (
+                EnrollmentSubjectPeriodSummary.objects.rebuild(periods=year_periods, batch_size=batch_size)
+            )
+            insert(Attendance, (
+                Attendance(
+                    enrollment=enrollment,
+                    teacher=teachers[day.toordinal() % len(teachers)],
+                    subject=subject_rows[day.toordinal() % len(subject_rows)],
+                    date=day,
+                    status=rng.choices(ATTENDANCE_STATUSES, ATTENDANCE_WEIGHTS)[0],
+                )
+                for period in year_periods
+                for day in _school_days(period.start_date, period.end_date, attendance_days)
+                for enrollment in enrollments
+            ), keep=False)
+            for name, created in rebuild_rollups(academic_year.start_date, academic_year.end_date).items():
+                counts[name] = counts.get(name, 0) + created
+    for reference in (ACADEMIC_YEARS, PERIODS, SUBJECTS, CLASSES, CLASS_SUBJECTS):
+        reference.invalidate()
+    return counts
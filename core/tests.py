@@ -1,3 +1,1131 @@
-from django.test import TestCase
+import base64
+import csv
+import datetime
+import io
+import json
+import os
+import re
+import statistics
+import tempfile
+import threading
+import zipfile
+from contextlib import contextmanager
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import BadRequest, ValidationError
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection, models
+from django.db.migrations.executor import MigrationExecutor
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from .forms import (
+    StudentForm, SubjectForm, ClassSubjectForm, EnrollmentForm, AttendanceForm, GradeForm
+)
+from .attendance import chronic_absences, enrollment_rates, rebuild_rollups
+from .cache import bump_version
+from .grade_entry import ALREADY_GRADED
+from .imports import StudentImporter
+from .models import (
+    AcademicYear, Period, Class, Teacher, Student, Subject, ClassSubject, Enrollment, Grade, Attendance,
+    EnrollmentAttendanceRollup, ClassAttendanceRollup
+)
+from .middleware import RequestMetricsMiddleware
+from .rankings import rank_class
+from .reference import ReferenceCache, current_academic_year, local_cache
+from .report_card_batch import build_report_cards, render_report_cards, write_zip
+from .report_cards import compute_averages
+from .roll_call import NOT_ACTIVE, record_roll_call
+from .rollover import rollover_academic_year
+from .views import (
+    AcademicYearListView, PeriodListView, ClassListView, TeacherListView,
+    StudentListView, SubjectListView, ClassDetailView
+)
+
+
+class QueryBudgetMixin:
+    @contextmanager
+    def assertQueryBudget(self, budget):
+        with CaptureQueriesContext(connection) as context:
+            yield context
+        executed = [query['sql'] for query in context.captured_queries]
+        self.assertLessEqual(
+            len(executed), budget,
+            f"{len(executed)} queries executed, budget is {budget}:\n" + "\n".join(executed)
+        )
+
+
+class SchoolTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.year = AcademicYear.objects.create(
+            start_date=datetime.date(2025, 9, 1), end_date=datetime.date(2026, 7, 1), is_current=True
+        )
+        cls.period = Period.objects.create(
+            name="Term 1", academic_year=cls.year,
+            start_date=datetime.date(2025, 9, 1), end_date=datetime.date(2025, 12, 20), is_current=True
+        )
+        cls.classes = [
+            Class.objects.create(name=f"6{letter}", level="6", academic_year=cls.year)
+            for letter in "ABC"
+        ]
+        cls.teacher = Teacher.objects.create(
+            user=User.objects.create(username="teacher", first_name="Ada", last_name="Lovelace"),
+            employee_id="T1"
+        )
+        cls.subject = Subject.objects.create(name="Mathematics", code="MATH", coefficient=3, teacher=cls.teacher)
+        for student_class in cls.classes:
+            ClassSubject.objects.create(student_class=student_class, subject=cls.subject, teacher=cls.teacher)
+        cls.enrollments = []
+        for index in range(12):
+            student = Student.objects.create(
+                user=User.objects.create(username=f"student{index}", first_name="Student", last_name=f"{index:02}"),
+                student_id=f"S{index:03}",
+                student_class=cls.classes[index % 3]
+            )
+            cls.enrollments.append(Enrollment.objects.create(
+                student=student, student_class=cls.classes[index % 3], academic_year=cls.year
+            ))
+
+    def setUp(self):
+        # Cache invalidations run on commit, which never happens inside a test.
+        cache.clear()
+        local_cache.clear()
+
+
+class FetchPlanTests(QueryBudgetMixin, SchoolTestCase):
+    def render_list(self, view_class):
+        view = view_class()
+        view.setup(RequestFactory().get('/'))
+        _, page, object_list, _ = view.paginate_queryset(view.get_queryset(), view.paginate_by)
+        return [str(obj) for obj in object_list]
+
+    def test_list_views_render_each_row_without_extra_queries(self):
+        for view_class in (
+            AcademicYearListView, PeriodListView, ClassListView,
+            TeacherListView, StudentListView, SubjectListView
+        ):
+            with self.subTest(view=view_class.__name__), self.assertQueryBudget(1):
+                self.assertTrue(self.render_list(view_class))
+
+    def test_forms_render_choices_with_one_query_per_field(self):
+        budgets = {
+            StudentForm: 2,
+            SubjectForm: 1,
+            ClassSubjectForm: 2,
+            EnrollmentForm: 1,
+            AttendanceForm: 1,
+            GradeForm: 1,
+        }
+        for form_class, budget in budgets.items():
+            with self.subTest(form=form_class.__name__), self.assertQueryBudget(budget):
+                str(form_class())
+
+
+class KeysetPaginationTests(SchoolTestCase):
+    class TiedStudentListView(StudentListView):
+        # Every student has the same first name, so the order rests on the pk tie-breaker.
+        keyset_ordering = ['-user__first_name']
+        paginate_by = 5
+
+    def page(self, cursor=None):
+        view = self.TiedStudentListView()
+        view.setup(RequestFactory().get('/', {'cursor': cursor} if cursor else {}))
+        _, page, object_list, _ = view.paginate_queryset(view.get_queryset(), view.paginate_by)
+        return page, [student.student_id for student in object_list]
+
+    def test_cursors_walk_forward_and_back_through_ties(self):
+        expected = list(Student.objects.order_by('pk').values_list('student_id', flat=True))
+        pages = []
+        page, ids = self.page()
+        self.assertFalse(page.has_previous())
+        pages.append(ids)
+        while page.has_next():
+            page, ids = self.page(page.next_cursor)
+            pages.append(ids)
+        self.assertEqual([len(ids) for ids in pages], [5, 5, 2])
+        self.assertEqual(sum(pages, []), expected)
+
+        for previous in reversed(pages[:-1]):
+            page, ids = self.page(page.previous_cursor)
+            self.assertEqual(ids, previous)
+        self.assertFalse(page.has_previous())
+        self.assertTrue(page.has_next())
+
+    def test_tampered_cursor_is_a_bad_request(self):
+        cursor = self.page()[0].next_cursor
+        payload = json.loads(base64.urlsafe_b64decode(cursor))
+        for tampered in (
+            cursor[:-4],
+            base64.urlsafe_b64encode(json.dumps(['sideways', payload[1]]).encode()).decode(),
+            base64.urlsafe_b64encode(json.dumps(['next', payload[1][:1]]).encode()).decode(),
+            base64.urlsafe_b64encode(json.dumps(['next', [payload[1][0], 'not a pk']]).encode()).decode(),
+        ):
+            with self.subTest(cursor=tampered), self.assertRaises(BadRequest):
+                self.page(tampered)
+
+
+class ConditionalDetailTests(SchoolTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create(username="staff", is_staff=True)
+        self.student_class = self.classes[0]
+
+    def get(self, **headers):
+        request = RequestFactory().get('/', headers=headers)
+        request.user = self.user
+        return ClassDetailView.as_view()(request, pk=self.student_class.pk)
+
+    def test_matching_validators_are_not_modified(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.get(if_none_match=response['ETag']).status_code, 304)
+        self.assertEqual(self.get(if_modified_since=response['Last-Modified']).status_code, 304)
+
+    def test_changed_object_is_rendered_again(self):
+        response = self.get()
+        Class.objects.filter(pk=self.student_class.pk).update(
+            updated_at=timezone.now() + datetime.timedelta(minutes=1)
+        )
+        changed = self.get(if_none_match=response['ETag'])
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed['ETag'], response['ETag'])
+        self.assertEqual(self.get(if_modified_since=response['Last-Modified']).status_code, 200)
+
+    def test_dependent_rows_change_the_etag(self):
+        etag = self.get()['ETag']
+        Enrollment.objects.filter(pk=self.enrollments[0].pk).delete()
+        self.assertEqual(self.get(if_none_match=etag).status_code, 200)
+
+
+class QueryPlanTests(SchoolTestCase):
+    FULL_SCANS = {
+        # Any SCAN of a table that is not walking one of its indexes.
+        'sqlite': re.compile(r'\bSCAN (\w+)\b(?! USING (?:COVERING )?INDEX)'),
+        'postgresql': re.compile(r'Seq Scan on (\w+)'),
+    }
+
+    def assertUsesIndexes(self, queryset):
+        if connection.vendor not in self.FULL_SCANS:
+            self.skipTest(f"No plan check for {connection.vendor}")
+        if connection.vendor == 'postgresql':
+            # The test tables are tiny, so make the planner pick an index whenever one applies.
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        plan = queryset.explain()
+        self.assertFalse(self.FULL_SCANS[connection.vendor].findall(plan), f"Full table scan:\n{plan}")
+
+    def test_hot_paths_use_indexes(self):
+        student_class, enrollment = self.classes[0], self.enrollments[0]
+        start, end = self.period.start_date, self.period.end_date
+        querysets = {
+            'class roster': Enrollment.objects.filter(
+                student_class=student_class, academic_year=self.year, status='active'
+            ),
+            'active enrollments': Enrollment.objects.filter(student_class=student_class, status='active'),
+            'class subject': ClassSubject.objects.filter(
+                student_class=student_class, subject=self.subject
+            ).filter(models.Q(period__isnull=True) | models.Q(period=self.period)),
+            'grades': Grade.objects.filter(enrollment=enrollment, period=self.period),
+            'enrollment attendance': Attendance.objects.filter(enrollment=enrollment, date__range=(start, end)),
+            'subject attendance': Attendance.objects.filter(subject=self.subject, date__range=(start, end)),
+            'current year': AcademicYear.objects.filter(is_current=True).order_by(),
+            'current period': Period.objects.filter(academic_year=self.year, is_current=True).order_by(),
+            'student list': Student.objects.select_related('user').order_by(
+                'user__last_name', 'user__first_name', 'pk'
+            )[:25],
+        }
+        for name, queryset in querysets.items():
+            with self.subTest(query=name):
+                self.assertUsesIndexes(queryset)
+
+
+class ReportCardBatchTests(QueryBudgetMixin, SchoolTestCase):
+    def setUp(self):
+        super().setUp()
+        with self.captureOnCommitCallbacks(execute=True):
+            for index, enrollment in enumerate(self.enrollments):
+                Grade.objects.create(
+                    enrollment=enrollment, subject=self.subject, period=self.period, value=10 + index, max_value=20,
+                    grade_type='test', date_graded=datetime.date(2025, 10, 1),
+                    comment="Good work" if index == 0 else ""
+                )
+
+    def assertValidPDF(self, content):
+        self.assertTrue(content.startswith(b'%PDF-1.4'))
+        self.assertTrue(content.endswith(b'%EOF\n'))
+        xref = int(content.rsplit(b'startxref\n', 1)[1].split(b'\n')[0])
+        self.assertEqual(content[xref:xref + 4], b'xref')
+        offsets = re.findall(rb'(\d{10}) 00000 n ', content[xref:])
+        self.assertTrue(offsets)
+        for number, offset in enumerate(offsets, 1):
+            self.assertTrue(content[int(offset):].startswith(b'%d 0 obj' % number))
+
+    def test_cards_are_loaded_with_a_fixed_number_of_queries(self):
+        with self.assertQueryBudget(8):
+            cards = build_report_cards(self.period)
+        self.assertEqual(len(cards), len(self.enrollments))
+        first = next(card for card in cards if card.student_id == 'S000')
+        self.assertEqual(first.comments, [("Mathematics", "Good work")])
+        self.assertEqual(first.overall.size, 4)
+
+    def test_annual_ranking_skips_withdrawn_enrollments(self):
+        best = self.enrollments[9]
+        best.status = 'withdrawn'
+        best.save()
+        for scope in (self.year, self.period):
+            with self.subTest(scope=str(scope)):
+                cards = {card.student_id: card for card in build_report_cards(scope, [self.classes[0]])}
+                self.assertNotIn('S009', cards)
+                self.assertEqual(cards['S006'].overall.rank, 1)
+                self.assertEqual(cards['S006'].overall.size, 3)
+                self.assertEqual(cards['S000'].overall.rank, 3)
+
+    def test_zip_entries_are_valid_pdfs(self):
+        archive = io.BytesIO()
+        count = write_zip(render_report_cards(build_report_cards(self.period), workers=1), archive)
+        self.assertEqual(count, len(self.enrollments))
+        with zipfile.ZipFile(archive) as entries:
+            for name in entries.namelist():
+                self.assertValidPDF(entries.read(name))
+
+    def test_command_writes_one_file_per_student(self):
+        with tempfile.TemporaryDirectory() as directory:
+            call_command(
+                'generate_report_cards', '--period', str(self.period.pk), '--class', str(self.classes[0].pk),
+                '--output-dir', directory, '--workers', '1', stdout=io.StringIO()
+            )
+            files = [os.path.join(root, name) for root, _, names in os.walk(directory) for name in names]
+            self.assertEqual(len(files), 4)
+            for path in files:
+                with open(path, 'rb') as content:
+                    self.assertValidPDF(content.read())
+
+
+class GradeStatisticsTests(SchoolTestCase):
+    def setUp(self):
+        super().setUp()
+        self.later = Period.objects.create(
+            name="Term 2", academic_year=self.year,
+            start_date=datetime.date(2026, 1, 5), end_date=datetime.date(2026, 3, 31)
+        )
+        grades = [
+            # enrollment, period, value, max_value, coefficient, grade type
+            (0, self.period, 10, 20, 1, 'test'),
+            (0, self.period, 15, 20, 2, 'exam'),
+            (3, self.period, 8, 10, 1, 'test'),
+            (1, self.period, 12, 20, 1, 'test'),
+            (0, self.later, 2, 20, 1, 'test'),
+        ]
+        with self.captureOnCommitCallbacks(execute=True):
+            for index, period, value, max_value, coefficient, grade_type in grades:
+                Grade.objects.create(
+                    enrollment=self.enrollments[index], subject=self.subject, period=period, value=value,
+                    max_value=max_value, coefficient=coefficient, grade_type=grade_type,
+                    date_graded=period.start_date
+                )
+
+    def assertStatistics(self, row, values, average):
+        self.assertAlmostEqual(row['average'], average)
+        self.assertAlmostEqual(row['mean'], statistics.mean(values))
+        self.assertEqual((row['minimum'], row['maximum'], row['count']), (min(values), max(values), len(values)))
+        self.assertAlmostEqual(row['std_dev'], statistics.pstdev(values))
+
+    def test_class_averages_normalize_and_weight_grades(self):
+        rows = list(Grade.objects.class_averages(self.period))
+        self.assertEqual(
+            [(row['enrollment__student_class'], row['subject']) for row in rows],
+            [(self.classes[0].pk, self.subject.pk), (self.classes[1].pk, self.subject.pk)]
+        )
+        # 8/10 counts as 16/20; the exam weighs twice.
+        self.assertStatistics(rows[0], [10, 15, 16], (10 + 15 * 2 + 16) / 4)
+        self.assertStatistics(rows[1], [12], 12)
+
+    def test_subject_distribution_covers_one_period(self):
+        self.assertStatistics(
+            Grade.objects.subject_distribution(self.subject, self.period), [10, 15, 16, 12], (10 + 30 + 16 + 12) / 5
+        )
+        self.assertStatistics(Grade.objects.subject_distribution(self.subject, self.later), [2], 2)
+
+    def test_enrollment_averages_group_by_period(self):
+        rows = {
+            (row['enrollment'], row['period']): row
+            for row in Grade.objects.enrollment_averages()
+        }
+        self.assertEqual(len(rows), 4)
+        self.assertStatistics(rows[self.enrollments[0].pk, self.period.pk], [10, 15], (10 + 30) / 3)
+        self.assertStatistics(rows[self.enrollments[0].pk, self.later.pk], [2], 2)
+        self.assertStatistics(rows[self.enrollments[3].pk, self.period.pk], [16], 16)
+
+
+class GradeSummaryTests(QueryBudgetMixin, SchoolTestCase):
+    def setUp(self):
+        super().setUp()
+        self.science = Subject.objects.create(name="Science", code="SCI", coefficient=2, teacher=self.teacher)
+        with self.captureOnCommitCallbacks(execute=True):
+            for index, enrollment in enumerate(self.enrollments):
+                for subject, value in ((self.subject, 8 + index), (self.science, 15 - index)):
+                    for coefficient in (1, 2):
+                        Grade.objects.create(
+                            enrollment=enrollment, subject=subject, period=self.period, value=value + coefficient,
+                            max_value=20, coefficient=coefficient, grade_type='test',
+                            date_graded=datetime.date(2025, 10, coefficient)
+                        )
+
+    def assertSummariesMatchGrades(self):
+        for scope in (self.period, self.year):
+            self.assertEqual(compute_averages(scope), compute_averages(scope, from_grades=True))
+
+    def test_summaries_follow_grade_changes(self):
+        self.assertSummariesMatchGrades()
+        with self.captureOnCommitCallbacks(execute=True):
+            grade = Grade.objects.filter(enrollment=self.enrollments[0], subject=self.subject).first()
+            grade.value = 20
+            grade.save()
+            grade = Grade.objects.filter(enrollment=self.enrollments[1], subject=self.science).first()
+            grade.subject = self.subject
+            grade.grade_type = 'quiz'
+            grade.save()
+            Grade.objects.filter(enrollment=self.enrollments[2]).first().delete()
+        self.assertSummariesMatchGrades()
+
+    def test_cascade_delete_refreshes_summaries_once(self):
+        counts = []
+        for enrollment in self.enrollments[:2]:
+            with self.captureOnCommitCallbacks(execute=True):
+                for value in range(10 * len(counts)):
+                    Grade.objects.create(
+                        enrollment=enrollment, subject=self.subject, period=self.period, value=value, max_value=20,
+                        grade_type='quiz', date_graded=datetime.date(2025, 10, 1) + datetime.timedelta(days=value)
+                    )
+            with CaptureQueriesContext(connection) as context:
+                with self.captureOnCommitCallbacks(execute=True):
+                    enrollment.delete()
+            counts.append(len(context.captured_queries))
+        self.assertEqual(counts[0], counts[1])
+        self.assertSummariesMatchGrades()
+
+
+class AttendanceRollupTests(SchoolTestCase):
+    STATUSES = ['present', 'absent', 'late', 'excused', 'present']
+
+    def setUp(self):
+        super().setUp()
+        with self.captureOnCommitCallbacks(execute=True):
+            for index, enrollment in enumerate(self.enrollments):
+                for day in range(10):
+                    Attendance.objects.create(
+                        enrollment=enrollment, subject=self.subject, teacher=self.teacher,
+                        date=datetime.date(2025, 9, 1) + datetime.timedelta(days=day),
+                        status=self.STATUSES[(index + day) % len(self.STATUSES)]
+                    )
+
+    def rollups(self):
+        return {
+            model.__name__: sorted(model.objects.values_list(
+                model.owner_field, 'granularity', 'bucket', 'present', 'absent', 'late', 'excused'
+            ))
+            for model in (EnrollmentAttendanceRollup, ClassAttendanceRollup)
+        }
+
+    def assertRollupsMatchAttendance(self):
+        rollups = self.rollups()
+        rebuild_rollups()
+        self.assertEqual(rollups, self.rollups())
+
+    def test_rollups_follow_attendance_changes(self):
+        self.assertRollupsMatchAttendance()
+        with self.captureOnCommitCallbacks(execute=True):
+            attendance = Attendance.objects.filter(enrollment=self.enrollments[0]).first()
+            attendance.status = 'absent'
+            attendance.date = datetime.date(2025, 9, 20)
+            attendance.save()
+            Attendance.objects.filter(enrollment=self.enrollments[1]).first().delete()
+        self.assertRollupsMatchAttendance()
+
+    def test_moved_enrollment_is_counted_in_its_new_class(self):
+        enrollment = self.enrollments[0]
+        with self.captureOnCommitCallbacks(execute=True):
+            enrollment.student_class = self.classes[1]
+            enrollment.save()
+        self.assertRollupsMatchAttendance()
+        totals = ClassAttendanceRollup.objects.filter(granularity='week').values_list('student_class').annotate(
+            total=models.Sum(models.F('present') + models.F('absent') + models.F('late') + models.F('excused'))
+        )
+        self.assertEqual(dict(totals), {self.classes[0].pk: 30, self.classes[1].pk: 50, self.classes[2].pk: 40})
+
+    def test_deleted_enrollment_leaves_its_class_rollups(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.enrollments[0].delete()
+        self.assertRollupsMatchAttendance()
+
+    def test_heatmap_is_read_from_the_class_rollups(self):
+        url = f'/classes/{self.classes[0].pk}/attendance/heatmap/'
+        query = {'start_date': '2025-09-01', 'end_date': '2025-09-30', 'granularity': 'week'}
+        self.client.force_login(self.enrollments[0].student.user)
+        self.assertEqual(self.client.get(url, query).status_code, 302)
+        self.client.force_login(User.objects.create(username="staff", is_staff=True))
+        buckets = self.client.get(url, query).json()['buckets']
+        self.assertEqual([bucket['bucket'] for bucket in buckets], ['2025-09-01', '2025-09-08'])
+        self.assertEqual(sum(bucket['present'] for bucket in buckets), 16)
+        response = self.client.get(url, {'start_date': '2025-09-30', 'end_date': '2025-09-01'})
+        self.assertEqual(response.status_code, 400)
+
+    async def test_calendar_is_read_from_the_enrollment_rollups(self):
+        enrollment = self.enrollments[0]
+        await self.async_client.aforce_login(await User.objects.aget(pk=enrollment.student.user_id))
+        response = await self.async_client.get(
+            f'/portal/enrollments/{enrollment.pk}/attendance/calendar/',
+            {'start_date': '2025-09-01', 'end_date': '2025-09-05'}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [(bucket['bucket'], bucket['present'], bucket['absent']) for bucket in response.json()['buckets']],
+            [('2025-09-01', 1, 0), ('2025-09-02', 0, 1), ('2025-09-03', 0, 0), ('2025-09-04', 0, 0),
+             ('2025-09-05', 1, 0)]
+        )
+
+
+class AbsenceRateTests(SchoolTestCase):
+    def setUp(self):
+        super().setUp()
+        sessions = {
+            0: ['absent', 'excused', 'late'] + ['present'] * 7,
+            1: ['absent'] + ['present'] * 9,
+            2: ['absent'] * 5 + ['present'] * 4,
+        }
+        Attendance.objects.bulk_create([
+            Attendance(
+                enrollment=self.enrollments[index], subject=self.subject, teacher=self.teacher,
+                date=datetime.date(2025, 10, 1) + datetime.timedelta(days=day), status=status
+            )
+            for index, statuses in sessions.items()
+            for day, status in enumerate(statuses)
+        ] + [
+            # After the period, so it is not counted.
+            Attendance(
+                enrollment=self.enrollments[1], subject=self.subject, teacher=self.teacher,
+                date=datetime.date(2026, 1, 10), status='absent'
+            )
+        ])
+
+    def test_rates_count_sessions_in_the_period(self):
+        rates = {row['enrollment']: row for row in enrollment_rates(self.period)}
+        first = rates[self.enrollments[0].pk]
+        self.assertEqual(
+            (first['total'], first['present'], first['absent'], first['excused'], first['late']), (10, 7, 1, 1, 1)
+        )
+        self.assertEqual(
+            (first['absence_rate'], first['unexcused_rate'], first['lateness_rate']), (20.0, 10.0, 10.0)
+        )
+        second = rates[self.enrollments[1].pk]
+        self.assertEqual((second['total'], second['absence_rate']), (10, 10.0))
+
+    def test_threshold_is_inclusive(self):
+        def flagged(threshold, min_sessions=10):
+            return [row['enrollment'] for row in chronic_absences(self.period, threshold, min_sessions)]
+
+        self.assertEqual(flagged(10), [self.enrollments[0].pk, self.enrollments[1].pk])
+        self.assertEqual(flagged(10.01), [self.enrollments[0].pk])
+        # Nine sessions are too few to flag, however many are missed.
+        self.assertEqual(flagged(10, min_sessions=9)[0], self.enrollments[2].pk)
+
+    @override_settings(CHRONIC_ABSENCE_THRESHOLD=20, CHRONIC_ABSENCE_MIN_SESSIONS=10)
+    def test_command_reports_flagged_students(self):
+        output = io.StringIO()
+        call_command('flag_chronic_absences', '--json', stdout=output)
+        report = json.loads(output.getvalue())
+        self.assertEqual(report['period'], self.period.pk)
+        self.assertEqual([row['enrollment__student__student_id'] for row in report['students']], ["S000"])
+
+
+class CurrentFlagTests(SchoolTestCase):
+    def test_saving_a_current_year_hands_the_flag_over(self):
+        AcademicYear.objects.create(
+            start_date=datetime.date(2026, 9, 1), end_date=datetime.date(2027, 7, 1), is_current=True
+        )
+        self.assertEqual(AcademicYear.objects.filter(is_current=True).count(), 1)
+        self.assertEqual(current_academic_year().start_date, datetime.date(2026, 9, 1))
+        self.year.refresh_from_db()
+        self.assertFalse(self.year.is_current)
+
+    def test_saving_a_current_period_hands_the_flag_over_within_its_year(self):
+        next_year = AcademicYear.objects.create(
+            start_date=datetime.date(2026, 9, 1), end_date=datetime.date(2027, 7, 1)
+        )
+        other = Period.objects.create(
+            name="Term 1", academic_year=next_year, is_current=True,
+            start_date=datetime.date(2026, 9, 1), end_date=datetime.date(2026, 12, 20)
+        )
+        second = Period.objects.create(
+            name="Term 2", academic_year=self.year, is_current=True,
+            start_date=datetime.date(2026, 1, 5), end_date=datetime.date(2026, 3, 31)
+        )
+        self.assertEqual(
+            set(Period.objects.filter(is_current=True).values_list('pk', flat=True)), {other.pk, second.pk}
+        )
+        self.assertEqual(Period.objects.current(), second)
+
+
+class CurrentFlagMigrationTests(TransactionTestCase):
+    before = [('core', '0006_enrollmentsubjectperiodsummary')]
+    after = [('core', '0007_current_pointer_constraints')]
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_migration_keeps_the_latest_current_rows(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.before)
+        apps = executor.loader.project_state(self.before).apps
+        AcademicYear = apps.get_model('core', 'AcademicYear')
+        Period = apps.get_model('core', 'Period')
+        years = [
+            AcademicYear.objects.create(
+                start_date=datetime.date(start, 9, 1), end_date=datetime.date(start + 1, 7, 1), is_current=True
+            )
+            for start in (2024, 2025)
+        ]
+        periods = [
+            Period.objects.create(
+                name=f"Term {month}", academic_year=academic_year, is_current=True,
+                start_date=datetime.date(academic_year.start_date.year, month, 1),
+                end_date=datetime.date(academic_year.start_date.year, month, 28),
+            )
+            for academic_year in years
+            for month in (9, 10)
+        ]
+
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.after)
+        self.assertEqual(list(AcademicYear.objects.filter(is_current=True)), [years[1]])
+        self.assertEqual(list(Period.objects.filter(is_current=True).order_by('pk')), [periods[1], periods[3]])
+
+
+class GradeFormTests(SchoolTestCase):
+    def form(self, subject, period):
+        return GradeForm({
+            'enrollment': self.enrollments[0].pk, 'subject': subject.pk, 'period': period.pk, 'value': 12,
+            'max_value': 20, 'grade_type': 'test', 'date_graded': '2025-10-01', 'coefficient': 1
+        })
+
+    def test_subject_must_be_taught_in_the_period(self):
+        science = Subject.objects.create(name="Science", code="SCI", coefficient=2, teacher=self.teacher)
+        term2 = Period.objects.create(
+            name="Term 2", academic_year=self.year,
+            start_date=datetime.date(2026, 1, 5), end_date=datetime.date(2026, 3, 31)
+        )
+        ClassSubject.objects.create(student_class=self.classes[0], subject=science, teacher=self.teacher, period=term2)
+        self.assertTrue(self.form(self.subject, self.period).is_valid())
+        self.assertTrue(self.form(science, term2).is_valid())
+        form = self.form(science, self.period)
+        self.assertFalse(form.is_valid())
+        self.assertEqual(form.non_field_errors(), ["This subject is not assigned to the class for this period."])
+        # The class subject of a deleted period is left for every period.
+        with self.captureOnCommitCallbacks(execute=True):
+            term2.delete()
+        self.assertTrue(self.form(science, self.period).is_valid())
+
+    def test_model_validation_and_roll_call_check_the_assignment(self):
+        science = Subject.objects.create(name="Science", code="SCI", coefficient=2, teacher=self.teacher)
+        grade = Grade(
+            enrollment=self.enrollments[0], subject=science, period=self.period, value=12, max_value=20,
+            grade_type='test', date_graded=datetime.date(2025, 10, 1)
+        )
+        with self.assertRaisesMessage(ValidationError, "This subject is not assigned to the class for this period."):
+            grade.full_clean()
+        with self.assertRaisesMessage(ValidationError, "This subject is not assigned to the class on this date."):
+            record_roll_call(
+                self.classes[0], science, datetime.date(2025, 10, 1),
+                [{'enrollment': self.enrollments[0].pk, 'status': 'present'}]
+            )
+
+
+class ReferenceInvalidationTests(SchoolTestCase):
+    def test_reference_caches_are_invalidated_on_commit(self):
+        self.assertEqual(current_academic_year(), self.year)
+        with self.captureOnCommitCallbacks(execute=True):
+            next_year = AcademicYear.objects.create(
+                start_date=datetime.date(2026, 9, 1), end_date=datetime.date(2027, 7, 1), is_current=True
+            )
+            # Reads made before the commit are cached under the version the commit bumps.
+            self.assertEqual(current_academic_year(), self.year)
+        self.assertEqual(current_academic_year(), next_year)
+
+
+class ReferenceCacheTests(SimpleTestCase):
+    def test_version_is_checked_once_per_ttl(self):
+        reference = ReferenceCache('test')
+        loads = []
+
+        def load():
+            loads.append(None)
+            return len(loads)
+
+        self.assertEqual(reference.get('key', load), 1)
+        # Another process invalidates the table: this one notices once its version expires.
+        bump_version(reference.namespace)
+        with override_settings(REFERENCE_VERSION_TTL=60):
+            self.assertEqual(reference.get('key', load), 1)
+        with override_settings(REFERENCE_VERSION_TTL=0):
+            self.assertEqual(reference.get('key', load), 2)
+        reference.invalidate()
+        self.assertEqual(reference.get('key', load), 3)
+
+
+class GradeBulkEntryTests(SchoolTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(User.objects.create(username="staff", is_staff=True))
+        self.roster = [enrollment for enrollment in self.enrollments if enrollment.student_class_id == self.classes[0].pk]
+
+    def post(self, values, max_value=20):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post('/grades/bulk/', {
+                'student_class': self.classes[0].pk, 'subject': self.subject.pk, 'period': self.period.pk,
+                'date_graded': '2025-10-01', 'grade_type': 'test', 'max_value': max_value, 'coefficient': 1,
+                'grades': [{'enrollment': enrollment.pk, 'value': value} for enrollment, value in zip(self.roster, values)],
+            }, content_type='application/json')
+
+    def test_sheet_is_saved_with_its_summaries_and_rankings(self):
+        self.assertEqual(rank_class(self.classes[0], self.period).overall, {})
+        response = self.post([12, 15, 9, 15])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json(), {'created': 4})
+        self.assertEqual(
+            sorted(Grade.objects.filter(enrollment__in=self.roster).values_list('value', flat=True)), [9, 12, 15, 15]
+        )
+        self.assertEqual(compute_averages(self.period), compute_averages(self.period, from_grades=True))
+        overall = rank_class(self.classes[0], self.period).overall
+        self.assertEqual([overall[enrollment.pk].rank for enrollment in self.roster], [3, 1, 4, 1])
+
+    def test_resubmitted_sheet_reports_every_row_as_already_graded(self):
+        self.post([12, 15, 9, 15])
+        response = self.post([13, 16, 10, 16])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['row_errors'], {str(index): [ALREADY_GRADED] for index in range(4)})
+        self.assertEqual(Grade.objects.count(), 4)
+
+    def test_value_above_the_maximum_rejects_the_sheet(self):
+        response = self.post([8, 12, 9, 10], max_value=10)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['row_errors'], {'1': ["The grade cannot exceed the maximum grade."]})
+        self.assertFalse(Grade.objects.exists())
+
+    def test_entry_is_staff_only(self):
+        self.client.logout()
+        self.assertEqual(self.post([12, 15, 9, 15]).status_code, 302)
+        self.assertFalse(Grade.objects.exists())
+
+
+class RollCallTests(SchoolTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(User.objects.create(username="staff", is_staff=True))
+        self.roster = [enrollment for enrollment in self.enrollments if enrollment.student_class_id == self.classes[0].pk]
+
+    def post(self, rows):
+        return self.client.post('/attendance/roll-call/', {
+            'student_class': self.classes[0].pk, 'subject': self.subject.pk, 'date': '2025-10-01',
+            'teacher': self.teacher.pk, 'attendances': rows,
+        }, content_type='application/json')
+
+    def rollup(self):
+        return ClassAttendanceRollup.objects.filter(student_class=self.classes[0], granularity='day').values(
+            'present', 'absent', 'late', 'excused'
+        ).get()
+
+    def test_resubmitted_roll_call_updates_the_records(self):
+        response = self.post([{'enrollment': enrollment.pk, 'status': 'present'} for enrollment in self.roster])
+        self.assertEqual(response.json(), {'saved': 4})
+        self.assertEqual(self.rollup(), {'present': 4, 'absent': 0, 'late': 0, 'excused': 0})
+        response = self.post([
+            {'enrollment': self.roster[0].pk, 'status': 'absent', 'reason': "Sick"},
+            {'enrollment': self.roster[1].pk, 'status': 'late'},
+        ])
+        self.assertEqual(response.json(), {'saved': 2})
+        self.assertEqual(Attendance.objects.count(), 4)
+        self.assertEqual(Attendance.objects.get(enrollment=self.roster[0]).reason, "Sick")
+        self.assertEqual(self.rollup(), {'present': 2, 'absent': 1, 'late': 1, 'excused': 0})
+        self.assertEqual(
+            EnrollmentAttendanceRollup.objects.get(enrollment=self.roster[1], granularity='week').late, 1
+        )
+
+    def test_enrollment_of_another_class_rejects_the_roll_call(self):
+        response = self.post([
+            {'enrollment': self.roster[0].pk, 'status': 'present'},
+            {'enrollment': self.enrollments[1].pk, 'status': 'present'},
+        ])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['row_errors'], {'1': [NOT_ACTIVE]})
+        self.assertFalse(Attendance.objects.exists())
+        self.assertFalse(ClassAttendanceRollup.objects.exists())
+
+
+class RolloverTests(SchoolTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.final_class = Class.objects.create(name="5A", level="5", academic_year=cls.year)
+        for index in range(2):
+            Enrollment.objects.create(
+                student=Student.objects.create(user=User.objects.create(username=f"senior{index}"), student_id=f"F{index}"),
+                student_class=cls.final_class, academic_year=cls.year
+            )
+
+    def new_enrollments(self, academic_year):
+        return dict(Enrollment.objects.filter(academic_year=academic_year).values_list(
+            'student__student_id', 'student_class__name'
+        ))
+
+    def test_dry_run_leaves_no_rows(self):
+        counts = [model.objects.count() for model in (AcademicYear, Period, Class, ClassSubject, Enrollment)]
+        result = rollover_academic_year(self.year, {'6': '5', '5': None}, dry_run=True)
+        self.assertEqual((result.classes, result.promoted, result.graduated), (4, 12, 2))
+        self.assertEqual([model.objects.count() for model in (AcademicYear, Period, Class, ClassSubject, Enrollment)], counts)
+        self.assertFalse(Enrollment.objects.exclude(status='active').exists())
+
+    def test_second_rollover_is_refused(self):
+        rollover_academic_year(self.year, {'6': '5', '5': None})
+        with self.assertRaisesMessage(ValueError, "An academic year starting in 2026 already exists."):
+            rollover_academic_year(self.year, {'6': '5', '5': None})
+        self.assertEqual(AcademicYear.objects.count(), 2)
+
+    def test_promotion_closes_the_source_year_and_recounts_seats(self):
+        result = rollover_academic_year(self.year, {'6': '5', '5': None}, make_current=True)
+        self.assertEqual(self.new_enrollments(result.academic_year), {f"S{index:03}": "5A" for index in range(12)})
+        self.assertEqual(
+            dict(Enrollment.objects.filter(academic_year=self.year).values_list('student__student_id', 'status')),
+            {**{f"S{index:03}": 'completed' for index in range(12)}, 'F0': 'graduated', 'F1': 'graduated'}
+        )
+        self.assertEqual(
+            sorted(Class.objects.values_list('academic_year__start_date__year', 'name', 'enrolled_count')),
+            [(2025, '5A', 0), (2025, '6A', 0), (2025, '6B', 0), (2025, '6C', 0),
+             (2026, '5A', 12), (2026, '6A', 0), (2026, '6B', 0), (2026, '6C', 0)]
+        )
+        self.assertEqual(AcademicYear.objects.current(), result.academic_year)
+
+    def test_repeated_level_keeps_the_class_names(self):
+        result = rollover_academic_year(self.year, {'6': '6', '5': None})
+        self.assertEqual(
+            self.new_enrollments(result.academic_year),
+            {f"S{index:03}": f"6{'ABC'[index % 3]}" for index in range(12)}
+        )
+
+
+class PortalAPITests(SchoolTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.enrollment = cls.enrollments[0]
+        cls.owner = cls.enrollment.student.user
+        cls.other = cls.enrollments[1].student.user
+        with cls.captureOnCommitCallbacks(execute=True):
+            Grade.objects.create(
+                enrollment=cls.enrollment, subject=cls.subject, period=cls.period, value=12, max_value=20,
+                grade_type='test', date_graded=datetime.date(2025, 10, 1)
+            )
+
+    def save_and_commit(self, instance):
+        # Runs where the test's connection lives, unlike the event loop of async tests.
+        with self.captureOnCommitCallbacks(execute=True):
+            instance.save()
+
+    def url(self, name):
+        return f'/portal/enrollments/{self.enrollment.pk}/{name}/'
+
+    async def test_access_is_limited_to_the_student_and_staff(self):
+        response = await self.async_client.get(self.url('grades'))
+        self.assertEqual(response.status_code, 401)
+        await self.async_client.aforce_login(self.other)
+        response = await self.async_client.get(self.url('grades'))
+        self.assertEqual(response.status_code, 403)
+        await self.async_client.aforce_login(self.owner)
+        response = await self.async_client.get(self.url('grades'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['periods'][0]['grades']), 1)
+
+    async def test_reassigned_enrollment_is_no_longer_visible_to_its_former_student(self):
+        await self.async_client.aforce_login(self.owner)
+        response = await self.async_client.get(self.url('attendance'))
+        self.assertEqual(response.status_code, 200)
+        self.enrollment.student = await Student.objects.acreate(
+            user=await User.objects.acreate(username="transfer", first_name="New", last_name="Student"),
+            student_id="S999",
+            student_class=self.enrollment.student_class
+        )
+        await sync_to_async(self.save_and_commit)(self.enrollment)
+        response = await self.async_client.get(self.url('attendance'))
+        self.assertEqual(response.status_code, 403)
+
+    async def test_student_handed_to_another_user_is_no_longer_visible_to_the_previous_one(self):
+        await self.async_client.aforce_login(self.owner)
+        response = await self.async_client.get(self.url('attendance'))
+        self.assertEqual(response.status_code, 200)
+        student = await Student.objects.aget(pk=self.enrollment.student_id)
+        student.user = await User.objects.acreate(username="sibling", first_name="Other", last_name="User")
+        await sync_to_async(self.save_and_commit)(student)
+        response = await self.async_client.get(self.url('attendance'))
+        self.assertEqual(response.status_code, 403)
+        await self.async_client.aforce_login(student.user)
+        response = await self.async_client.get(self.url('attendance'))
+        self.assertEqual(response.status_code, 200)
+
+    async def test_invalid_period_is_rejected(self):
+        await self.async_client.aforce_login(self.owner)
+        response = await self.async_client.get(self.url('grades'), {'period': 'abc'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('period', response.json()['errors'])
+
+    async def test_conditional_requests_are_answered_304(self):
+        await self.async_client.aforce_login(self.owner)
+        response = await self.async_client.get(self.url('averages'))
+        self.assertEqual(response.status_code, 200)
+        response = await self.async_client.get(self.url('averages'), headers={'if-none-match': response['ETag']})
+        self.assertEqual(response.status_code, 304)
+
+    async def test_subject_coefficient_change_invalidates_averages(self):
+        await self.async_client.aforce_login(self.owner)
+        response = await self.async_client.get(self.url('averages'))
+        self.subject.coefficient = 4
+        await self.subject.asave()
+        response = await self.async_client.get(self.url('averages'), headers={'if-none-match': response['ETag']})
+        self.assertEqual(response.status_code, 200)
+
+    async def test_async_requests_are_instrumented(self):
+        await self.async_client.aforce_login(self.owner)
+        response = await self.async_client.get(self.url('attendance'))
+        self.assertEqual(response.status_code, 200)
+        queries = int(re.search(r'"(\d+) queries"', response['Server-Timing']).group(1))
+        self.assertGreater(queries, 0)
+
+    async def test_async_metrics_log_is_written_off_the_event_loop(self):
+        threads = []
+        write_log = RequestMetricsMiddleware.write_log
+
+        def record_thread(middleware, entry):
+            threads.append(threading.get_ident())
+            write_log(middleware, entry)
+
+        await self.async_client.aforce_login(self.owner)
+        with tempfile.TemporaryDirectory() as directory:
+            log_path = os.path.join(directory, 'metrics.jsonl')
+            with override_settings(REQUEST_METRICS_LOG=log_path), \
+                    mock.patch.object(RequestMetricsMiddleware, 'write_log', record_thread):
+                response = await self.async_client.get(self.url('attendance'))
+            with open(log_path) as log_file:
+                entry = json.loads(log_file.read())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((entry['status'], entry['path']), (200, self.url('attendance')))
+        self.assertEqual(len(threads), 1)
+        self.assertNotEqual(threads[0], threading.get_ident())
+
+
+class EnrollmentCounterTests(SchoolTestCase):
+    def counts(self):
+        return list(Class.objects.filter(pk__in=[c.pk for c in self.classes]).order_by('name').values_list(
+            'enrolled_count', flat=True
+        ))
+
+    def test_reserve_and_release_respect_the_bounds(self):
+        student_class = self.classes[0]
+        Class.objects.filter(pk=student_class.pk).update(max_students=5)
+        self.assertTrue(Class.objects.reserve_seat(student_class.pk))
+        self.assertFalse(Class.objects.reserve_seat(student_class.pk))
+        Class.objects.filter(pk=student_class.pk).update(enrolled_count=0)
+        Class.objects.release_seat(student_class.pk)
+        self.assertEqual(self.counts()[0], 0)
+
+    def test_transfer_moves_the_seat(self):
+        enrollment = self.enrollments[0]
+        enrollment.student_class = self.classes[1]
+        enrollment.save()
+        self.assertEqual(self.counts(), [3, 5, 4])
+        enrollment.status = 'withdrawn'
+        enrollment.save()
+        self.assertEqual(self.counts(), [3, 4, 4])
+
+    def test_transfer_into_a_full_class_is_rejected(self):
+        Class.objects.filter(pk=self.classes[1].pk).update(max_students=4)
+        enrollment = Enrollment.objects.get(pk=self.enrollments[0].pk)
+        enrollment.student_class = self.classes[1]
+        with self.assertRaisesMessage(ValidationError, "is full"):
+            enrollment.save()
+        self.assertEqual(self.counts(), [4, 4, 4])
+
+    def test_full_save_of_a_stale_class_keeps_the_counter(self):
+        student_class = Class.objects.get(pk=self.classes[0].pk)
+        Enrollment.objects.get(pk=self.enrollments[0].pk).delete()
+        student_class.name = "6Z"
+        student_class.save()
+        self.assertEqual(student_class.enrolled_count, 3)
+        self.assertEqual(Class.objects.get(pk=student_class.pk).enrolled_count, 3)
+
+    def test_student_clean_counts_enrollment_seats(self):
+        Class.objects.filter(pk=self.classes[0].pk).update(max_students=4)
+        student = Student.objects.get(pk=self.enrollments[0].student_id)
+        student.full_clean()
+        newcomer = Student(user=User.objects.create(username="newcomer"), student_id="S100", student_class=self.classes[0])
+        with self.assertRaisesMessage(ValidationError, "is full"):
+            newcomer.full_clean()
+
+    def test_import_reads_free_seats_when_it_enrolls(self):
+        Class.objects.filter(pk=self.classes[0].pk).update(max_students=5)
+        importer = StudentImporter()
+        # A seat taken through the UI after the importer was created.
+        Enrollment.objects.create(
+            student=Student.objects.create(user=User.objects.create(username="late"), student_id="S100"),
+            student_class=self.classes[0], academic_year=self.year
+        )
+        result = importer.run(io.StringIO(
+            "username,first_name,last_name,student_id,class\nnew,New,Student,S101,6A\n"
+        ))
+        self.assertEqual(result.created, 0)
+        self.assertEqual(result.errors[0].messages, ["The class 6A is full."])
+        self.assertEqual(self.counts(), [5, 4, 4])
+
+    def test_reconcile_command_fixes_drifted_counters(self):
+        Class.objects.filter(pk=self.classes[0].pk).update(enrolled_count=99)
+        output = io.StringIO()
+        call_command('reconcile_enrollment_counts', '--dry-run', stdout=output)
+        self.assertIn("1 class(es) out of sync", output.getvalue())
+        self.assertEqual(self.counts()[0], 99)
+        call_command('reconcile_enrollment_counts', stdout=io.StringIO())
+        self.assertEqual(self.counts(), [4, 4, 4])
+
+
+class AutocompleteTests(SchoolTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(User.objects.create(username="staff", is_staff=True))
+
+    def search(self, source, term, **params):
+        return self.client.get(f'/autocomplete/{source}/', {'term': term, **params})
+
+    def test_results_are_ids_and_labels(self):
+        response = self.search('enrollment', "S00")
+        self.assertEqual(response.status_code, 200)
+        results = response.json()['results']
+        self.assertEqual(len(results), 10)
+        self.assertEqual(results[0], {'id': self.enrollments[0].pk, 'label': "Student 00 (S000) - 6A"})
+        self.assertEqual(
+            self.search('class', "6b").json(), {'results': [{'id': self.classes[1].pk, 'label': "6B (6)"}]}
+        )
+        self.assertEqual(self.search('class', "", academic_year=self.year.pk + 1).json(), {'results': []})
+        self.assertEqual(self.search('class', "", academic_year="next").status_code, 400)
+        self.assertEqual(self.search('teacher', "").status_code, 404)
+
+    def test_only_staff_can_search(self):
+        self.client.force_login(User.objects.get(username="student0"))
+        self.assertEqual(self.search('student', "S").status_code, 302)
+
+    def test_renaming_a_student_invalidates_cached_results(self):
+        self.assertEqual(len(self.search('student', "Student").json()['results']), 12)
+        self.assertEqual(self.search('student', "Grace").json()['results'], [])
+        with self.captureOnCommitCallbacks(execute=True):
+            user = User.objects.get(username="student0")
+            user.first_name = "Grace"
+            user.save()
+        self.assertEqual(
+            self.search('student', "Grace").json()['results'],
+            [{'id': self.enrollments[0].student_id, 'label': "Grace 00 (S000)"}]
+        )
+        self.assertEqual(len(self.search('student', "Student").json()['results']), 11)
+
+
+class ExportTests(SchoolTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(User.objects.create(username="staff", is_staff=True))
+
+    def export(self, dataset, **filters):
+        return self.client.get(f'/export/{dataset}.csv', filters)
+
+    def test_export_streams_a_header_and_one_row_per_object(self):
+        response = self.export('enrollments', student_class=self.classes[0].pk)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="enrollments.csv"')
+        rows = list(csv.reader(io.StringIO(b"".join(response.streaming_content).decode())))
+        self.assertEqual(rows[0], [
+            'student_id', 'last_name', 'first_name', 'class', 'level',
+            'academic_year_start', 'date_enrolled', 'status',
+        ])
+        self.assertEqual([row[0] for row in rows[1:]], ["S000", "S003", "S006", "S009"])
+        self.assertEqual(len(list(csv.reader(io.StringIO(
+            b"".join(self.export('enrollments').streaming_content).decode()
+        )))), 13)
+
+    def test_invalid_filters_are_rejected(self):
+        response = self.export('enrollments', subject=self.subject.pk)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'errors': {'__all__': ["This export cannot be filtered by subject."]}})
+        response = self.export('grades', period=0)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('period', response.json()['errors'])
+        self.assertEqual(self.export('teachers').status_code, 404)
+
+
+class StudentImportTests(SchoolTestCase):
+    HEADER = "username,first_name,last_name,student_id,class,email\n"
+
+    def run_import(self, rows, **kwargs):
+        return StudentImporter(**kwargs).run(io.StringIO(self.HEADER + rows))
+
+    def upload(self, content, **data):
+        self.client.force_login(User.objects.create(username="staff", is_staff=True))
+        csv_file = io.BytesIO(content)
+        csv_file.name = "students.csv"
+        return self.client.post('/students/import/', {'file': csv_file, **data})
+
+    def test_valid_rows_are_imported_and_invalid_ones_reported(self):
+        User.objects.filter(username="student0").update(email="taken@example.com")
+        Class.objects.filter(pk=self.classes[1].pk).update(max_students=4)
+        result = self.run_import(
+            "new1,New,One,S100,6A,new1@example.com\n"
+            "new2,New,Two,S101,7Z,\n"
+            "new3,New,Three,S102,6B,\n"
+            "new4,New,Four,S103,6C,TAKEN@example.com\n"
+            "new5,New,Five,S104,6C,New1@example.com\n"
+        )
+        self.assertEqual(result.created, 1)
+        self.assertEqual([(error.line, error.messages) for error in result.errors], [
+            (3, [f"Unknown class '7Z' in {self.year}."]),
+            (4, ["The class 6B is full."]),
+            (5, ["Email TAKEN@example.com is already used."]),
+            (6, ["Email New1@example.com is already used."]),
+        ])
+        enrollment = Enrollment.objects.get(student__student_id="S100")
+        self.assertEqual(enrollment.student_class, self.classes[0])
+        self.assertEqual(Class.objects.get(pk=self.classes[0].pk).enrolled_count, 5)
+
+    def test_dry_run_rolls_back(self):
+        response = self.upload(f"{self.HEADER}new1,New,One,S100,6A,\n".encode(), dry_run="on")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['created'], 1)
+        self.assertFalse(User.objects.filter(username="new1").exists())
+        self.assertEqual(Class.objects.get(pk=self.classes[0].pk).enrolled_count, 4)
+
+    def test_non_utf8_upload_is_rejected(self):
+        response = self.upload(f"{self.HEADER}new1,Zoë,One,S100,6A,\n".encode('latin-1'))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'errors': {'file': ["The file must be a UTF-8 encoded CSV file."]}})
+        self.assertFalse(User.objects.filter(username="new1").exists())
+
+    def test_decoding_error_rolls_back_the_whole_file(self):
+        # The bad byte comes after the first chunks are inserted and well past the read buffer.
+        padding = "".join(f"pad{index},Pad,Row,P{index:04},7Z,\n" for index in range(400))
+        content = f"{self.HEADER}new1,New,One,S100,6A,\n{padding}".encode() + "new2,Zoë,Two,S101,6A,\n".encode('latin-1')
+        with tempfile.NamedTemporaryFile(suffix=".csv") as csv_file:
+            csv_file.write(content)
+            csv_file.flush()
+            with self.assertRaisesMessage(CommandError, "is not a UTF-8 encoded CSV file"):
+                call_command('import_students', csv_file.name, '--chunk-size', '1', stdout=io.StringIO())
+        self.assertFalse(User.objects.filter(username="new1").exists())
+        self.assertEqual(Class.objects.get(pk=self.classes[0].pk).enrolled_count, 4)
@@ -0,0 +1,22 @@
+from django.urls import path
+
+from . import views
+
+urlpatterns = [
+    path('grades/bulk/', views.GradeBulkEntryView.as_view(), name='grade_bulk_entry'),
+    path('attendance/roll-call/', views.RollCallView.as_view(), name='roll_call'),
+    path('autocomplete/<str:source>/', views.AutocompleteView.as_view(), name='autocomplete'),
+    path('metrics/requests/', views.RequestMetricsView.as_view(), name='request_metrics'),
+    path('export/<str:dataset>.csv', views.ExportView.as_view(), name='export'),
+    path('students/import/', views.StudentImportView.as_view(), name='student_import'),
+    path('portal/students/<int:pk>/enrollments/', views.StudentEnrollmentsAPIView.as_view(), name='portal_enrollments'),
+    path('portal/enrollments/<int:pk>/grades/', views.EnrollmentGradesAPIView.as_view(), name='portal_grades'),
+    path('portal/enrollments/<int:pk>/averages/', views.EnrollmentAveragesAPIView.as_view(), name='portal_averages'),
+    path('portal/enrollments/<int:pk>/attendance/', views.EnrollmentAttendanceAPIView.as_view(), name='portal_attendance'),
+    path(
+        'portal/enrollments/<int:pk>/attendance/calendar/',
+        views.EnrollmentAttendanceCalendarAPIView.as_view(),
+        name='portal_attendance_calendar'
+    ),
+    path('classes/<int:pk>/attendance/heatmap/', views.ClassAttendanceHeatmapView.as_view(), name='class_attendance_heatmap'),
+]
@@ -1,24 +1,49 @@
 
+import io
+import json
+
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.exceptions import ValidationError
+from django.db.models import Count, Prefetch
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.shortcuts import render, get_object_or_404, redirect
 from django.urls import reverse_lazy
-from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.decorators import method_decorator
+from django.utils.http import http_date
+from django.views.generic import View, ListView, DetailView, CreateView, UpdateView, DeleteView
 from .models import (
     AcademicYear, Period, Class, Teacher, Student, Subject,
-    ClassSubject, Enrollment, Attendance, Grade, Profile
+    ClassSubject, Enrollment, EnrollmentSubjectPeriodSummary, Attendance, Grade, Profile
 )
 from .forms import (
     AcademicYearForm, PeriodForm, ClassForm, TeacherForm, StudentForm, SubjectForm,
-    ClassSubjectForm, EnrollmentForm, AttendanceForm, GradeForm, ProfileForm
+    ClassSubjectForm, EnrollmentForm, AttendanceForm, GradeForm, ProfileForm,
+    BulkGradeEntryForm, RollCallForm, ExportFilterForm, StudentImportForm, AttendanceCalendarForm
 )
-
-class AcademicYearListView(ListView):
+from .attendance import class_heatmap, enrollment_calendar
+from .autocomplete import SOURCES
+from .conditional import ConditionalDetailMixin
+from .db_routers import ReplicaReadMixin, use_replica
+from .exports import EXPORTS
+from .grade_entry import bulk_enter_grades
+from .imports import StudentImporter
+from .middleware import request_metrics
+from .pagination import KeysetPaginationMixin
+from .portal import enrollment_owner, grades_last_modified, subjects_last_modified
+from .reference import PERIODS, SUBJECTS, CLASSES, CLASS_SUBJECTS, current_academic_year
+from .roll_call import roll_call_roster, record_roll_call
+
+class AcademicYearListView(ReplicaReadMixin, KeysetPaginationMixin, ListView):
     model = AcademicYear
     template_name = "academicyear/academic_year_list.html"
     context_object_name = "academic_years"
 
 
-class AcademicYearDetailView(DetailView):
+class AcademicYearDetailView(ConditionalDetailMixin, DetailView):
     model = AcademicYear
+    dependencies = [(Class, 'academic_year')]
+    cache_namespaces = [PERIODS.namespace]
     template_name = "academicyear/academic_year_detail.html"
     context_object_name = "academic_year"
 
@@ -44,14 +69,19 @@ class AcademicYearDeleteView(DeleteView):
 
 
 
-class PeriodListView(ListView):
+class PeriodListView(ReplicaReadMixin, KeysetPaginationMixin, ListView):
     model = Period
+    queryset = Period.objects.select_related('academic_year')
     template_name = "period/period_list.html"
     context_object_name = "periods"
+    keyset_ordering = ['-academic_year__start_date', 'start_date']
 
 
-class PeriodDetailView(DetailView):
+class PeriodDetailView(ConditionalDetailMixin, DetailView):
     model = Period
+    queryset = Period.objects.select_related('academic_year')
+    updated_fields = ['academic_year__updated_at']
+    cache_namespaces = [PERIODS.namespace]
     template_name = "period/period_detail.html"
     context_object_name = "period"
 
@@ -65,6 +95,7 @@ class PeriodCreateView(CreateView):
 
 class PeriodUpdateView(UpdateView):
     model = Period
+    queryset = Period.objects.select_related('academic_year')
     form_class = PeriodForm
     template_name = "period/period_form.html"
     success_url = reverse_lazy("period_list")
@@ -72,19 +103,30 @@ class PeriodUpdateView(UpdateView):
 
 class PeriodDeleteView(DeleteView):
     model = Period
+    queryset = Period.objects.select_related('academic_year')
     template_name = "confirm_delete.html"
     success_url = reverse_lazy("period_list")
 
 
 
-class ClassListView(ListView):
+class ClassListView(ReplicaReadMixin, KeysetPaginationMixin, ListView):
     model = Class
+    queryset = Class.objects.select_related('academic_year')
     template_name = "class/class_list.html"
     context_object_name = "classes"
 
 
-class ClassDetailView(DetailView):
+class ClassDetailView(ConditionalDetailMixin, DetailView):
     model = Class
+    updated_fields = ['updated_at', 'academic_year__updated_at']
+    dependencies = [(Enrollment, 'student_class'), (ClassSubject, 'student_class')]
+    cache_namespaces = [CLASS_SUBJECTS.namespace, SUBJECTS.namespace, PERIODS.namespace]
+    queryset = Class.objects.select_related('academic_year').prefetch_related(
+        Prefetch(
+            'class_subjects',
+            queryset=ClassSubject.objects.select_related('subject', 'teacher__user', 'period__academic_year')
+        )
+    )
     template_name = "class/class_detail.html"
     context_object_name = "class_obj"
 
@@ -98,6 +140,7 @@ class ClassCreateView(CreateView):
 
 class ClassUpdateView(UpdateView):
     model = Class
+    queryset = Class.objects.select_related('academic_year')
     form_class = ClassForm
     template_name = "class/class_form.html"
     success_url = reverse_lazy("class_list")
@@ -105,19 +148,29 @@ class ClassUpdateView(UpdateView):
 
 class ClassDeleteView(DeleteView):
     model = Class
+    queryset = Class.objects.select_related('academic_year')
     template_name = "confirm_delete.html"
     success_url = reverse_lazy("class_list")
 
 
 
-class TeacherListView(ListView):
+class TeacherListView(ReplicaReadMixin, KeysetPaginationMixin, ListView):
     model = Teacher
+    queryset = Teacher.objects.select_related('user')
     template_name = "teacher/teacher_list.html"
     context_object_name = "teachers"
 
 
-class TeacherDetailView(DetailView):
+class TeacherDetailView(ConditionalDetailMixin, DetailView):
     model = Teacher
+    dependencies = [(ClassSubject, 'teacher')]
+    cache_namespaces = [CLASS_SUBJECTS.namespace, SUBJECTS.namespace, CLASSES.namespace, PERIODS.namespace]
+    queryset = Teacher.objects.select_related('user').prefetch_related(
+        Prefetch(
+            'classsubject_set',
+            queryset=ClassSubject.objects.select_related('student_class__academic_year', 'subject', 'period__academic_year')
+        )
+    )
     template_name = "teacher/teacher_detail.html"
     context_object_name = "teacher"
 
@@ -131,6 +184,7 @@ class TeacherCreateView(CreateView):
 
 class TeacherUpdateView(UpdateView):
     model = Teacher
+    queryset = Teacher.objects.select_related('user')
     form_class = TeacherForm
     template_name = "teacher/teacher_form.html"
     success_url = reverse_lazy("teacher_list")
@@ -138,18 +192,31 @@ class TeacherUpdateView(UpdateView):
 
 class TeacherDeleteView(DeleteView):
     model = Teacher
+    queryset = Teacher.objects.select_related('user')
     template_name = "confirm_delete.html"
     success_url = reverse_lazy("teacher_list")
 
 
-class StudentListView(ListView):
+class StudentListView(ReplicaReadMixin, KeysetPaginationMixin, ListView):
     model = Student
+    queryset = Student.objects.select_related('user', 'student_class__academic_year')
     template_name = "student/student_list.html"
     context_object_name = "students"
 
 
-class StudentDetailView(DetailView):
+class StudentDetailView(ConditionalDetailMixin, DetailView):
     model = Student
+    updated_fields = ['updated_at', 'student_class__updated_at']
+    dependencies = [
+        (Enrollment, 'student'), (Grade, 'enrollment__student'), (Attendance, 'enrollment__student')
+    ]
+    cache_namespaces = [CLASSES.namespace]
+    queryset = Student.objects.select_related('user', 'student_class__academic_year').prefetch_related(
+        Prefetch(
+            'enrollment_set',
+            queryset=Enrollment.objects.select_related('student_class__academic_year', 'academic_year')
+        )
+    )
     template_name = "student/student_detail.html"
     context_object_name = "student"
 
@@ -163,6 +230,7 @@ class StudentCreateView(CreateView):
 
 class StudentUpdateView(UpdateView):
     model = Student
+    queryset = Student.objects.select_related('user', 'student_class__academic_year')
     form_class = StudentForm
     template_name = "student/student_form.html"
     success_url = reverse_lazy("student_list")
@@ -170,19 +238,25 @@ class StudentUpdateView(UpdateView):
 
 class StudentDeleteView(DeleteView):
     model = Student
+    queryset = Student.objects.select_related('user', 'student_class__academic_year')
     template_name = "confirm_delete.html"
     success_url = reverse_lazy("student_list")
 
 
 
-class SubjectListView(ListView):
+class SubjectListView(ReplicaReadMixin, KeysetPaginationMixin, ListView):
     model = Subject
+    queryset = Subject.objects.select_related('teacher__user')
     template_name = "subject/subject_list.html"
     context_object_name = "subjects"
 
 
-class SubjectDetailView(DetailView):
+class SubjectDetailView(ConditionalDetailMixin, DetailView):
     model = Subject
+    updated_fields = ['updated_at', 'teacher__updated_at']
+    dependencies = [(ClassSubject, 'subject')]
+    cache_namespaces = [CLASS_SUBJECTS.namespace]
+    queryset = Subject.objects.select_related('teacher__user')
     template_name = "subject/subject_detail.html"
     context_object_name = "subject"
 
@@ -196,6 +270,7 @@ class SubjectCreateView(CreateView):
 
 class SubjectUpdateView(UpdateView):
     model = Subject
+    queryset = Subject.objects.select_related('teacher__user')
     form_class = SubjectForm
     template_name = "subject/subject_form.html"
     success_url = reverse_lazy("subject_list")
@@ -203,5 +278,312 @@ class SubjectUpdateView(UpdateView):
 
 class SubjectDeleteView(DeleteView):
     model = Subject
+    queryset = Subject.objects.select_related('teacher__user')
     template_name = "confirm_delete.html"
     success_url = reverse_lazy("subject_list")
+
+
+
+@method_decorator(staff_member_required, name='dispatch')
+class GradeBulkEntryView(View):
+    def post(self, request, *args, **kwargs):
+        try:
+            payload = json.loads(request.body)
+        except ValueError:
+            return JsonResponse({'errors': {'__all__': ["Invalid JSON payload."]}}, status=400)
+
+        rows = payload.get('grades') if isinstance(payload, dict) else None
+        if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+            return JsonResponse({'errors': {'grades': ["Expected a list of grade rows."]}}, status=400)
+
+        form = BulkGradeEntryForm(payload)
+        if not form.is_valid():
+            return JsonResponse({'errors': form.errors}, status=400)
+
+        try:
+            grades, row_errors = bulk_enter_grades(rows=rows, **form.cleaned_data)
+        except ValidationError as e:
+            return JsonResponse({'errors': {'__all__': e.messages}}, status=400)
+        if row_errors:
+            return JsonResponse({'row_errors': row_errors}, status=400)
+        return JsonResponse({'created': len(grades)}, status=201)
+
+
+@method_decorator(staff_member_required, name='dispatch')
+class RollCallView(View):
+    def get(self, request, *args, **kwargs):
+        form = RollCallForm(request.GET)
+        if not form.is_valid():
+            return JsonResponse({'errors': form.errors}, status=400)
+        roster = roll_call_roster(
+            form.cleaned_data['student_class'],
+            form.cleaned_data['subject'],
+            form.cleaned_data['date']
+        )
+        return JsonResponse({'roster': roster})
+
+    def post(self, request, *args, **kwargs):
+        try:
+            payload = json.loads(request.body)
+        except ValueError:
+            return JsonResponse({'errors': {'__all__': ["Invalid JSON payload."]}}, status=400)
+
+        rows = payload.get('attendances') if isinstance(payload, dict) else None
+        if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+            return JsonResponse({'errors': {'attendances': ["Expected a list of attendance rows."]}}, status=400)
+
+        form = RollCallForm(payload)
+        if not form.is_valid():
+            return JsonResponse({'errors': form.errors}, status=400)
+
+        try:
+            records, row_errors = record_roll_call(rows=rows, **form.cleaned_data)
+        except ValidationError as e:
+            return JsonResponse({'errors': {'__all__': e.messages}}, status=400)
+        if row_errors:
+            return JsonResponse({'row_errors': row_errors}, status=400)
+        return JsonResponse({'saved': len(records)})
+
+
+@method_decorator(staff_member_required, name='dispatch')
+class AutocompleteView(View):
+    def get(self, request, source, *args, **kwargs):
+        if source not in SOURCES:
+            raise Http404("Unknown autocomplete source.")
+        academic_year_id = request.GET.get('academic_year')
+        if academic_year_id:
+            try:
+                academic_year_id = int(academic_year_id)
+            except ValueError:
+                return JsonResponse({'errors': {'academic_year': ["Enter a whole number."]}}, status=400)
+        else:
+            academic_year = current_academic_year()
+            academic_year_id = academic_year.pk if academic_year else None
+        results = SOURCES[source].search(request.GET.get('term', ''), academic_year_id)
+        return JsonResponse({'results': [{'id': pk, 'label': label} for pk, label in results]})
+
+
+@method_decorator(staff_member_required, name='dispatch')
+class RequestMetricsView(View):
+    def get(self, request, *args, **kwargs):
+        return JsonResponse({'views': request_metrics.snapshot()})
+
+    def delete(self, request, *args, **kwargs):
+        request_metrics.reset()
+        return HttpResponse(status=204)
+
+
+@method_decorator(staff_member_required, name='dispatch')
+class ExportView(View):
+    def get(self, request, dataset, *args, **kwargs):
+        if dataset not in EXPORTS:
+            raise Http404("Unknown export.")
+        form = ExportFilterForm(request.GET)
+        if not form.is_valid():
+            return JsonResponse({'errors': form.errors}, status=400)
+        try:
+            rows = EXPORTS[dataset].rows(**form.cleaned_data)
+        except ValueError as e:
+            return JsonResponse({'errors': {'__all__': [str(e)]}}, status=400)
+
+        response = StreamingHttpResponse(self.from_replica(rows), content_type='text/csv')
+        response['Content-Disposition'] = f'attachment; filename="{dataset}.csv"'
+        return response
+
+    def from_replica(self, rows):
+        # The rows are streamed after the view returns, so the replica is selected here.
+        with use_replica():
+            yield from rows
+
+
+@method_decorator(staff_member_required, name='dispatch')
+class StudentImportView(View):
+    def post(self, request, *args, **kwargs):
+        form = StudentImportForm(request.POST, request.FILES)
+        if not form.is_valid():
+            return JsonResponse({'errors': form.errors}, status=400)
+
+        lines = io.TextIOWrapper(form.cleaned_data['file'], encoding='utf-8-sig', newline='')
+        try:
+            result = StudentImporter().run(lines, dry_run=form.cleaned_data['dry_run'])
+        except UnicodeDecodeError:
+            return JsonResponse({'errors': {'file': ["The file must be a UTF-8 encoded CSV file."]}}, status=400)
+        return JsonResponse({
+            'created': result.created,
+            'errors': [error._asdict() for error in result.errors],
+        }, status=400 if result.errors else 201)
+
+
+class PortalView(View):
+    """
+    Async, read-only JSON view of the student portal. A student only sees their own records;
+    staff see every student.
+    """
+
+    async def check_access(self, request, owner_id):
+        user = await request.auser()
+        if not user.is_authenticated:
+            return JsonResponse({'errors': {'__all__': ["Authentication required."]}}, status=401)
+        if owner_id is None:
+            raise Http404("Not found.")
+        if not (user.is_staff or user.pk == owner_id):
+            return JsonResponse({'errors': {'__all__': ["You cannot access this student."]}}, status=403)
+        return None
+
+
+class StudentEnrollmentsAPIView(PortalView):
+    async def get(self, request, pk, *args, **kwargs):
+        owner_id = await Student.objects.filter(pk=pk).values_list('user_id', flat=True).afirst()
+        denied = await self.check_access(request, owner_id)
+        if denied:
+            return denied
+        enrollments = [
+            {
+                'id': enrollment['pk'],
+                'academic_year': enrollment['academic_year_id'],
+                'class': enrollment['student_class__name'],
+                'level': enrollment['student_class__level'],
+                'status': enrollment['status'],
+                'date_enrolled': enrollment['date_enrolled'],
+            }
+            async for enrollment in Enrollment.objects.filter(student_id=pk).values(
+                'pk', 'academic_year_id', 'student_class__name', 'student_class__level', 'status', 'date_enrolled'
+            )
+        ]
+        return JsonResponse({'enrollments': enrollments})
+
+
+class EnrollmentPortalView(PortalView):
+    """
+    Portal data of one enrollment. With `conditional`, responses carry an ETag and a
+    Last-Modified date from the last change of the data (`get_last_modified()`, the last grade
+    change by default), and a matching conditional request is answered 304 from the cache
+    without querying grades.
+    """
+    conditional = False
+
+    async def get_last_modified(self, pk):
+        return await grades_last_modified(pk)
+
+    async def get(self, request, pk, *args, **kwargs):
+        denied = await self.check_access(request, await enrollment_owner(pk))
+        if denied:
+            return denied
+
+        if self.conditional:
+            last_modified = await self.get_last_modified(pk)
+            timestamp = int(last_modified.timestamp())
+            etag = f'"{pk}-{last_modified.timestamp():.6f}"'
+            not_modified = get_conditional_response(request, etag=etag, last_modified=timestamp)
+            if not_modified is not None:
+                return not_modified
+
+        response = JsonResponse(await self.get_data(request, pk))
+        if self.conditional:
+            response.headers['ETag'] = etag
+            response.headers['Last-Modified'] = http_date(timestamp)
+            patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+
+class EnrollmentGradesAPIView(EnrollmentPortalView):
+    conditional = True
+
+    async def get(self, request, pk, *args, **kwargs):
+        self.period_id = request.GET.get('period')
+        if self.period_id:
+            try:
+                self.period_id = int(self.period_id)
+            except ValueError:
+                return JsonResponse({'errors': {'period': ["Enter a whole number."]}}, status=400)
+        return await super().get(request, pk, *args, **kwargs)
+
+    async def get_data(self, request, pk):
+        grades = Grade.objects.filter(enrollment_id=pk)
+        if self.period_id:
+            grades = grades.filter(period_id=self.period_id)
+        periods = {}
+        async for grade in grades.order_by('period__start_date', 'date_graded').values(
+            'period_id', 'period__name', 'subject_id', 'subject__name',
+            'value', 'max_value', 'coefficient', 'grade_type', 'date_graded'
+        ):
+            period = periods.setdefault(grade['period_id'], {
+                'id': grade['period_id'], 'name': grade['period__name'], 'grades': []
+            })
+            period['grades'].append({
+                'subject': grade['subject_id'],
+                'subject_name': grade['subject__name'],
+                'value': grade['value'],
+                'max_value': grade['max_value'],
+                'coefficient': grade['coefficient'],
+                'grade_type': grade['grade_type'],
+                'date_graded': grade['date_graded'],
+            })
+        return {'periods': list(periods.values())}
+
+
+class EnrollmentAveragesAPIView(EnrollmentPortalView):
+    conditional = True
+
+    async def get_last_modified(self, pk):
+        # Averages are weighted by Subject.coefficient, so a subject change invalidates them too.
+        return max(await grades_last_modified(pk), await subjects_last_modified())
+
+    async def get_data(self, request, pk):
+        periods = {}
+        async for summary in EnrollmentSubjectPeriodSummary.objects.filter(
+            enrollment_id=pk, coefficient_sum__gt=0
+        ).order_by('period__start_date', 'subject__name').values(
+            'period_id', 'period__name', 'subject_id', 'subject__name', 'subject__coefficient',
+            'weighted_sum', 'coefficient_sum', 'grade_count'
+        ):
+            period = periods.setdefault(summary['period_id'], {
+                'id': summary['period_id'], 'name': summary['period__name'], 'subjects': []
+            })
+            period['subjects'].append({
+                'subject': summary['subject_id'],
+                'subject_name': summary['subject__name'],
+                'coefficient': summary['subject__coefficient'],
+                'grades': summary['grade_count'],
+                'average': round(summary['weighted_sum'] / summary['coefficient_sum'], 2),
+            })
+        for period in periods.values():
+            weight = sum(subject['coefficient'] for subject in period['subjects'])
+            total = sum(subject['average'] * subject['coefficient'] for subject in period['subjects'])
+            period['average'] = round(total / weight, 2) if weight else None
+        return {'periods': list(periods.values())}
+
+
+class EnrollmentAttendanceCalendarAPIView(EnrollmentPortalView):
+    async def get(self, request, pk, *args, **kwargs):
+        self.form = AttendanceCalendarForm(request.GET)
+        if not self.form.is_valid():
+            return JsonResponse({'errors': self.form.errors}, status=400)
+        return await super().get(request, pk, *args, **kwargs)
+
+    async def get_data(self, request, pk):
+        return {'buckets': [row async for row in enrollment_calendar(pk, **self.form.cleaned_data)]}
+
+
+class EnrollmentAttendanceAPIView(EnrollmentPortalView):
+    async def get_data(self, request, pk):
+        counts = {status: 0 for status, _ in Attendance.STATUS}
+        async for row in Attendance.objects.filter(enrollment_id=pk).order_by().values('status').annotate(
+            count=Count('id')
+        ):
+            counts[row['status']] = row['count']
+        total = sum(counts.values())
+        return {
+            'total': total,
+            'counts': counts,
+            'attendance_rate': round((counts['present'] + counts['late']) / total * 100, 1) if total else None,
+        }
+
+
+@method_decorator(staff_member_required, name='dispatch')
+class ClassAttendanceHeatmapView(View):
+    def get(self, request, pk, *args, **kwargs):
+        form = AttendanceCalendarForm(request.GET)
+        if not form.is_valid():
+            return JsonResponse({'errors': form.errors}, status=400)
+        return JsonResponse({'buckets': list(class_heatmap(pk, **form.cleaned_data))})
@@ -0,0 +1,31 @@
+from django import forms
+from django.urls import reverse
+
+from .autocomplete import SOURCES
+
+
+class AutocompleteSelect(forms.Select):
+    """
+    Select that only renders the selected option; the other options are searched on
+    the autocomplete endpoint of `source` as the user types.
+    """
+
+    class Media:
+        js = ['core/autocomplete.js']
+
+    def __init__(self, source, attrs=None):
+        super().__init__(attrs)
+        self.source = source
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        context['widget']['attrs']['data-autocomplete-url'] = reverse('autocomplete', args=[self.source])
+        return context
+
+    def optgroups(self, name, value, attrs=None):
+        selected = [v for v in value if v not in ('', None)]
+        options = [self.create_option(name, '', '---------', not selected, 0)]
+        if selected:
+            for index, (pk, label) in enumerate(SOURCES[self.source].labels(selected), start=1):
+                options.append(self.create_option(name, pk, label, True, index))
+        return [(None, options, 0)]
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -41,6 +42,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -52,6 +54,29 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'student_grades.urls'
 
+# Per-request wall time, query count and DB time, kept for the last
+# REQUEST_METRICS_WINDOW requests of each view and served at /metrics/requests/.
+# Set REQUEST_METRICS_LOG to a file path to also append every request as a JSON line.
+
+REQUEST_METRICS_ENABLED = True
+
+REQUEST_METRICS_WINDOW = 1000
+
+REQUEST_METRICS_LOG = None
+
+# Students absent (absent or excused) from at least CHRONIC_ABSENCE_THRESHOLD percent of
+# their recorded sessions in a period are flagged by the flag_chronic_absences command,
+# once they have at least CHRONIC_ABSENCE_MIN_SESSIONS sessions.
+
+CHRONIC_ABSENCE_THRESHOLD = 10.0
+
+CHRONIC_ABSENCE_MIN_SESSIONS = 10
+
+# Report cards are rendered by a pool of REPORT_CARD_WORKERS processes (one per CPU when
+# None) by the generate_report_cards command and the admin actions.
+
+REPORT_CARD_WORKERS = None
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -72,14 +97,84 @@ WSGI_APPLICATION = 'student_grades.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
+# DB_ENGINE selects the backend: 'sqlite' (default) or 'postgresql' (requires psycopg, and
+# psycopg[pool] when DB_POOL_MAX_SIZE is set). Set DB_REPLICA_HOST to route reads made
+# inside core.db_routers.use_replica() (list views, exports, report cards) to a read replica.
+
+DB_ENGINE = os.environ.get('DB_ENGINE', 'sqlite')
+
+if DB_ENGINE == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('DB_NAME', 'student_grades'),
+            'USER': os.environ.get('DB_USER', ''),
+            'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+            'HOST': os.environ.get('DB_HOST', ''),
+            'PORT': os.environ.get('DB_PORT', ''),
+            'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {},
+        }
+    }
+    if os.environ.get('DB_POOL_MAX_SIZE'):
+        # Pooled connections replace persistent ones.
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', 2)),
+            'max_size': int(os.environ['DB_POOL_MAX_SIZE']),
+            'timeout': 10,
+        }
+    if os.environ.get('DB_REPLICA_HOST'):
+        DATABASES['replica'] = {
+            **DATABASES['default'],
+            'HOST': os.environ['DB_REPLICA_HOST'],
+            'PORT': os.environ.get('DB_REPLICA_PORT', DATABASES['default']['PORT']),
+            'OPTIONS': dict(DATABASES['default']['OPTIONS']),
+            'TEST': {'MIRROR': 'default'},
+        }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('DB_NAME', BASE_DIR / 'db.sqlite3'),
+            'OPTIONS': {
+                # Readers no longer block the writer, and writers wait for the lock instead
+                # of failing with "database is locked".
+                'init_command': (
+                    'PRAGMA journal_mode=WAL;'
+                    'PRAGMA synchronous=NORMAL;'
+                    'PRAGMA busy_timeout=5000;'
+                    'PRAGMA temp_store=MEMORY;'
+                    'PRAGMA cache_size=-20000;'
+                ),
+                'transaction_mode': 'IMMEDIATE',
+                'timeout': 5,
+            },
+        }
+    }
+
+DATABASE_ROUTERS = ['core.db_routers.ReplicaRouter']
 
-DATABASES = {
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/ref/settings/#caches
+# Cache versions are stored in the default cache, so it must be shared by all worker
+# processes in production (Redis or Memcached); the local-memory backend is per process.
+# Reference data (years, periods, subjects, classes) is also kept in a per-process LRU
+# of REFERENCE_CACHE_SIZE entries in front of it, whose cache versions are checked against
+# the shared cache at most every REFERENCE_VERSION_TTL seconds.
+
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'student-grades',
     }
 }
 
+REFERENCE_CACHE_SIZE = 512
+REFERENCE_VERSION_TTL = 5
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators